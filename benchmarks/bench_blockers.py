@@ -0,0 +1,78 @@
+"""Compare culling candidates against blockers with and without an index
+
+Candidates are boxes around random points near a grid mesh whose
+triangles block them. The indexed columns time building the box_index,
+then culling all candidates against it in one batch, the only part a
+scatter repeats while the blockers stay the same. The brute force
+column is the time to test all candidates, one at a time, against
+every triangle box, extrapolated from a sample.
+
+Run with `python benchmarks/bench_blockers.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import scatter
+import scatter_core
+
+BLOCKER_VERTICES = (10000, 100000)
+CANDIDATES = 100000
+SAMPLE = 200
+RADIUS = 0.5
+
+
+def candidate_boxes(side):
+    positions = np.random.uniform(0.0, side, size=(CANDIDATES, 3))
+    # on the wavy surface of maya_standin.grid_mesh, give or take a unit
+    positions[:, 1] = (np.sin(positions[:, 0] * 0.1) *
+                       np.cos(positions[:, 2] * 0.1) +
+                       np.random.uniform(-1.0, 1.0, size=CANDIDATES))
+    return scatter_core.radius_boxes(positions, np.full(CANDIDATES, RADIUS))
+
+
+def brute_force_time(boxes, queries):
+    """every triangle box against one candidate at a time, for all of
+    the candidates"""
+    start = timeit.default_timer()
+    for query in queries[:SAMPLE]:
+        ((query[:3] <= boxes[:, 3:]) &
+         (boxes[:, :3] <= query[3:])).all(axis=1).any()
+    return (timeit.default_timer() - start) * len(queries) / SAMPLE
+
+
+def main():
+    print('%10s %11s %16s %15s %9s %16s' % (
+        'triangles', 'candidates', 'index build (s)', 'index cull (s)',
+        'blocked', 'brute force (s)'))
+    for vertex_count in BLOCKER_VERTICES:
+        maya_standin.reset()
+        maya_standin.grid_mesh('pPlane1', vertex_count)
+        boxes = scatter_core.triangle_boxes(
+            scatter.get_mesh_point_array('pPlane1'),
+            scatter.get_mesh_triangles('pPlane1'))
+        queries = candidate_boxes(np.sqrt(vertex_count))
+        build_time = min(timeit.repeat(
+            lambda: scatter_core.box_index(boxes), number=1, repeat=3))
+        index = scatter_core.box_index(boxes)
+        cull_time = min(timeit.repeat(
+            lambda: scatter_core.boxes_blocked(index, queries), number=1,
+            repeat=3))
+        blocked = scatter_core.boxes_blocked(index, queries).mean()
+        print('%10d %11d %16.4f %15.4f %8.0f%% %16.4f' % (
+            len(boxes), CANDIDATES, build_time, cull_time, blocked * 100.0,
+            brute_force_time(boxes, queries)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Time a frame change of a bound scatter on a deforming mesh
+
+A wave is run across a grid mesh and every frame of the bound scatter
+re-evaluates all instances from the deformed points in one pass. The
+baked frame column times moving the same number of transforms with
+one cmds.xform each, the least a baked scatter would need per frame.
+
+Run with `python benchmarks/bench_bound.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import maya.cmds as cmds
+import scatter
+
+INSTANCE_COUNT = 50000
+VERTEX_COUNT = 100000
+FRAMES = 5
+
+
+def deform(rest, frame):
+    """move the mesh points of pPlane1 along a travelling wave"""
+    points = rest.copy()
+    points[:, 1] += np.sin(points[:, 0] * 0.5 + frame * 0.3)
+    maya_standin.SCENE['meshes']['pPlane1'][:] = [
+        maya_standin.MPoint(*row) for row in points.tolist()]
+
+
+def bound_scene(surface, normal):
+    maya_standin.reset()
+    vertex_count = len(maya_standin.grid_mesh('pPlane1', VERTEX_COUNT))
+    maya_standin.SCENE['nodes']['pCube1'] = {'type': 'transform'}
+    tool = scatter.Scatter()
+    tool.output_mode = 'bound'
+    tool.surface_bool = surface
+    tool.surface_count = INSTANCE_COUNT
+    tool.normal_bool = normal
+    tool.density_value = (1.0 if surface else
+                          min(1.0, float(INSTANCE_COUNT) / vertex_count))
+    cmds.select(['pCube1', 'pPlane1.vtx[0:%d]' % (vertex_count - 1)])
+    tool.scatter_obj()
+    return tool
+
+
+def frame_time(surface, normal):
+    """fastest frame change, with the mesh deformation not counted"""
+    tool = bound_scene(surface, normal)
+    rest = np.array([[point.x, point.y, point.z] for point
+                     in maya_standin.SCENE['meshes']['pPlane1']])
+    times = []
+    for frame in range(FRAMES):
+        deform(rest, frame)
+        start = timeit.default_timer()
+        maya_standin.set_time(frame)
+        times.append(timeit.default_timer() - start)
+    count = len(tool.bound_scatters[0]['corners'])
+    tool.stop_following_time()
+    return count, min(times)
+
+
+def baked_frame_time(count):
+    """one cmds.xform per transform, as moving all baked instances takes"""
+    maya_standin.reset()
+    for index in range(count):
+        maya_standin.SCENE['nodes']['inst%d' % index] = {'type': 'transform'}
+    matrices = np.tile(np.eye(4).ravel(), (count, 1)).tolist()
+    start = timeit.default_timer()
+    for index, matrix in enumerate(matrices):
+        cmds.xform('inst%d' % index, ws=True, matrix=matrix)
+    return timeit.default_timer() - start
+
+
+def main():
+    print('%8s %7s %10s %11s %8s %16s' % ('binding', 'normal', 'instances',
+                                          'frame (s)', 'fps',
+                                          'baked frame (s)'))
+    for surface in (False, True):
+        for normal in (False, True):
+            count, seconds = frame_time(surface, normal)
+            print('%8s %7s %10d %11.4f %8.1f %16.4f' % (
+                'surface' if surface else 'vertex', normal, count, seconds,
+                1.0 / seconds, baked_frame_time(count)))
+
+
+if __name__ == '__main__':
+    main()
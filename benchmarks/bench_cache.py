@@ -0,0 +1,90 @@
+"""Time scatter cache export and memory-mapped reload, and compare sizes
+
+The .ma size is estimated from the createNode and setAttr lines Maya
+writes for each scattered transform. Importing onto transforms is timed
+on fewer points, its cost is per instance.
+
+Run with `python benchmarks/bench_cache.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import scatter
+import scatter_cache
+
+POINT_COUNTS = (10000, 100000, 1000000)
+IMPORT_COUNT = 10000
+MA_NODE = ('createNode transform -n "group_inst_obj%d" -p "scatter_grp";\n'
+           '\tsetAttr ".t" -type "double3" %.6g %.6g %.6g ;\n'
+           '\tsetAttr ".r" -type "double3" %.6g %.6g %.6g ;\n'
+           '\tsetAttr ".s" -type "double3" %.6g %.6g %.6g ;\n')
+
+
+def point_set(count):
+    values = np.random.uniform(-500.0, 500.0, size=(count, 9))
+    values[:, 3:6] = np.radians(values[:, 3:6] % 360.0)
+    values[:, 6:9] = np.random.uniform(0.5, 2.0, size=(count, 3))
+    return (np.arange(count), values,
+            np.random.randint(0, 3, size=count))
+
+
+def ma_size(values):
+    """bytes of the .ma lines of every transform"""
+    degrees = values.copy()
+    degrees[:, 3:6] = np.degrees(degrees[:, 3:6])
+    return sum(len(MA_NODE % ((index,) + tuple(row)))
+               for index, row in enumerate(degrees.tolist()))
+
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), 'points.scache')
+    params = scatter.Scatter().settings()
+    sources = ['rock', 'tree', 'bush']
+    print('%10s %10s %10s %12s %12s %8s' % (
+        'points', 'write (s)', 'read (s)', 'cache (MB)', '.ma (MB)',
+        'ratio'))
+    for count in POINT_COUNTS:
+        ids, values, choices = point_set(count)
+        write_time = min(timeit.repeat(lambda: scatter_cache.write_cache(
+            path, ids, values, choices, sources, params), number=1,
+            repeat=3))
+        # touch every column so the mapped pages are really read
+        read_time = min(timeit.repeat(lambda: [
+            column.sum() for name, column
+            in scatter_cache.read_cache(path).items()
+            if name in ('ids', 'translate', 'rotate', 'scale', 'source')],
+            number=1, repeat=3))
+        cache_size = os.path.getsize(path) / 1e6
+        text_size = ma_size(values) / 1e6
+        print('%10d %10.4f %10.4f %12.1f %12.1f %8.1f' % (
+            count, write_time, read_time, cache_size, text_size,
+            text_size / cache_size))
+
+    maya_standin.reset()
+    for source in sources:
+        maya_standin.SCENE['nodes'][source] = {'type': 'transform'}
+    ids, values, choices = point_set(IMPORT_COUNT)
+    scatter_cache.write_cache(path, ids, values, choices, sources, params)
+    tool = scatter.Scatter()
+    start = timeit.default_timer()
+    for progress in tool.import_cache_steps(path):
+        pass
+    print('import onto %d transforms: %.3f s' % (
+        IMPORT_COUNT, timeit.default_timer() - start))
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Time the minimum distance filter against candidate count
+
+Candidates are uniform on a thin slab, with the slab growing along with
+the count so the candidate density per radius stays fixed. Time per
+candidate should stay roughly flat.
+Run with `python benchmarks/bench_min_distance.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import scatter_core
+
+CANDIDATE_COUNTS = (10000, 100000, 1000000)
+RADIUS = 1.0
+CANDIDATES_PER_AREA = 4.0
+
+
+def main():
+    print('%10s %10s %12s %16s' % ('candidates', 'kept', 'filter (s)',
+                                   'us / candidate'))
+    for count in CANDIDATE_COUNTS:
+        side = np.sqrt(count / CANDIDATES_PER_AREA)
+        positions = np.random.uniform((0.0, 0.0, 0.0), (side, 0.5, side),
+                                      (count, 3))
+        priorities = np.random.uniform(size=count)
+        kept = scatter_core.min_distance_mask(positions, RADIUS,
+                                              priorities).sum()
+        filter_time = min(timeit.repeat(
+            lambda: scatter_core.min_distance_mask(positions, RADIUS,
+                                                   priorities),
+            number=1, repeat=3))
+        print('%10d %10d %12.4f %16.2f' % (count, kept, filter_time,
+                                           filter_time / count * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Compare the per-point tangent frame loop with the batched arrays
+
+The loop reproduces what object_normal used to do per vertex: a PyMEL
+normal query (charged as one command), a cmds.xform position query and the
+cross products in pure Python. The batched path is vertex_positions,
+vertex_normals and normal_matrices.
+Run with `python benchmarks/bench_object_normal.py` from the repo root.
+"""
+from __future__ import print_function
+
+import math
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import maya.cmds as cmds
+import scatter
+import scatter_core
+
+POINT_COUNTS = (1000, 10000, 100000)
+
+
+def cross(a, b):
+    return (a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0])
+
+
+def normalize(a):
+    length = math.sqrt(a[0] * a[0] + a[1] * a[1] + a[2] * a[2])
+    return (a[0] / length, a[1] / length, a[2] / length)
+
+
+def pymel_normal(vert):
+    maya_standin._command_cost()
+    match = maya_standin.VERTEX_RE.match(vert)
+    normal = maya_standin.SCENE['normals'][match.group('mesh')][
+        int(match.group('index'))]
+    return normal.x + 0.01, normal.y, normal.z
+
+
+def frame_loop(den_list):
+    matrices = []
+    for vert in den_list:
+        normal = pymel_normal(vert)
+        tangent = normalize(cross(normal, (0.0, 1.0, 0.0)))
+        tangent2 = normalize(cross(normal, tangent))
+        pos = cmds.xform([vert], q=True, ws=True, t=True)
+        matrices.append([tangent2[0], tangent2[1], tangent2[2], 0.0,
+                         normal[0], normal[1], normal[2], 0.0,
+                         tangent[0], tangent[1], tangent[2], 0.0,
+                         pos[0], pos[1], pos[2], 1.0])
+    return matrices
+
+
+def batched(tool, mesh_ids):
+    return scatter_core.normal_matrices(tool.vertex_positions(mesh_ids),
+                                        tool.vertex_normals(mesh_ids))
+
+
+def main():
+    tool = scatter.Scatter()
+    print('%10s %14s %14s %8s' % ('points', 'loop (s)', 'numpy (s)',
+                                  'ratio'))
+    for count in POINT_COUNTS:
+        maya_standin.reset()
+        den_list = maya_standin.grid_mesh('pPlane1', count)
+        # the loop is offset off the +Y normals its cross product cannot
+        # handle; normal_matrices handles them directly
+        loop_time = min(timeit.repeat(lambda: frame_loop(den_list),
+                                      number=1, repeat=1))
+        mesh_ids = [('pPlane1', np.arange(len(den_list)))]
+        numpy_time = min(timeit.repeat(lambda: batched(tool, mesh_ids),
+                                       number=1, repeat=3))
+        print('%10d %14.4f %14.4f %8.1f' % (len(den_list), loop_time,
+                                            numpy_time,
+                                            loop_time / numpy_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Compare per-vertex cmds.xform queries with the bulk getPoints path
+
+Run with `python benchmarks/bench_object_y.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import maya.cmds as cmds
+import scatter
+
+VERTEX_COUNTS = (1000, 10000, 100000, 500000)
+
+
+def xform_loop(den_list):
+    return [cmds.xform(vert, q=True, ws=True, t=True) for vert in den_list]
+
+
+def main():
+    tool = scatter.Scatter()
+    print('%10s %14s %14s %8s' % ('vertices', 'xform (s)', 'bulk (s)',
+                                  'ratio'))
+    for count in VERTEX_COUNTS:
+        maya_standin.reset()
+        den_list = maya_standin.grid_mesh('pPlane1', count)
+        xform_time = min(timeit.repeat(lambda: xform_loop(den_list),
+                                       number=1, repeat=1))
+        mesh_ids = [('pPlane1', np.arange(len(den_list)))]
+        bulk_time = min(timeit.repeat(
+            lambda: tool.vertex_positions(mesh_ids), number=1, repeat=3))
+        print('%10d %14.4f %14.4f %8.1f' % (len(den_list), xform_time,
+                                            bulk_time,
+                                            xform_time / bulk_time))
+
+
+if __name__ == '__main__':
+    main()
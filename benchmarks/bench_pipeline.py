@@ -0,0 +1,96 @@
+"""Compare computing all normal frames before instancing with the pipeline
+
+The serial path is what object_normal_steps used to do: normal_matrices
+over every point, then the instancing loop. The pipelined path computes
+the frames batch by batch on a worker thread while the main thread
+instances, so its time should approach the larger of the two stages
+rather than their sum. The stand-in charges maya.cmds calls as Python
+busy loops that hold the GIL, so only the GIL-free parts of the NumPy
+math overlap here. The time to the first instanced chunk, which the
+progress bar and Cancel wait on, no longer grows with the point count.
+
+Run with `python benchmarks/bench_pipeline.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import maya.cmds as cmds
+import scatter
+import scatter_core
+
+POINT_COUNTS = (10000, 50000)
+LATENCY_COUNTS = (10000, 100000, 1000000)
+
+
+def points(count):
+    positions = np.random.uniform(-100.0, 100.0, size=(count, 3))
+    normals = np.random.normal(size=(count, 3))
+    normals /= np.linalg.norm(normals, axis=1)[:, np.newaxis]
+    return positions, normals
+
+
+def serial_steps(tool, positions, normals):
+    matrices = scatter_core.normal_matrices(positions, normals).reshape(
+        -1, 16).tolist()
+
+    def place(new_instance, index):
+        cmds.xform(new_instance, ws=True, matrix=matrices[index])
+    for done in tool.instance_steps(['pCube1'], None, len(matrices), place,
+                                    []):
+        yield done
+
+
+def pipelined_steps(tool, positions, normals):
+    return tool.object_normal_steps(positions, normals, ['pCube1'], [])
+
+
+def timed(steps, first_only=False):
+    """seconds to run steps to the end, or to its first chunk"""
+    maya_standin.reset()
+    maya_standin.SCENE['nodes']['pCube1'] = {'type': 'transform'}
+    start = timeit.default_timer()
+    for done in steps:
+        if first_only:
+            break
+    seconds = timeit.default_timer() - start
+    steps.close()
+    return seconds
+
+
+def main():
+    tool = scatter.Scatter()
+    print('%8s %11s %12s %13s %7s' % ('points', 'frames (s)', 'serial (s)',
+                                      'pipeline (s)', 'ratio'))
+    for count in POINT_COUNTS:
+        positions, normals = points(count)
+        frame_time = min(timeit.repeat(
+            lambda: scatter_core.normal_matrices(positions, normals).reshape(
+                -1, 16).tolist(), number=1, repeat=3))
+        serial_time = timed(serial_steps(tool, positions, normals))
+        pipeline_time = timed(pipelined_steps(tool, positions, normals))
+        print('%8d %11.4f %12.4f %13.4f %7.2f' % (
+            count, frame_time, serial_time, pipeline_time,
+            serial_time / pipeline_time))
+
+    print('\n%8s %18s %20s' % (
+        'points', 'serial first (s)', 'pipeline first (s)'))
+    for count in LATENCY_COUNTS:
+        positions, normals = points(count)
+        print('%8d %18.4f %20.4f' % (
+            count, timed(serial_steps(tool, positions, normals), True),
+            timed(pipelined_steps(tool, positions, normals), True)))
+
+
+if __name__ == '__main__':
+    main()
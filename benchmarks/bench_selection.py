@@ -0,0 +1,63 @@
+"""Compare peak memory of flattened and compact vertex selections
+
+The flattened path is what `cmds.ls(selection=True, fl=True)` hands
+Python: one string per vertex. The compact path parses the unflattened
+'mesh.vtx[a:b]' range and samples integer ids out of it.
+Run with `python benchmarks/bench_selection.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import scatter
+import scatter_core
+
+VERTEX_COUNTS = (10000, 100000, 1000000)
+DENSITY = 0.1
+
+
+def flattened(count):
+    vert_list = ['pPlane1.vtx[%d]' % index for index in range(count)]
+    return random.sample(vert_list, int(round(count * DENSITY)))
+
+
+def compact(count):
+    mesh_ranges = scatter.selection_vertex_ranges(['pPlane1.vtx[0:%d]' %
+                                                   (count - 1)])
+    return scatter_core.sample_vertex_ids(mesh_ranges, DENSITY, 0)
+
+
+def peak_memory(func, count):
+    tracemalloc.start()
+    start = timeit.default_timer()
+    func(count)
+    elapsed = timeit.default_timer() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024.0 / 1024.0, elapsed
+
+
+def main():
+    # keep one-off numpy imports out of the first measurement
+    compact(10)
+    print('%10s %14s %12s %14s %12s' % ('vertices', 'flat (MB)', 'flat (s)',
+                                        'compact (MB)', 'compact (s)'))
+    for count in VERTEX_COUNTS:
+        flat_mb, flat_time = peak_memory(flattened, count)
+        compact_mb, compact_time = peak_memory(compact, count)
+        print('%10d %14.1f %12.4f %14.1f %12.4f' % (
+            count, flat_mb, flat_time, compact_mb, compact_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Time snapping height offsets onto a terrain mesh by raycasting
+
+Scatters boxes above and below a wavy grid, then times Randomize Height
+with snap_mode 'down', whose rays share one intersection grid, against
+the same rays with no accelerator.
+Run with `python benchmarks/bench_snap.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import maya.OpenMaya as om
+import scatter
+
+VERTEX_COUNT = 250000
+RAY_COUNTS = (1000, 10000)
+NAIVE_RAY_COUNT = 100
+
+
+def scatter_boxes(count):
+    """count boxes at random heights over the terrain, selected"""
+    side = int(np.sqrt(VERTEX_COUNT)) - 1
+    names = []
+    for index in range(count):
+        name = 'box%d' % index
+        maya_standin.SCENE['nodes'][name] = {
+            'type': 'transform',
+            'translateX': np.random.uniform(0.0, side),
+            'translateY': np.random.uniform(-5.0, 5.0),
+            'translateZ': np.random.uniform(0.0, side)}
+        names.append(name)
+    maya_standin.SCENE['selection'][:] = names
+    return names
+
+
+def naive_rays(count):
+    """the same down rays tested against every face"""
+    mesh_fn = om.MFnMesh(scatter.get_dag_path('terrain'))
+    hit_point = om.MFloatPoint()
+    side = int(np.sqrt(VERTEX_COUNT)) - 1
+    for source in np.random.uniform(0.0, side, (count, 3)).tolist():
+        mesh_fn.closestIntersection(
+            om.MFloatPoint(*source), om.MFloatVector(0.0, -1.0, 0.0),
+            None, None, False, om.MSpace.kWorld, scatter.SNAP_RAY_LENGTH,
+            True, None, hit_point, None, None, None, None, None)
+
+
+def main():
+    maya_standin.reset()
+    maya_standin.grid_mesh('terrain', VERTEX_COUNT)
+    tool = scatter.Scatter()
+    tool.snap_mode = 'down'
+    tool.snap_mesh = 'terrain'
+    tool.min_height_value = tool.max_height_value = 0.0
+    # the first snap builds the intersection grid, as Maya does
+    scatter_boxes(10)
+    tool.scatter_height_obj()
+
+    print('%10s %12s %14s' % ('rays', 'snap (s)', 'rays / s'))
+    for count in RAY_COUNTS:
+        names = scatter_boxes(count)
+        snap_time = timeit.timeit(tool.scatter_height_obj, number=1)
+        print('%10d %12.4f %14.0f' % (count, snap_time, count / snap_time))
+        nodes = maya_standin.SCENE['nodes']
+        for name in names:
+            del nodes[name]
+    naive_time = timeit.timeit(lambda: naive_rays(NAIVE_RAY_COUNT),
+                               number=1)
+    print('%10d %12.4f %14.0f  (no accelerator)' % (
+        NAIVE_RAY_COUNT, naive_time, NAIVE_RAY_COUNT / naive_time))
+
+
+if __name__ == '__main__':
+    main()
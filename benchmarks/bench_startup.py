@@ -0,0 +1,118 @@
+"""Time opening the scatter tool and fail if the startup cost regresses
+
+Every run imports scatter in a fresh interpreter against empty Maya, Qt
+and shiboken modules, so only the tool's own import cost is timed, and
+creates the Scatter the dialog is built on. The check fails if any of
+HEAVY_MODULES gets imported, if the fastest run exceeds the budget, or
+if it is slower than a baseline JSON from an earlier run by more than
+the tolerance.
+
+    python benchmarks/bench_startup.py --output startup.json
+    python benchmarks/bench_startup.py --baseline startup.json
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import timeit
+import types
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+# modules the dialog must not need, loaded on the first scatter instead
+HEAVY_MODULES = ('numpy', 'scatter_core', 'scatter_cache', 'ctypes',
+                 'pymel', 'pymel.core')
+BUDGET = 0.1
+RUNS = 7
+
+
+def install_empty_modules():
+    """Register just enough Maya, Qt and shiboken to import scatter"""
+    def module(name, **attrs):
+        new_module = types.ModuleType(name)
+        new_module.__dict__.update(attrs)
+        sys.modules[name] = new_module
+        return new_module
+
+    maya = module('maya')
+    for name in ('cmds', 'OpenMaya', 'OpenMayaFX', 'OpenMayaUI'):
+        setattr(maya, name, module('maya.' + name))
+    maya.OpenMayaMPx = module('maya.OpenMayaMPx', MPxCommand=object)
+    module('PySide2',
+           QtWidgets=module('PySide2.QtWidgets', QDialog=object),
+           QtCore=module('PySide2.QtCore',
+                         Slot=lambda *args: lambda func: func))
+    module('shiboken2', wrapInstance=None)
+
+
+def child():
+    """one timed startup, printed as JSON for the parent process"""
+    sys.path.insert(0, SRC)
+    install_empty_modules()
+    loaded = set(sys.modules)
+    start = timeit.default_timer()
+    import scatter
+    scatter.Scatter()
+    seconds = timeit.default_timer() - start
+    print(json.dumps({'seconds': seconds,
+                      'modules': sorted(set(sys.modules) - loaded)}))
+
+
+def startup():
+    """fastest of RUNS fresh startups and every module they imported"""
+    runs = [json.loads(subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--child']).decode())
+        for _ in range(RUNS)]
+    modules = set(name for run in runs for name in run['modules'])
+    return min(run['seconds'] for run in runs), modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    parser.add_argument('--budget', type=float, default=BUDGET,
+                        help='slowest allowed startup in seconds '
+                             '(default %(default)s)')
+    parser.add_argument('--output', help='write the result JSON here')
+    parser.add_argument('--baseline',
+                        help='result JSON of an earlier run to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed slowdown against the baseline '
+                             '(default 0.5, 50%%)')
+    args = parser.parse_args(argv)
+    if args.child:
+        child()
+        return 0
+
+    seconds, modules = startup()
+    print('scatter startup %.4f s, %d modules imported' % (
+        seconds, len(modules)))
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump({'startup': {'seconds': seconds}}, output_file,
+                      indent=2, sort_keys=True)
+    failed = False
+    heavy = sorted(modules.intersection(HEAVY_MODULES))
+    if heavy:
+        failed = True
+        print('REGRESSION imported at startup: ' + ', '.join(heavy))
+    if seconds > args.budget:
+        failed = True
+        print('REGRESSION startup %.4f s over the %.4f s budget' % (
+            seconds, args.budget))
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            base_seconds = json.load(baseline_file)['startup']['seconds']
+        if seconds > base_seconds * (1.0 + args.tolerance):
+            failed = True
+            print('REGRESSION startup %.4f s, baseline %.4f s (+%.0f%%)' % (
+                seconds, base_seconds,
+                (seconds / base_seconds - 1.0) * 100.0))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
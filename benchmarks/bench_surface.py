@@ -0,0 +1,44 @@
+"""Time area weighted surface sampling against point count
+
+The first scatter on a mesh builds the cumulative area table, later ones
+reuse it from Scatter.surface_tables.
+Run with `python benchmarks/bench_surface.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import scatter
+
+VERTEX_COUNT = 1000000
+POINT_COUNTS = (1000, 100000, 1000000, 5000000)
+
+
+def main():
+    tool = scatter.Scatter()
+    maya_standin.reset()
+    maya_standin.grid_mesh('pPlane1', VERTEX_COUNT)
+    table_time = timeit.timeit(lambda: tool.surface_table('pPlane1'),
+                               number=1)
+    print('area table for %d vertices: %.4f s' % (VERTEX_COUNT, table_time))
+    print('%10s %14s' % ('points', 'sample (s)'))
+    for count in POINT_COUNTS:
+        ids = np.arange(count)
+        sample_time = min(timeit.repeat(
+            lambda: tool.surface_points(['pPlane1'], ids), number=1,
+            repeat=3))
+        print('%10d %14.4f' % (count, sample_time))
+
+
+if __name__ == '__main__':
+    main()
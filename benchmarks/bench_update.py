@@ -0,0 +1,56 @@
+"""Time incremental updates of a large scatter against a full scatter
+
+Builds one updatable scatter, then changes the rotation range and lowers
+the density, timing each Scatter.update_scatter call.
+Run with `python benchmarks/bench_update.py` from the repo root.
+"""
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import maya.cmds as cmds
+import scatter
+
+VERTEX_COUNT = 200000
+DENSITY = 0.25
+
+
+def timed(label, func):
+    start = timeit.default_timer()
+    func()
+    print('%-28s %8.4f s' % (label, timeit.default_timer() - start))
+
+
+def main():
+    maya_standin.reset()
+    vertex_count = len(maya_standin.grid_mesh('pPlane1', VERTEX_COUNT))
+    maya_standin.SCENE['nodes']['pCube1'] = {'type': 'transform'}
+    cmds.select(['pCube1', 'pPlane1.vtx[0:%d]' % (vertex_count - 1)])
+    tool = scatter.Scatter()
+    tool.density_value = DENSITY
+
+    timed('first scatter (%d inst)' % int(vertex_count * DENSITY),
+          tool.update_scatter)
+
+    def rotation_change():
+        tool.rot_max_y = 90
+        tool.update_scatter()
+    timed('rotation range change', rotation_change)
+
+    def density_change():
+        tool.density_value = DENSITY * 0.9
+        tool.update_scatter()
+    timed('density 10% lower', density_change)
+    timed('no change', tool.update_scatter)
+
+
+if __name__ == '__main__':
+    main()
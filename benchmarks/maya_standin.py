@@ -0,0 +1,1030 @@
+"""Local stand-in for the maya modules used by scatter.py
+
+Only the calls the scatter tool makes are implemented, backed by an
+in-memory scene so the hot loops can be timed without a Maya license.
+"""
+import itertools
+import math
+import re
+import sys
+import timeit
+import types
+
+import numpy as np
+
+VERTEX_RE = re.compile(r'^(?P<mesh>.+)\.vtx\[(?P<index>\d+|\*)\]$')
+FACE_RE = re.compile(r'^(?P<mesh>[^.]+)\.f\['
+                     r'(?P<start>\d+)(?::(?P<end>\d+))?\]$')
+
+SCENE = {'meshes': {}, 'normals': {}, 'triangles': {}, 'nodes': {},
+         'selection': [], 'corners': {}, 'colors': {}, 'images': {},
+         'uuids': {}, 'uuid_nodes': {}, 'undo': [], 'redo': [],
+         'undo_state': True, 'open_chunks': 0}
+
+# Approximate dispatch cost of a single maya.cmds call (argument parsing,
+# name lookup, undo queue). API calls are charged nothing extra.
+COMMAND_COST = 20e-6
+
+
+def _command_cost():
+    end = timeit.default_timer() + COMMAND_COST
+    while timeit.default_timer() < end:
+        pass
+
+
+def reset():
+    """Clear the in-memory scene"""
+    SCENE['meshes'].clear()
+    SCENE['normals'].clear()
+    SCENE['triangles'].clear()
+    SCENE['nodes'].clear()
+    SCENE['corners'].clear()
+    SCENE['colors'].clear()
+    SCENE['images'].clear()
+    SCENE['uuids'].clear()
+    del SCENE['undo'][:]
+    del SCENE['redo'][:]
+    SCENE['undo_state'] = True
+    SCENE['open_chunks'] = 0
+    SCENE['uuid_nodes'].clear()
+    del SCENE['selection'][:]
+    SCENE.pop('warnings', None)
+
+
+def grid_mesh(name, vertex_count):
+    """Add a wavy square grid mesh with roughly vertex_count vertices"""
+    side = max(2, int(math.sqrt(vertex_count)))
+    points = []
+    normals = []
+    for row in range(side):
+        for col in range(side):
+            x = float(col)
+            z = float(row)
+            points.append(MPoint(x, math.sin(x * 0.1) * math.cos(z * 0.1),
+                                 z))
+            # gradient of the height field, flat (+Y) along both centre lines
+            dx = -0.1 * math.cos(x * 0.1) * math.cos(z * 0.1)
+            dz = 0.1 * math.sin(x * 0.1) * math.sin(z * 0.1)
+            length = math.sqrt(dx * dx + 1.0 + dz * dz)
+            normals.append(MFloatVector(dx / length, 1.0 / length,
+                                        dz / length))
+    triangles = []
+    for row in range(side - 1):
+        for col in range(side - 1):
+            corner = row * side + col
+            triangles.extend((corner, corner + side, corner + 1,
+                              corner + 1, corner + side, corner + side + 1))
+    SCENE['meshes'][name] = points
+    SCENE['normals'][name] = normals
+    SCENE['triangles'][name] = triangles
+    SCENE['corners'].pop(name, None)
+    SCENE['colors'].pop(name, None)
+    return ['%s.vtx[%d]' % (name, index) for index in range(len(points))]
+
+
+def add_camera(name, position, target, fov=(0.9, 0.6), near=0.1,
+               far=10000.0):
+    """Add a camera at position looking at target"""
+    position = np.asarray(position, dtype=float)
+    back = position - np.asarray(target, dtype=float)
+    back /= np.linalg.norm(back)
+    side = np.cross([0.0, 1.0, 0.0], back)
+    side /= np.linalg.norm(side)
+    matrix = np.identity(4)
+    matrix[0, :3] = side
+    matrix[1, :3] = np.cross(back, side)
+    matrix[2, :3] = back
+    matrix[3, :3] = position
+    SCENE['nodes'][name] = {'type': 'transform', 'camera': {
+        'matrix': matrix, 'fov': fov, 'near': near, 'far': far}}
+
+
+# maya.cmds
+
+def _names(nodes):
+    if isinstance(nodes, (list, tuple)):
+        return list(nodes)
+    return [nodes]
+
+
+def _unique_name(name):
+    if name not in SCENE['nodes']:
+        return name
+    index = 1
+    while '%s%d' % (name, index) in SCENE['nodes']:
+        index += 1
+    return '%s%d' % (name, index)
+
+
+def xform(*args, **kwargs):
+    _command_cost()
+    node = args[0]
+    if isinstance(node, (list, tuple)):
+        node = node[0]
+    if kwargs.get('q') or kwargs.get('query'):
+        match = VERTEX_RE.match(node)
+        if match and match.group('index') == '*':
+            return [value for point in SCENE['meshes'][match.group('mesh')]
+                    for value in (point.x, point.y, point.z)]
+        if match:
+            point = SCENE['meshes'][match.group('mesh')][
+                int(match.group('index'))]
+            return [point.x, point.y, point.z]
+        node_data = SCENE['nodes'].get(node, {})
+        if kwargs.get('matrix'):
+            return list(node_data.get('matrix', np.eye(4).ravel()))
+        return list(node_data.get('t', (0.0, 0.0, 0.0)))
+    node_data = SCENE['nodes'][node]
+    if 'matrix' in kwargs:
+        node_data['matrix'] = list(kwargs['matrix'])
+    if 't' in kwargs or 'translation' in kwargs:
+        node_data['t'] = list(kwargs.get('t', kwargs.get('translation')))
+
+
+def instance(node, n='instance'):
+    _command_cost()
+    name = _unique_name(n)
+    node_data = dict(SCENE['nodes'].get(node, {}))
+    node_data['source'] = node
+    SCENE['nodes'][name] = node_data
+    return [name]
+
+
+def group(*args, **kwargs):
+    _command_cost()
+    name = _unique_name(kwargs.get('n', 'group'))
+    SCENE['nodes'][name] = {'type': 'transform',
+                            'parent': kwargs.get('parent')}
+    return name
+
+
+def particle(p=(), n='particle', **kwargs):
+    _command_cost()
+    name = _unique_name(n)
+    SCENE['nodes'][name] = {'type': 'transform', 'points': np.array(p),
+                            'shape': name + 'Shape'}
+    SCENE['nodes'][name + 'Shape'] = {'type': 'particle', 'parent': name}
+    return [name, name + 'Shape']
+
+
+def particleInstancer(particle_shape, **kwargs):
+    _command_cost()
+    if kwargs.get('query'):
+        return SCENE['nodes'][kwargs['name']]['inputs']['object']
+    name = _unique_name('instancer')
+    SCENE['nodes'][name] = {'type': 'instancer', 'inputs': kwargs,
+                            'particle': particle_shape}
+    return name
+
+
+def listConnections(node, type=None, **kwargs):
+    return [name for name, data in SCENE['nodes'].items()
+            if data.get('particle') == node and
+            type in (None, data.get('type'))] or None
+
+
+def saveInitialState(*args, **kwargs):
+    _command_cost()
+
+
+def parent(*args, **kwargs):
+    _command_cost()
+    nodes = [name for arg in args[:-1] for name in _names(arg)]
+    node_parent = None if kwargs.get('world') else args[-1]
+    if kwargs.get('world'):
+        nodes = [name for arg in args for name in _names(arg)]
+    for node in nodes:
+        SCENE['nodes'].setdefault(node, {})['parent'] = node_parent
+    return nodes
+
+
+def delete(*args, **kwargs):
+    _command_cost()
+    doomed = set(name for arg in args for name in _names(arg))
+    children = doomed
+    while children:
+        children = set(name for name, data in SCENE['nodes'].items()
+                       if data.get('parent') in children)
+        doomed |= children
+    for node in doomed:
+        for callback, client_data in _callbacks('preRemoval', node):
+            callback(node, client_data)
+    for node in doomed:
+        SCENE['nodes'].pop(node, None)
+        SCENE['uuid_nodes'].pop(SCENE['uuids'].pop(node, None), None)
+
+
+def hide(*args, **kwargs):
+    _command_cost()
+    for node in _names(args[0]):
+        SCENE['nodes'][node]['visibility'] = False
+
+
+def showHidden(*args, **kwargs):
+    _command_cost()
+    for node in _names(args[0]):
+        SCENE['nodes'][node]['visibility'] = True
+
+
+def listRelatives(node, parent=False, children=False, shapes=False,
+                  type=None, **kwargs):
+    if shapes:
+        if node in SCENE['meshes']:
+            shape, shape_type = node + 'Shape', 'mesh'
+        else:
+            shape = SCENE['nodes'].get(node, {}).get('shape')
+            shape_type = SCENE['nodes'].get(shape, {}).get('type')
+        if not shape or type not in (None, shape_type):
+            return None
+        return [shape]
+    if children:
+        return [name for name, data in SCENE['nodes'].items()
+                if data.get('parent') == node and
+                type in (None, data.get('type', 'transform'))] or None
+    node_parent = SCENE['nodes'].get(node, {}).get('parent')
+    return [node_parent] if parent and node_parent else None
+
+
+def polyListComponentConversion(item, toVertex=False):
+    """the vertices of 'mesh.f[a:b]' faces of a grid_mesh, one by one"""
+    match = FACE_RE.match(item)
+    if not match:
+        return []
+    mesh = match.group('mesh')
+    start = int(match.group('start'))
+    end = int(match.group('end') or start) + 1
+    # the two triangles of each grid quad
+    corners = np.array(SCENE['triangles'][mesh]).reshape(-1, 6)[start:end]
+    return ['%s.vtx[%d]' % (mesh, index)
+            for index in np.unique(corners).tolist()]
+
+
+def rename(node, new_name):
+    """rename a node, keeping its UUID and its children"""
+    _command_cost()
+    name = _unique_name(new_name)
+    SCENE['nodes'][name] = SCENE['nodes'].pop(node)
+    for data in SCENE['nodes'].values():
+        if data.get('parent') == node:
+            data['parent'] = name
+    if node in SCENE['uuids']:
+        uuid = SCENE['uuids'].pop(node)
+        SCENE['uuids'][name] = uuid
+        SCENE['uuid_nodes'][uuid] = name
+    return name
+
+
+def addAttr(node, ln, **kwargs):
+    _command_cost()
+    SCENE['nodes'][node].setdefault('attrs', {})[ln] = None
+
+
+def setAttr(plug, value, **kwargs):
+    _command_cost()
+    node, attr = plug.split('.', 1)
+    SCENE['nodes'][node].setdefault('attrs', {})[attr] = value
+
+
+def getAttr(plug):
+    _command_cost()
+    node, attr = plug.split('.', 1)
+    return SCENE['nodes'][node]['attrs'][attr]
+
+
+def attributeQuery(attr, node, exists=False):
+    return attr in SCENE['nodes'].get(node, {}).get('attrs', {})
+
+
+def exactWorldBoundingBox(*args):
+    """union of the nodes' 'bounds' around their translations"""
+    _command_cost()
+    boxes = np.array([np.tile(SCENE['nodes'][name].get('t', (0.0, 0.0, 0.0)),
+                              2) +
+                      SCENE['nodes'][name].get('bounds', (0.0,) * 6)
+                      for arg in args for name in _names(arg)])
+    return boxes[:, :3].min(axis=0).tolist() + boxes[:, 3:].max(
+        axis=0).tolist()
+
+
+def file(*args, **kwargs):
+    return SCENE.get('scene_name', '')
+
+
+def warning(message):
+    SCENE.setdefault('warnings', []).append(message)
+
+
+def objExists(node):
+    return node in SCENE['nodes'] or node in SCENE['meshes']
+
+
+def ls(*args, **kwargs):
+    if kwargs.get('uuid'):
+        # shapes the stand-in only names get UUIDs as well
+        return [_uuid(name) for name in _names(args[0])]
+    if args and isinstance(args[0], (list, tuple)):
+        nodes = [SCENE['uuid_nodes'].get(name, name) for name in args[0]]
+        nodes = [name for name in nodes if objExists(name)]
+        if kwargs.get('visible'):
+            nodes = [name for name in nodes if SCENE['nodes'].get(
+                name, {}).get('visibility', True)]
+        if kwargs.get('templated'):
+            nodes = [name for name in nodes if SCENE['nodes'].get(
+                name, {}).get('template')]
+        return nodes
+    if args and args[0].startswith('*.'):
+        return [name for name, data in SCENE['nodes'].items()
+                if args[0][2:] in data.get('attrs', {})]
+    return list(SCENE['selection'])
+
+
+_UUID_COUNTER = itertools.count()
+
+
+def _uuid(name):
+    if name not in SCENE['uuids']:
+        SCENE['uuids'][name] = 'UUID-%d' % next(_UUID_COUNTER)
+        SCENE['uuid_nodes'][SCENE['uuids'][name]] = name
+    return SCENE['uuids'][name]
+
+
+def select(*args, **kwargs):
+    SCENE['selection'][:] = [name for arg in args for name in _names(arg)]
+
+
+def undoInfo(*args, **kwargs):
+    """track the undo state and how many chunks are open"""
+    if kwargs.get('query'):
+        return SCENE['undo_state']
+    if 'stateWithoutFlush' in kwargs:
+        SCENE['undo_state'] = kwargs['stateWithoutFlush']
+    if kwargs.get('openChunk'):
+        SCENE['open_chunks'] += 1
+    if kwargs.get('closeChunk'):
+        SCENE['open_chunks'] -= 1
+
+
+def pluginInfo(*args, **kwargs):
+    return True
+
+
+def loadPlugin(*args, **kwargs):
+    pass
+
+
+def scatterApplyModifier():
+    """run the queued modifier like the plug-in, and queue it for undo"""
+    _command_cost()
+    import scatter_undo
+    modifier, inverse = scatter_undo.pending_modifiers.pop()
+    if not inverse:
+        modifier.doIt()
+    if SCENE['undo_state']:
+        SCENE['undo'].append((modifier, inverse))
+
+
+def undo():
+    """Undo the last scatterApplyModifier"""
+    modifier, inverse = SCENE['undo'].pop()
+    if inverse:
+        modifier.doIt()
+    else:
+        modifier.undoIt()
+    SCENE['redo'].append((modifier, inverse))
+
+
+def redo():
+    """Redo the last undone scatterApplyModifier"""
+    modifier, inverse = SCENE['redo'].pop()
+    if inverse:
+        modifier.undoIt()
+    else:
+        modifier.doIt()
+    SCENE['undo'].append((modifier, inverse))
+
+
+def move(x, y, z, node, **kwargs):
+    _command_cost()
+    if isinstance(node, (list, tuple)):
+        node = node[0]
+    SCENE['nodes'][node]['t'] = [x, y, z]
+
+
+def objectType(node):
+    if node in SCENE['meshes']:
+        return 'transform'
+    return SCENE['nodes'].get(node, {}).get('type', 'transform')
+
+
+# maya.OpenMaya
+
+class MSpace(object):
+    kWorld = 4
+
+
+class MFn(object):
+    kShape = 248
+
+
+class _ShapeObject(object):
+
+    def hasFn(self, fn_type):
+        return fn_type == MFn.kShape
+
+
+# callback id -> (message, node or None, callback, client data)
+_CALLBACKS = {}
+
+
+def _add_callback(message, node, callback, client_data=None):
+    callback_id = len(_CALLBACKS) + 1
+    while callback_id in _CALLBACKS:
+        callback_id += 1
+    _CALLBACKS[callback_id] = (message, node, callback, client_data)
+    return callback_id
+
+
+def _callbacks(message, node=None):
+    return [(callback, client_data) for callback_message, callback_node,
+            callback, client_data in list(_CALLBACKS.values())
+            if callback_message == message and callback_node == node]
+
+
+def set_time(frame):
+    """Run the time change callbacks as a frame change in Maya does"""
+    for callback, client_data in _callbacks('time'):
+        callback(frame, client_data)
+
+
+def dirty(node):
+    """Run the node dirty callbacks of a shape, as an edit in Maya does"""
+    for callback, client_data in _callbacks('dirty', node):
+        callback(node, client_data)
+
+
+def new_scene():
+    """Run the before new scene callbacks, then clear the scene"""
+    for callback, client_data in _callbacks(MSceneMessage.kBeforeNew):
+        callback(client_data)
+    reset()
+
+
+class MDGMessage(object):
+
+    @staticmethod
+    def addTimeChangeCallback(callback, client_data=None):
+        return _add_callback('time', None, callback, client_data)
+
+
+class MNodeMessage(object):
+
+    @staticmethod
+    def addNodeDirtyCallback(node, callback, client_data=None):
+        return _add_callback('dirty', node, callback, client_data)
+
+    @staticmethod
+    def addNodePreRemovalCallback(node, callback, client_data=None):
+        return _add_callback('preRemoval', node, callback, client_data)
+
+
+class MSceneMessage(object):
+    kBeforeNew = 'beforeNew'
+    kBeforeOpen = 'beforeOpen'
+
+    @staticmethod
+    def addCallback(message, callback, client_data=None):
+        return _add_callback(message, None, callback, client_data)
+
+
+class MMessage(object):
+
+    @staticmethod
+    def removeCallback(callback_id):
+        del _CALLBACKS[callback_id]
+
+
+class MPoint(object):
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class MPointArray(list):
+    """list of rows, or (n, width) float64 rows built from a pointer"""
+
+    def __init__(self, *args):
+        if args and isinstance(args[0], _Pointer):
+            ptr, count = args
+            list.__init__(self, ptr.rows(count))
+        else:
+            list.__init__(self, *args)
+
+    def length(self):
+        return len(self)
+
+    def get(self, ptr):
+        rows = [(item.x, item.y, item.z, 1.0)[:ptr.width]
+                if isinstance(item, MPoint) else
+                (item.r, item.g, item.b, item.a)
+                if isinstance(item, MColor) else item for item in self]
+        values = np.ravel(np.array(rows, dtype=float))
+        ptr.data[:len(values)] = values
+
+
+class MColor(object):
+
+    def __init__(self, r=0.0, g=0.0, b=0.0, a=1.0):
+        self.r = r
+        self.g = g
+        self.b = b
+        self.a = a
+
+
+MFloatPoint = MPoint
+MFloatVector = MPoint
+MFloatVectorArray = MPointArray
+MFloatArray = MPointArray
+MColorArray = MPointArray
+MIntArray = MPointArray
+MDoubleArray = MPointArray
+MVectorArray = MPointArray
+
+
+class MScriptUtil(object):
+
+    def __init__(self):
+        self.value = [0]
+
+    def asUintPtr(self):
+        return self.value
+
+    def createFromList(self, values, count):
+        self.value = np.array(values[:count], dtype=np.float64)
+
+    def asDoublePtr(self):
+        return _Pointer(self.value, 1)
+
+    def asDouble3Ptr(self):
+        return _Pointer(self.value, 3)
+
+    def asDouble4Ptr(self):
+        return _Pointer(self.value, 4)
+
+    def asFloatPtr(self):
+        return _Pointer(self.value.view(np.float32), 1)
+
+    def asFloat3Ptr(self):
+        return _Pointer(self.value.view(np.float32), 3)
+
+    def asFloat4Ptr(self):
+        return _Pointer(self.value.view(np.float32), 4)
+
+    def asIntPtr(self):
+        return _Pointer(self.value.view(np.int32), 1)
+
+    @staticmethod
+    def getUint(ptr):
+        return ptr[0]
+
+
+class _Pointer(object):
+    """address of a typed buffer, read back as rows of width"""
+
+    def __init__(self, data, width):
+        self.data = data
+        self.width = width
+
+    def __int__(self):
+        return self.data.ctypes.data
+
+    def rows(self, count):
+        values = self.data[:count * self.width].copy()
+        return values if self.width == 1 else values.reshape(count, -1)
+
+
+class MFnParticleSystem(object):
+    """emit() fills the transform's 'points', attributes go to 'attrs'"""
+
+    def __init__(self, dag_path):
+        self.shape = dag_path.name
+
+    def emit(self, points):
+        node = SCENE['nodes'][self.shape]['parent']
+        SCENE['nodes'][node]['points'] = \
+            np.array(points, dtype=float).reshape(-1, 4)[:, :3]
+
+    def position(self, points):
+        data = SCENE['nodes'][self.shape]
+        points[:] = data.get('attrs', {}).get('position', [])
+        if not len(points):
+            points[:] = SCENE['nodes'][data['parent']]['points']
+
+    def getPerParticleAttribute(self, name, values):
+        values[:] = SCENE['nodes'][self.shape]['attrs'][name]
+
+    def setPerParticleAttribute(self, name, values):
+        SCENE['nodes'][self.shape].setdefault('attrs', {})[name] = \
+            np.array(values)
+
+
+class MImage(object):
+    """Reads SCENE['images'][path], (h, w, 4) uint8, bottom row first"""
+
+    def __init__(self):
+        self.data = None
+
+    def readFromFile(self, path):
+        self.data = np.ascontiguousarray(SCENE['images'][path],
+                                         dtype=np.uint8)
+
+    def getSize(self, width_ptr, height_ptr):
+        height_ptr[0], width_ptr[0] = self.data.shape[:2]
+
+    def pixels(self):
+        return self.data.ctypes.data
+
+
+class MMatrix(object):
+    """Identity unless given rows, stand-in groups are never moved"""
+
+    def __init__(self, rows=None):
+        self.rows = np.identity(4) if rows is None else np.asarray(rows)
+
+    def __call__(self, row, col):
+        return float(self.rows[row, col])
+
+
+class MDagPath(object):
+
+    def __init__(self):
+        self.name = None
+
+    def node(self):
+        return self.name
+
+    def exclusiveMatrix(self):
+        return MMatrix()
+
+    def inclusiveMatrix(self):
+        camera = SCENE['nodes'].get(self.name, {}).get('camera')
+        return MMatrix(camera['matrix'] if camera else None)
+
+    def extendToShape(self):
+        pass
+
+    def childCount(self):
+        return 1
+
+    def child(self, index):
+        return _ShapeObject()
+
+
+class MFnCamera(object):
+    """Reads SCENE['nodes'][name]['camera'], see add_camera"""
+
+    def __init__(self, dag_path):
+        self.camera = SCENE['nodes'][dag_path.name]['camera']
+
+    def horizontalFieldOfView(self):
+        return self.camera['fov'][0]
+
+    def verticalFieldOfView(self):
+        return self.camera['fov'][1]
+
+    def nearClippingPlane(self):
+        return self.camera['near']
+
+    def farClippingPlane(self):
+        return self.camera['far']
+
+
+class MPlug(object):
+
+    def __init__(self, node, attr):
+        self.node = node
+        self.attr = attr
+
+    def asDouble(self):
+        default = 1.0 if self.attr.startswith('scale') else 0.0
+        return SCENE['nodes'][self.node].get(self.attr, default)
+
+
+class MFnDependencyNode(object):
+
+    def __init__(self, node):
+        self.node = node
+
+    def findPlug(self, attr):
+        return MPlug(self.node, attr)
+
+
+class MDGModifier(object):
+
+    def __init__(self):
+        self.edits = []
+        self.previous = []
+        self.doomed = []
+        self.deleted = {}
+
+    def newPlugValueDouble(self, plug, value):
+        self.edits.append((plug, value))
+
+    def deleteNode(self, node):
+        self.doomed.append(node)
+
+    def doIt(self):
+        self.previous = [(plug, plug.asDouble()) for plug, value
+                         in self.edits]
+        for plug, value in self.edits:
+            SCENE['nodes'][plug.node][plug.attr] = value
+        if self.doomed:
+            before = dict(SCENE['nodes'])
+            delete(self.doomed)
+            self.deleted = dict((name, data) for name, data
+                                in before.items()
+                                if name not in SCENE['nodes'])
+
+    def undoIt(self):
+        for plug, value in self.previous:
+            SCENE['nodes'][plug.node][plug.attr] = value
+        SCENE['nodes'].update(self.deleted)
+
+
+class MSelectionList(object):
+
+    def __init__(self):
+        self.items = []
+
+    def add(self, name):
+        self.items.append(name)
+
+    def getDagPath(self, index, dag_path):
+        dag_path.name = self.items[index]
+
+
+class MBoundingBox(object):
+
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def min(self):
+        return self.low
+
+    def max(self):
+        return self.high
+
+
+# mesh -> (points key, MBoundingBox), see MFnMesh.boundingBox
+_BOUNDS = {}
+
+
+class MFnMesh(object):
+
+    def __init__(self, dag_path):
+        self.name = dag_path.name
+
+    def getPoints(self, points, space):
+        points[:] = SCENE['meshes'][self.name]
+
+    def boundingBox(self):
+        """object space bounds, kept per point list as Maya caches them
+
+        Keyed on the first and last point objects, so replacing the
+        points as the tests do recomputes them.
+        """
+        points = SCENE['meshes'][self.name]
+        key = (len(points), id(points[0]), id(points[-1])) if points else ()
+        cached = _BOUNDS.get(self.name)
+        if cached is None or cached[0] != key:
+            values = np.array([(point.x, point.y, point.z)
+                               for point in points]).reshape(-1, 3)
+            corners = (values.min(axis=0), values.max(axis=0)) if \
+                len(values) else (np.zeros(3), np.zeros(3))
+            cached = (key, MBoundingBox(MPoint(*corners[0]),
+                                        MPoint(*corners[1])))
+            _BOUNDS[self.name] = cached
+        return cached[1]
+
+    def getVertexNormals(self, angle_weighted, normals, space):
+        normals[:] = SCENE['normals'][self.name]
+
+    def getTriangles(self, triangle_counts, triangle_verts):
+        triangle_verts[:] = SCENE['triangles'][self.name]
+        triangle_counts[:] = [2] * (len(triangle_verts) // 6)
+
+    def _quads(self):
+        """(n, 4) vertex ids of the grid quads, from their two triangles"""
+        triangles = np.array(SCENE['triangles'][self.name]).reshape(-1, 6)
+        return triangles[:, [0, 1, 5, 2]]
+
+    def getVertices(self, polygon_counts, polygon_verts):
+        quads = self._quads()
+        polygon_counts[:] = [4] * len(quads)
+        polygon_verts[:] = quads.ravel().tolist()
+
+    def getUVs(self, u_values, v_values, *uv_set):
+        points = SCENE['meshes'][self.name]
+        side = float(max(point.x for point in points) + 1.0)
+        u_values[:] = [(point.x + 0.5) / side for point in points]
+        v_values[:] = [(point.z + 0.5) / side for point in points]
+
+    def getAssignedUVs(self, uv_counts, uv_ids, *uv_set):
+        # one UV per vertex, sharing the vertex ids
+        self.getVertices(uv_counts, uv_ids)
+
+    def getVertexColors(self, colors, color_set=None, *args):
+        points = SCENE['meshes'][self.name]
+        values = SCENE['colors'].get(self.name)
+        if values is None:
+            colors[:] = [MColor(-1.0, -1.0, -1.0, -1.0) for _ in points]
+        else:
+            colors[:] = [MColor(*value) for value in values]
+
+    def numVertices(self):
+        return len(SCENE['meshes'][self.name])
+
+    def numPolygons(self):
+        return len(SCENE['triangles'][self.name]) // 6
+
+    def numFaceVertices(self):
+        return len(SCENE['triangles'][self.name]) // 6 * 4
+
+    def autoUniformGridParams(self):
+        return _TriangleGrid(self.name)
+
+    def closestIntersection(self, source, direction, face_ids, tri_ids,
+                            ids_sorted, space, max_param, both_directions,
+                            accel_params, hit_point, *hit_args):
+        corners = _mesh_corners(self.name)
+        origin = np.array([source.x, source.y, source.z])
+        ray = np.array([direction.x, direction.y, direction.z])
+        if accel_params is not None:
+            corners = corners[accel_params.candidates(origin, ray,
+                                                      max_param)]
+        params = _ray_triangle_params(origin, ray, corners)
+        if not both_directions:
+            params[params < 0.0] = np.nan
+        params[np.abs(params) > max_param] = np.nan
+        if np.isnan(params).all():
+            return False
+        param = params[np.nanargmin(np.abs(params))]
+        hit_point.x, hit_point.y, hit_point.z = (origin + param *
+                                                 ray).tolist()
+        return True
+
+
+def _mesh_corners(name):
+    """(m, 3, 3) corner positions of the triangles of a mesh, cached"""
+    if name not in SCENE['corners']:
+        points = np.array([(point.x, point.y, point.z)
+                           for point in SCENE['meshes'][name]])
+        SCENE['corners'][name] = points[np.array(
+            SCENE['triangles'][name]).reshape(-1, 3)]
+    return SCENE['corners'][name]
+
+
+def _ray_triangle_params(origin, ray, corners):
+    """Moller-Trumbore ray parameter of every triangle, nan on a miss"""
+    edge_u = corners[:, 1] - corners[:, 0]
+    edge_v = corners[:, 2] - corners[:, 0]
+    cross_v = np.cross(ray, edge_v)
+    det = np.einsum('ij,ij->i', edge_u, cross_v)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        inv_det = 1.0 / det
+        offset = origin - corners[:, 0]
+        bary_u = np.einsum('ij,ij->i', offset, cross_v) * inv_det
+        cross_u = np.cross(offset, edge_u)
+        bary_v = np.dot(cross_u, ray) * inv_det
+        params = np.einsum('ij,ij->i', edge_v, cross_u) * inv_det
+    miss = ((np.abs(det) < 1e-12) | (bary_u < 0.0) | (bary_v < 0.0) |
+            (bary_u + bary_v > 1.0))
+    params[miss] = np.nan
+    return params
+
+
+class _TriangleGrid(object):
+    """XZ grid of triangle bounds, standing in for Maya's accelerator"""
+
+    def __init__(self, name):
+        corners = _mesh_corners(name)[:, :, [0, 2]]
+        low = corners.min(axis=1)
+        high = corners.max(axis=1)
+        self.origin = low.min(axis=0)
+        self.cell = max((high - low).max(axis=1).mean(), 1e-6)
+        first = np.floor((low - self.origin) / self.cell).astype(np.int64)
+        last = np.floor((high - self.origin) / self.cell).astype(np.int64)
+        self.dims = last.max(axis=0) + 1
+        keys = []
+        ids = []
+        spans = last - first + 1
+        for off_x in range(spans[:, 0].max()):
+            for off_z in range(spans[:, 1].max()):
+                inside = np.flatnonzero((off_x < spans[:, 0]) &
+                                        (off_z < spans[:, 1]))
+                keys.append((first[inside, 0] + off_x) * self.dims[1] +
+                            first[inside, 1] + off_z)
+                ids.append(inside)
+        keys = np.concatenate(keys)
+        order = np.argsort(keys, kind='mergesort')
+        self.keys = keys[order]
+        self.ids = np.concatenate(ids)[order]
+
+    def candidates(self, origin, ray, max_param):
+        """ids of the triangles in cells the ray's XZ shadow crosses"""
+        flat = ray[[0, 2]]
+        extent = self.dims * self.cell
+        if np.abs(flat).max() < 1e-9:
+            samples = origin[[0, 2]][np.newaxis]
+        else:
+            # sample the shadow every half cell, clipped to the grid
+            reach = min(max_param, (np.abs(origin[[0, 2]] - self.origin) +
+                                    extent).max() / np.abs(flat).max())
+            steps = np.arange(-reach, reach, self.cell * 0.5 /
+                              np.linalg.norm(flat))
+            samples = origin[[0, 2]] + steps[:, np.newaxis] * flat
+        cells = np.floor((samples - self.origin) /
+                         self.cell).astype(np.int64)
+        inside = ((cells >= 0) & (cells < self.dims)).all(axis=1)
+        keys = np.unique(cells[inside, 0] * self.dims[1] + cells[inside, 1])
+        starts = np.searchsorted(self.keys, keys, side='left')
+        ends = np.searchsorted(self.keys, keys, side='right')
+        return np.unique(np.concatenate(
+            [self.ids[start:end] for start, end in zip(starts, ends)] +
+            [np.empty(0, dtype=np.int64)]))
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+class _QtWidgets(object):
+
+    class QDialog(object):
+        pass
+
+    class QWidget(object):
+        pass
+
+
+class _QtCore(object):
+
+    @staticmethod
+    def Slot(*args):
+        return lambda func: func
+
+
+def install():
+    """Register the stand-in modules so `import scatter` works"""
+    this = sys.modules[__name__]
+    maya = _module('maya')
+    maya.cmds = _module('maya.cmds', xform=xform, instance=instance,
+                        move=move, objectType=objectType, group=group,
+                        parent=parent, particle=particle,
+                        particleInstancer=particleInstancer,
+                        listConnections=listConnections,
+                        warning=warning,
+                        saveInitialState=saveInitialState, delete=delete,
+                        hide=hide,
+                        showHidden=showHidden, listRelatives=listRelatives,
+                        objExists=objExists, ls=ls, rename=rename,
+                        polyListComponentConversion=(
+                            polyListComponentConversion),
+                        addAttr=addAttr,
+                        setAttr=setAttr, getAttr=getAttr,
+                        attributeQuery=attributeQuery,
+                        exactWorldBoundingBox=exactWorldBoundingBox,
+                        file=file,
+                        select=select, undoInfo=undoInfo,
+                        pluginInfo=pluginInfo, loadPlugin=loadPlugin,
+                        scatterApplyModifier=scatterApplyModifier)
+    maya.OpenMaya = _module('maya.OpenMaya', MSpace=MSpace, MPoint=MPoint,
+                            MPointArray=MPointArray, MMatrix=MMatrix,
+                            MFloatPoint=MFloatPoint,
+                            MFloatVector=MFloatVector,
+                            MFloatVectorArray=MFloatVectorArray,
+                            MIntArray=MIntArray, MFloatArray=MFloatArray,
+                            MDoubleArray=MDoubleArray,
+                            MVectorArray=MVectorArray,
+                            MColor=MColor, MColorArray=MColorArray,
+                            MImage=MImage, MScriptUtil=MScriptUtil,
+                            MDagPath=MDagPath, MFn=MFn, MPlug=MPlug,
+                            MFnDependencyNode=MFnDependencyNode,
+                            MFnCamera=MFnCamera, MDGMessage=MDGMessage,
+                            MMessage=MMessage, MNodeMessage=MNodeMessage,
+                            MSceneMessage=MSceneMessage,
+                            MDGModifier=MDGModifier,
+                            MSelectionList=MSelectionList, MFnMesh=MFnMesh)
+    maya.OpenMayaMPx = _module('maya.OpenMayaMPx', MPxCommand=object)
+    maya.OpenMayaFX = _module('maya.OpenMayaFX',
+                              MFnParticleSystem=MFnParticleSystem)
+    maya.OpenMayaUI = _module('maya.OpenMayaUI')
+    maya.mel = _module('maya.mel')
+    _module('PySide2', QtWidgets=_QtWidgets, QtGui=object(), QtCore=_QtCore)
+    _module('shiboken2', wrapInstance=None)
+    return this
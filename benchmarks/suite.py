@@ -0,0 +1,284 @@
+"""Synthetic mesh benchmark suite for the scatter tool
+
+Times the core stages of a scatter on generated grid meshes from 1k to
+1M vertices and writes the results as JSON. Given a baseline JSON from an
+earlier run, any case slower than the baseline by more than the tolerance
+is reported and the suite exits non-zero, so it can gate a change.
+
+    python benchmarks/suite.py --output results.json
+    python benchmarks/suite.py --sizes 1000 10000 --baseline results.json
+
+Instance creation is bounded to MAX_INSTANCES per case: its cost is per
+instance and does not depend on the mesh size.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import maya_standin
+
+maya_standin.install()
+
+import maya.cmds as cmds
+import numpy as np
+import scatter
+import scatter_core
+
+SIZES = (1000, 10000, 100000, 1000000)
+MAX_INSTANCES = 2000
+REPEAT = 3
+
+
+def best_time(func, repeat=REPEAT):
+    """fastest of repeat calls, in seconds"""
+    times = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        func()
+        times.append(timeit.default_timer() - start)
+    return min(times)
+
+
+def grid_scene(size):
+    """a fresh scene holding one grid mesh and a source cube"""
+    maya_standin.reset()
+    vertex_count = len(maya_standin.grid_mesh('pPlane1', size))
+    maya_standin.SCENE['nodes']['pCube1'] = {'type': 'transform'}
+    return vertex_count
+
+
+def case_vertex_query(size):
+    vertex_count = grid_scene(size)
+    tool = scatter.Scatter()
+    mesh_ids = [('pPlane1', np.arange(vertex_count))]
+    return best_time(lambda: (tool.vertex_positions(mesh_ids),
+                              tool.vertex_normals(mesh_ids)))
+
+
+def case_selection(size):
+    vertex_count = grid_scene(size)
+    vert_list = ['pPlane1.vtx[0:%d]' % (vertex_count - 1)]
+    return best_time(lambda: scatter_core.sample_vertex_ids(
+        scatter.selection_vertex_ranges(vert_list), 0.5, 0))
+
+
+def case_normal_frames(size):
+    positions = np.random.uniform(-10.0, 10.0, size=(size, 3))
+    normals = np.random.normal(size=(size, 3))
+    normals /= np.linalg.norm(normals, axis=1)[:, np.newaxis]
+    return best_time(lambda: scatter_core.matrix_rotations(
+        scatter_core.normal_matrices(positions, normals)))
+
+
+def case_surface(size):
+    grid_scene(size)
+    tool = scatter.Scatter()
+    ids = np.arange(size)
+
+    def sample():
+        tool.surface_tables = {}
+        tool.surface_points(['pPlane1'], ids)
+    return best_time(sample)
+
+
+def case_min_distance(size):
+    positions = np.random.uniform(0.0, 100.0, size=(size, 3))
+    positions[:, 1] = 0.0
+    radius = 100.0 / np.sqrt(size) * 2.0
+    priorities = np.random.uniform(size=size)
+    return best_time(lambda: scatter_core.min_distance_mask(
+        positions, radius, priorities))
+
+
+def case_density_map(size):
+    """texture density map lookup and keep test, UV tables cached"""
+    vertex_count = grid_scene(size)
+    image = np.random.randint(0, 256, size=(1024, 1024, 4))
+    # the stand-in MImage reads from SCENE, the path only has to exist
+    path = os.path.abspath(__file__)
+    maya_standin.SCENE['images'][path] = image
+    vert_list = ['pPlane1.vtx[0:%d]' % (vertex_count - 1)]
+    tool = scatter.Scatter()
+    tool.density_map_type = 'texture'
+    tool.density_map = path
+    return best_time(lambda: tool.sample_points(tool.target_meshes(
+        vert_list, tool.target_density_maps(vert_list)), 0.5))
+
+
+def case_camera_cull(size):
+    positions = np.random.uniform(-100.0, 100.0, size=(size, 3))
+    maya_standin.add_camera('camera1', (0.0, 10.0, -120.0), (0.0, 0.0, 0.0))
+    camera = scatter.get_camera('camera1')
+    bands = [[50.0, 1.0], [150.0, 0.5], [300.0, 0.1]]
+    return best_time(lambda: scatter_core.camera_factors(positions, camera,
+                                                         bands, 1.0))
+
+
+def case_tile_table(size):
+    positions = np.random.uniform(0.0, 10000.0, size=(size, 3))
+    return best_time(lambda: scatter_core.tile_table(positions, 100.0))
+
+
+def case_preview(size):
+    """every live preview refinement of a half density scatter"""
+    vertex_count = grid_scene(size)
+    cmds.select(['pCube1', 'pPlane1.vtx[0:%d]' % (vertex_count - 1)])
+    tool = scatter.Scatter()
+    tool.density_value = 0.5
+    return best_time(lambda: list(tool.preview_steps()))
+
+
+def case_core_scatter(size):
+    """headless scatter_transforms straight from mesh arrays"""
+    grid_scene(size)
+    mesh = {'points': scatter.get_mesh_point_array('pPlane1'),
+            'triangles': scatter.get_mesh_triangles('pPlane1')}
+    mesh['normals'] = np.tile([0.0, 1.0, 0.0], (len(mesh['points']), 1))
+    settings = scatter.Scatter().settings()
+    settings.update(normal_bool=True, density_value=0.5)
+    return best_time(lambda: scatter_core.scatter_transforms([mesh],
+                                                             settings))
+
+
+def case_scatter_obj(size):
+    """whole scatter, density chosen so at most MAX_INSTANCES are made"""
+    vertex_count = grid_scene(size)
+    selection = ['pCube1', 'pPlane1.vtx[0:%d]' % (vertex_count - 1)]
+    tool = scatter.Scatter()
+    tool.normal_bool = True
+    tool.density_value = min(1.0, float(MAX_INSTANCES) / vertex_count)
+    tool.profile_path = os.devnull
+    cmds.select(selection)
+    seconds = best_time(tool.scatter_obj, repeat=1)
+    phases = dict((phase['name'], phase['seconds'])
+                  for phase in tool.last_profile['phases'])
+    return seconds, phases
+
+
+def case_rescatter(size):
+    """same size re-scatter onto the instances of the last scatter"""
+    vertex_count = grid_scene(size)
+    maya_standin.SCENE['nodes']['pCube1']['shape'] = 'pCubeShape1'
+    vertices = 'pPlane1.vtx[0:%d]' % (vertex_count - 1)
+    tool = scatter.Scatter()
+    tool.normal_bool = True
+    tool.reuse_instances = True
+    tool.density_value = min(1.0, float(MAX_INSTANCES) / vertex_count)
+    # the scattered source is deleted, a spare instance of it stays
+    source = cmds.instance('pCube1')[0]
+    cmds.select(['pCube1', vertices])
+    tool.scatter_obj()
+
+    def rescatter():
+        cmds.select([source, vertices])
+        tool.scatter_obj()
+    return best_time(rescatter)
+
+
+def case_blockers(size):
+    """cull the vertices of the grid against a road mesh crossing it"""
+    vertex_count = grid_scene(size)
+    maya_standin.SCENE['nodes']['pCube1']['bounds'] = (-0.5, 0.0, -0.5,
+                                                       0.5, 1.0, 0.5)
+    side = np.sqrt(vertex_count)
+    maya_standin.grid_mesh('pRoad', size // 10)
+    maya_standin.SCENE['meshes']['pRoad'][:] = [
+        maya_standin.MPoint(side * 0.45 + point.x * 0.1, 0.0, point.z * 3.0)
+        for point in maya_standin.SCENE['meshes']['pRoad']]
+    positions = scatter.get_mesh_point_array('pPlane1')
+    ids = np.arange(vertex_count)
+    tool = scatter.Scatter()
+    tool.blockers = ['pRoad']
+    tool.unblocked(['pCube1'], ids, positions)
+    return best_time(lambda: tool.unblocked(['pCube1'], ids, positions))
+
+
+CASES = (
+    ('vertex_query', case_vertex_query),
+    ('selection', case_selection),
+    ('normal_frames', case_normal_frames),
+    ('surface', case_surface),
+    ('min_distance', case_min_distance),
+    ('density_map', case_density_map),
+    ('camera_cull', case_camera_cull),
+    ('tile_table', case_tile_table),
+    ('preview', case_preview),
+    ('core_scatter', case_core_scatter),
+    ('scatter_obj', case_scatter_obj),
+    ('rescatter', case_rescatter),
+    ('blockers', case_blockers),
+)
+
+
+def run_suite(sizes, case_names):
+    results = {}
+    for name, case in CASES:
+        if case_names and name not in case_names:
+            continue
+        for size in sizes:
+            key = '%s/%d' % (name, size)
+            np.random.seed(0)
+            outcome = case(size)
+            phases = None
+            if isinstance(outcome, tuple):
+                outcome, phases = outcome
+            results[key] = {'seconds': outcome}
+            if phases:
+                results[key]['phases'] = phases
+            print('%-26s %9.4f s' % (key, outcome))
+            sys.stdout.flush()
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """(key, seconds, baseline seconds) of cases slower than tolerated"""
+    slower = []
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        seconds = results[key]['seconds']
+        base_seconds = baseline[key]['seconds']
+        if seconds > base_seconds * (1.0 + tolerance):
+            slower.append((key, seconds, base_seconds))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='vertex counts of the generated meshes')
+    parser.add_argument('--cases', nargs='+',
+                        choices=[name for name, case in CASES],
+                        help='only run these cases')
+    parser.add_argument('--output', help='write the results JSON here')
+    parser.add_argument('--baseline',
+                        help='results JSON of an earlier run to compare to')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown against the baseline '
+                             '(default 0.25, 25%%)')
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.cases)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2, sort_keys=True)
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    slower = regressions(results, baseline, args.tolerance)
+    for key, seconds, base_seconds in slower:
+        print('REGRESSION %-20s %9.4f s, baseline %9.4f s (+%.0f%%)' % (
+            key, seconds, base_seconds,
+            (seconds / base_seconds - 1.0) * 100.0))
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,89 @@
 import maya.OpenMayaUI as omui
 import maya.cmds as cmds
-import maya.mel as mel
 import maya.OpenMaya as om
-import pymel.core as pm
-import random
-from PySide2 import QtWidgets, QtGui, QtCore
+import maya.OpenMayaFX as omfx
+import importlib
+import os
+import re
+import scatter_pipeline
+import scatter_profile
+import scatter_undo
+import time
+from PySide2 import QtWidgets, QtCore
 from shiboken2 import wrapInstance
 
 
+class LazyModule(object):
+    """Module placeholder that imports the module on first attribute use
+
+    Opening the dialog only needs Qt and maya.cmds, so NumPy and the
+    modules built on it load with the first scatter instead.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+class UndoOff(object):
+    """Context keeping the scene edits made in it out of the undo queue"""
+
+    def __enter__(self):
+        self.state = cmds.undoInfo(query=True, stateWithoutFlush=True)
+        cmds.undoInfo(stateWithoutFlush=False)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        cmds.undoInfo(stateWithoutFlush=self.state)
+        return False
+
+
+np = LazyModule('numpy')
+core = LazyModule('scatter_core')
+scatter_cache = LazyModule('scatter_cache')
+
+
+VERTEX_RE = re.compile(r'^(?P<mesh>[^.]+)\.vtx\['
+                       r'(?:(?P<start>\d+)(?::(?P<end>\d+))?|\*)\]$')
+# scatter_obj output backends, in ScatterUI combo box order
+OUTPUT_MODES = ('transforms', 'instancer', 'tiles', 'bound')
+# scatter_height_obj ray snap modes, in ScatterUI combo box order
+SNAP_MODES = ('off', 'down', 'normal')
+# longest snap ray, either way from the object
+SNAP_RAY_LENGTH = 100000.0
+# density map sources, in ScatterUI combo box order
+DENSITY_MAP_TYPES = ('none', 'texture', 'color_set')
+# Scatter attributes settings() and apply_settings() carry on top of
+# scatter_core.SETTING_NAMES
+MAYA_SETTING_NAMES = ('output_mode', 'density_map_type', 'density_map',
+                      'source_weights', 'cull_camera', 'blockers')
+# wall time one chunk of a chunked scatter should take, keeping the UI live
+CHUNK_SECONDS = 0.05
+# instances a re-scatter queues transform writes for between progress
+# reports
+REWRITE_CHUNK = 1000
+CACHE_FILTER = "Scatter Cache (*.scache)"
+# density fractions the live preview refines through, each a superset of
+# the last, and the quiet time after a change before it starts
+PREVIEW_LEVELS = (0.05, 0.25, 1.0)
+PREVIEW_DELAY_MS = 250
+TRANSFORM_PLUGS = ('translateX', 'translateY', 'translateZ',
+                   'rotateX', 'rotateY', 'rotateZ',
+                   'scaleX', 'scaleY', 'scaleZ')
+# NumPy dtype of each element kind of the MScriptUtil buffers
+BUFFER_DTYPES = {'Double': 'float64', 'Float': 'float32', 'Int': 'int32'}
+
+
+def setting_names():
+    """Return the names of all Scatter settings, the core ones first"""
+    return core.SETTING_NAMES + MAYA_SETTING_NAMES
+
+
 def maya_main_window():
     """Return the maya main window widget"""
     main_window = omui.MQtUtil.mainWindow()
@@ -21,14 +97,32 @@ class ScatterUI(QtWidgets.QDialog):
         """Constructor"""
         super(ScatterUI, self).__init__(parent=maya_main_window())
         self.setWindowTitle("Scatter Tool Window")
-        self.setFixedWidth(550)
-        self.setFixedHeight(770)
+        # the options scroll, so the window fits smaller screens
+        self.setMinimumWidth(550)
+        self.resize(550, 800)
         self.setWindowFlags(self.windowFlags() ^
                             QtCore.Qt.WindowContextHelpButtonHint)
         self.scatter_tool = Scatter()
+        self.scatter_job = None
+        self.scatter_timer = QtCore.QTimer(self)
+        self.preview_job = None
+        # restarted by every change, so a burst of edits previews once
+        self.preview_delay_timer = QtCore.QTimer(self)
+        self.preview_delay_timer.setSingleShot(True)
+        self.preview_delay_timer.setInterval(PREVIEW_DELAY_MS)
+        # refines the preview one level per tick while the UI is idle
+        self.preview_timer = QtCore.QTimer(self)
         self.create_ui()
         self.create_connections()
 
+    def closeEvent(self, event):
+        """Cancel a running scatter along with the window"""
+        if self.scatter_job is not None:
+            self.stop_scatter_job()
+        self.stop_preview()
+        self.scatter_tool.clear_preview()
+        super(ScatterUI, self).closeEvent(event)
+
     def create_ui(self):
         self.title_lbl = QtWidgets.QLabel("Scatter Tool")
         self.title_lbl.setAlignment(QtCore.Qt.AlignCenter)
@@ -62,6 +156,7 @@ class ScatterUI(QtWidgets.QDialog):
         self.rnd_rotation_lay = self.randomize_rotate_ui()
         self.rnd_scale_lay = self.randomize_scale_ui()
         self.rnd_height_lay = self.height_val_ui()
+        self.rnd_transform_lay = self.randomize_transform_ui()
         self.density_lay = self.density_val_ui()
         self.main_layout_ui()
 
@@ -69,28 +164,43 @@ class ScatterUI(QtWidgets.QDialog):
         self.main_lay = QtWidgets.QVBoxLayout()
         self.main_lay.addWidget(self.title_lbl)
 
-        self.main_lay.addWidget(self.scatter_scl_lbl)
-        self.main_lay.addWidget(self.scatter_note_scl_lbl)
-        self.main_lay.addLayout(self.rnd_scale_lay)
-
-        self.main_lay.addWidget(self.scatter_rot_lbl)
-        self.main_lay.addWidget(self.scatter_note_rot_lbl)
-        self.main_lay.addLayout(self.rnd_rotation_lay)
-
-        self.main_lay.addWidget(self.scatter_height_lbl)
-        self.main_lay.addWidget(self.scatter_note_height_lbl)
-        self.main_lay.addLayout(self.rnd_height_lay)
-
-        self.main_lay.addWidget(self.scatter_density_lbl)
-        self.main_lay.addWidget(self.scatter_note_density_lbl)
-        self.main_lay.addLayout(self.density_lay)
-
-        self.main_lay.addStretch()
+        self.options_lay = QtWidgets.QVBoxLayout()
+        self.options_lay.addWidget(self.scatter_scl_lbl)
+        self.options_lay.addWidget(self.scatter_note_scl_lbl)
+        self.options_lay.addLayout(self.rnd_scale_lay)
+
+        self.options_lay.addWidget(self.scatter_rot_lbl)
+        self.options_lay.addWidget(self.scatter_note_rot_lbl)
+        self.options_lay.addLayout(self.rnd_rotation_lay)
+
+        self.options_lay.addWidget(self.scatter_height_lbl)
+        self.options_lay.addWidget(self.scatter_note_height_lbl)
+        self.options_lay.addLayout(self.rnd_height_lay)
+        self.options_lay.addLayout(self.rnd_transform_lay)
+
+        self.options_lay.addWidget(self.scatter_density_lbl)
+        self.options_lay.addWidget(self.scatter_note_density_lbl)
+        self.options_lay.addLayout(self.density_lay)
+        self.options_lay.addStretch()
+
+        self.options_wgt = QtWidgets.QWidget()
+        self.options_wgt.setLayout(self.options_lay)
+        self.options_scr = QtWidgets.QScrollArea()
+        self.options_scr.setWidgetResizable(True)
+        self.options_scr.setFrameShape(QtWidgets.QFrame.NoFrame)
+        self.options_scr.setWidget(self.options_wgt)
+        self.main_lay.addWidget(self.options_scr)
+
+        self.main_lay.addWidget(self.scatter_pbar)
         self.main_lay.addLayout(self.sct_cnl_lay)
         self.setLayout(self.main_lay)
 
     def create_connections(self):
         self.scatter_btn.clicked.connect(self.scatter_object)
+        self.scatter_timer.timeout.connect(self.scatter_object_step)
+        self.update_btn.clicked.connect(self.update_scatter_object)
+        self.export_cache_btn.clicked.connect(self.export_cache)
+        self.import_cache_btn.clicked.connect(self.import_cache)
         self.cancel_btn.clicked.connect(self.cancel)
         self.rot_btn.clicked.connect(self.scatter_rotate_object)
         self.scatter_rot_connections()
@@ -98,8 +208,20 @@ class ScatterUI(QtWidgets.QDialog):
         self.scatter_scl_connections()
         self.scatter_height_connections()
         self.height_btn.clicked.connect(self.scatter_height_object)
+        self.scatter_snap_connections()
+        self.transform_btn.clicked.connect(self.scatter_transform_object)
         self.scatter_density_connections()
         self.scatter_normal_connections()
+        self.scatter_output_connections()
+        self.scatter_surface_connections()
+        self.scatter_min_distance_connections()
+        self.scatter_seed_connections()
+        self.scatter_density_map_connections()
+        self.scatter_source_connections()
+        self.scatter_cull_connections()
+        self.scatter_blocker_connections()
+        self.scatter_tile_connections()
+        self.scatter_preview_connections()
 
     def scatter_scl_connections(self):
         self.min_x_scl_sbx.valueChanged.connect(self.update_scl_min_x)
@@ -130,6 +252,69 @@ class ScatterUI(QtWidgets.QDialog):
     def scatter_normal_connections(self):
         self.normal_bool_cbx.stateChanged.connect(self.update_normal_bool)
 
+    def scatter_surface_connections(self):
+        self.surface_bool_cbx.stateChanged.connect(self.update_surface_bool)
+        self.surface_count_sbx.valueChanged.connect(
+            self.update_surface_count)
+
+    def scatter_min_distance_connections(self):
+        self.min_distance_sbx.valueChanged.connect(
+            self.update_min_distance)
+
+    def scatter_seed_connections(self):
+        self.seed_sbx.valueChanged.connect(self.update_seed)
+
+    def scatter_density_map_connections(self):
+        self.density_map_cmb.currentIndexChanged.connect(
+            self.update_density_map_type)
+        self.density_map_led.editingFinished.connect(
+            self.update_density_map)
+        self.density_map_btn.clicked.connect(self.browse_density_map)
+
+    def scatter_tile_connections(self):
+        self.tile_size_sbx.valueChanged.connect(self.update_tile_size)
+        self.tile_region_btn.clicked.connect(self.set_tile_region)
+        self.load_tiles_btn.clicked.connect(self.load_tiles)
+
+    def scatter_cull_connections(self):
+        self.cull_camera_btn.clicked.connect(self.set_cull_camera)
+        self.cull_bands_led.editingFinished.connect(self.update_cull_bands)
+        self.cull_margin_sbx.valueChanged.connect(self.update_cull_margin)
+
+    def scatter_source_connections(self):
+        self.sources_btn.clicked.connect(self.set_sources)
+        self.source_weights_led.editingFinished.connect(
+            self.update_source_weights)
+
+    def scatter_blocker_connections(self):
+        self.blockers_btn.clicked.connect(self.set_blockers)
+
+    def scatter_preview_connections(self):
+        """Preview again after any change to where points land"""
+        self.preview_bool_cbx.stateChanged.connect(self.update_preview_bool)
+        self.preview_delay_timer.timeout.connect(self.start_preview)
+        self.preview_timer.timeout.connect(self.preview_step)
+        for spin_box in (self.density_val_sbx, self.surface_count_sbx,
+                         self.min_distance_sbx, self.seed_sbx,
+                         self.cull_margin_sbx):
+            spin_box.valueChanged.connect(self.schedule_preview)
+        self.surface_bool_cbx.stateChanged.connect(self.schedule_preview)
+        self.density_map_cmb.currentIndexChanged.connect(
+            self.schedule_preview)
+        self.density_map_led.editingFinished.connect(self.schedule_preview)
+        self.cull_camera_btn.clicked.connect(self.schedule_preview)
+        self.cull_bands_led.editingFinished.connect(self.schedule_preview)
+        self.blockers_btn.clicked.connect(self.schedule_preview)
+
+    def scatter_output_connections(self):
+        self.output_mode_cmb.currentIndexChanged.connect(
+            self.update_output_mode)
+        self.reuse_bool_cbx.stateChanged.connect(self.update_reuse_bool)
+
+    def scatter_snap_connections(self):
+        self.snap_mode_cmb.currentIndexChanged.connect(self.update_snap_mode)
+        self.snap_mesh_btn.clicked.connect(self.set_snap_mesh)
+
     def update_rot_min_x(self):
         self.scatter_tool.rot_min_x = self.min_x_rot_sbx.value()
 
@@ -175,9 +360,128 @@ class ScatterUI(QtWidgets.QDialog):
     def update_density_value(self):
         self.scatter_tool.density_value = (self.density_val_sbx.value() / 100)
 
+    def update_min_distance(self):
+        self.scatter_tool.min_distance = self.min_distance_sbx.value()
+
+    def update_surface_count(self):
+        self.scatter_tool.surface_count = self.surface_count_sbx.value()
+
+    def update_seed(self):
+        self.scatter_tool.seed = self.seed_sbx.value()
+
     @QtCore.Slot()
     def scatter_object(self):
-        self.scatter_tool.scatter_obj()
+        self.start_scatter_job(self.scatter_tool.scatter_obj_steps())
+
+    @QtCore.Slot()
+    def export_cache(self):
+        """Save the points of the updatable scatter to a cache file"""
+        path = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Scatter Cache", "", CACHE_FILTER)[0]
+        if path:
+            self.scatter_tool.export_cache(path)
+
+    @QtCore.Slot()
+    def import_cache(self):
+        """Instance the points of a cache file onto its sources"""
+        path = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Import Scatter Cache", "", CACHE_FILTER)[0]
+        if path:
+            self.start_scatter_job(self.scatter_tool.import_cache_steps(path))
+
+    def start_scatter_job(self, job):
+        """Run a chunked scatter job driven by the Qt event loop"""
+        if self.scatter_job is not None:
+            job.close()
+            return
+        self.stop_preview()
+        self.scatter_tool.clear_preview()
+        self.scatter_job = job
+        self.scatter_btn.setEnabled(False)
+        self.update_btn.setEnabled(False)
+        self.import_cache_btn.setEnabled(False)
+        self.load_tiles_btn.setEnabled(False)
+        self.scatter_pbar.setValue(0)
+        self.scatter_timer.start(0)
+
+    @QtCore.Slot()
+    def scatter_object_step(self):
+        """Run one chunk of the scatter job and report its progress"""
+        try:
+            progress = next(self.scatter_job)
+        except StopIteration:
+            self.scatter_pbar.setValue(100)
+            self.stop_scatter_job()
+        except Exception:
+            self.stop_scatter_job()
+            raise
+        else:
+            self.scatter_pbar.setValue(int(progress * 100))
+
+    def stop_scatter_job(self):
+        """Close the scatter job, rolling it back if it has not finished"""
+        self.scatter_timer.stop()
+        job = self.scatter_job
+        self.scatter_job = None
+        self.scatter_btn.setEnabled(True)
+        self.update_btn.setEnabled(True)
+        self.import_cache_btn.setEnabled(True)
+        self.load_tiles_btn.setEnabled(True)
+        if job is not None:
+            job.close()
+
+    @QtCore.Slot()
+    def update_preview_bool(self):
+        """Start previewing the selection, or drop the preview"""
+        if self.preview_bool_cbx.isChecked():
+            self.schedule_preview()
+        else:
+            self.stop_preview()
+            self.scatter_tool.clear_preview()
+
+    @QtCore.Slot()
+    def schedule_preview(self):
+        """Drop any stale refinement and preview once changes settle"""
+        if not self.preview_bool_cbx.isChecked():
+            return
+        self.stop_preview()
+        self.preview_delay_timer.start()
+
+    @QtCore.Slot()
+    def start_preview(self):
+        """Preview the selection, coarse first, unless a scatter runs"""
+        if self.scatter_job is not None:
+            return
+        self.preview_job = self.scatter_tool.preview_steps()
+        self.preview_timer.start(0)
+
+    @QtCore.Slot()
+    def preview_step(self):
+        """Refine the preview by one level"""
+        try:
+            next(self.preview_job)
+        except StopIteration:
+            self.stop_preview()
+        except Exception:
+            self.stop_preview()
+            raise
+
+    def stop_preview(self):
+        """Stop pending and running preview work, keeping the cloud"""
+        self.preview_delay_timer.stop()
+        self.preview_timer.stop()
+        job = self.preview_job
+        self.preview_job = None
+        if job is not None:
+            job.close()
+
+    @QtCore.Slot()
+    def update_scatter_object(self):
+        self.stop_preview()
+        self.scatter_tool.clear_preview()
+        self.scatter_tool.min_height_value = self.min_height_val_sbx.value()
+        self.scatter_tool.max_height_value = self.max_height_val_sbx.value()
+        self.scatter_tool.update_scatter()
 
     @QtCore.Slot()
     def scatter_rotate_object(self):
@@ -193,13 +497,145 @@ class ScatterUI(QtWidgets.QDialog):
         self.scatter_tool.max_height_value = self.max_height_val_sbx.value()
         self.scatter_tool.scatter_height_obj()
 
+    @QtCore.Slot()
+    def scatter_transform_object(self):
+        self.scatter_tool.min_height_value = self.min_height_val_sbx.value()
+        self.scatter_tool.max_height_value = self.max_height_val_sbx.value()
+        self.scatter_tool.scatter_transform_obj()
+
     @QtCore.Slot()
     def update_normal_bool(self):
         self.scatter_tool.normal_bool = self.normal_bool_cbx.isChecked()
 
+    @QtCore.Slot()
+    def update_surface_bool(self):
+        self.scatter_tool.surface_bool = self.surface_bool_cbx.isChecked()
+
+    @QtCore.Slot()
+    def update_density_map_type(self):
+        self.scatter_tool.density_map_type = DENSITY_MAP_TYPES[
+            self.density_map_cmb.currentIndex()]
+
+    @QtCore.Slot()
+    def update_density_map(self):
+        self.scatter_tool.density_map = self.density_map_led.text()
+
+    @QtCore.Slot()
+    def browse_density_map(self):
+        """Pick a density texture file"""
+        path = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Density Map", self.scatter_tool.density_map,
+            "Images (*.png *.jpg *.tif *.tga *.exr *.iff)")[0]
+        if path:
+            self.density_map_led.setText(path)
+            self.update_density_map()
+            self.density_map_cmb.setCurrentIndex(
+                DENSITY_MAP_TYPES.index('texture'))
+
+    @QtCore.Slot()
+    def update_output_mode(self):
+        self.scatter_tool.output_mode = OUTPUT_MODES[
+            self.output_mode_cmb.currentIndex()]
+
+    @QtCore.Slot()
+    def update_reuse_bool(self):
+        self.scatter_tool.reuse_instances = self.reuse_bool_cbx.isChecked()
+
+    @QtCore.Slot()
+    def update_snap_mode(self):
+        self.scatter_tool.snap_mode = SNAP_MODES[
+            self.snap_mode_cmb.currentIndex()]
+
+    @QtCore.Slot()
+    def set_snap_mesh(self):
+        """Snap height offsets onto the first selected mesh"""
+        selection = cmds.ls(selection=True, objectsOnly=True)
+        self.scatter_tool.snap_mesh = selection[0] if selection else None
+        self.snap_mesh_lbl.setText(self.scatter_tool.snap_mesh or "None")
+
+    @QtCore.Slot()
+    def set_sources(self):
+        """Scatter the selected transforms, or the first selected if none"""
+        self.scatter_tool.sources = cmds.ls(selection=True, transforms=True)
+        self.sources_lbl.setText(", ".join(self.scatter_tool.sources) or
+                                 "First Selected")
+
+    @QtCore.Slot()
+    def update_source_weights(self):
+        """Read the weights of the sources, comma or space separated"""
+        try:
+            self.scatter_tool.source_weights = [
+                float(weight) for weight
+                in self.source_weights_led.text().replace(',', ' ').split()]
+        except ValueError:
+            self.scatter_tool.source_weights = []
+            self.source_weights_led.clear()
+
+    @QtCore.Slot()
+    def set_cull_camera(self):
+        """Cull against the first selected camera, or none"""
+        selection = cmds.ls(selection=True, objectsOnly=True)
+        cameras = [node for node in selection
+                   if cmds.listRelatives(node, type='camera') or
+                   cmds.objectType(node) == 'camera']
+        self.scatter_tool.cull_camera = cameras[0] if cameras else None
+        self.cull_camera_lbl.setText(self.scatter_tool.cull_camera or "None")
+
+    @QtCore.Slot()
+    def set_blockers(self):
+        """Keep new instances out of the selected meshes and scatters"""
+        self.scatter_tool.blockers = cmds.ls(selection=True, transforms=True)
+        self.blockers_lbl.setText(", ".join(self.scatter_tool.blockers) or
+                                  "None")
+
+    @QtCore.Slot()
+    def update_cull_bands(self):
+        """Read 'distance:density' bands, space or comma separated"""
+        try:
+            bands = [[float(value) for value in band.split(':')]
+                     for band in self.cull_bands_led.text().replace(
+                         ',', ' ').split()]
+        except ValueError:
+            bands = []
+        if any(len(band) != 2 for band in bands):
+            bands = []
+        self.scatter_tool.cull_bands = sorted(bands)
+        if not bands:
+            self.cull_bands_led.clear()
+
+    @QtCore.Slot()
+    def update_cull_margin(self):
+        self.scatter_tool.cull_margin = self.cull_margin_sbx.value()
+
+    @QtCore.Slot()
+    def update_tile_size(self):
+        self.scatter_tool.tile_size = self.tile_size_sbx.value()
+
+    @QtCore.Slot()
+    def set_tile_region(self):
+        """Instance only the tiles under the selection, all if none"""
+        selection = cmds.ls(selection=True)
+        self.scatter_tool.tile_region = (
+            cmds.exactWorldBoundingBox(selection) if selection else None)
+        self.tile_region_lbl.setText(
+            "Selection Bounds" if selection else "Everything")
+
+    @QtCore.Slot()
+    def load_tiles(self):
+        """Load the tiles under the selection, or in the tile region"""
+        selection = cmds.ls(selection=True)
+        region = (cmds.exactWorldBoundingBox(selection) if selection
+                  else self.scatter_tool.tile_region)
+        self.start_scatter_job(self.scatter_tool.load_tiles_steps(
+            tiled_scatters(), region))
+
     @QtCore.Slot()
     def cancel(self):
-        """Quits the window"""
+        """Stops a running scatter, otherwise quits the window"""
+        if self.scatter_job is not None:
+            self.stop_scatter_job()
+            self.scatter_pbar.setValue(0)
+            return
         self.close()
 
     def cancel_lay_ui(self):
@@ -208,11 +644,24 @@ class ScatterUI(QtWidgets.QDialog):
         self.scatter_btn.setStyleSheet("font: Bold 15px")
         self.cancel_btn = QtWidgets.QPushButton("Cancel")
         self.cancel_btn.setStyleSheet("font: Bold 13px")
+        self.update_btn = QtWidgets.QPushButton("Update Scatter")
+        self.update_btn.setStyleSheet("font: Bold 15px")
         self.scatter_btn.setFixedHeight(40)
+        self.update_btn.setFixedHeight(40)
         self.cancel_btn.setFixedHeight(40)
+        self.export_cache_btn = QtWidgets.QPushButton("Export Cache")
+        self.import_cache_btn = QtWidgets.QPushButton("Import Cache")
+        self.load_tiles_btn = QtWidgets.QPushButton("Load Tiles")
+        self.scatter_pbar = QtWidgets.QProgressBar()
+        self.scatter_pbar.setRange(0, 100)
+        self.scatter_pbar.setValue(0)
         layout = QtWidgets.QGridLayout()
         layout.addWidget(self.scatter_btn, 0, 0)
-        layout.addWidget(self.cancel_btn, 0, 1)
+        layout.addWidget(self.update_btn, 0, 1)
+        layout.addWidget(self.cancel_btn, 0, 2)
+        layout.addWidget(self.export_cache_btn, 1, 0)
+        layout.addWidget(self.import_cache_btn, 1, 1)
+        layout.addWidget(self.load_tiles_btn, 1, 2)
         return layout
 
     def randomize_rotate_ui(self):
@@ -441,6 +890,17 @@ class ScatterUI(QtWidgets.QDialog):
         self.height_btn.setFixedWidth(120)
         self.height_btn.setFixedHeight(40)
 
+        """Height snap label"""
+        self.snap_lbl = QtWidgets.QLabel("Snap:")
+        self.snap_lbl.setStyleSheet("font: Bold 13px")
+        self.snap_mode_cmb = QtWidgets.QComboBox()
+        self.snap_mode_cmb.addItems(["Off", "Down", "Normal"])
+        self.snap_mode_cmb.setCurrentIndex(
+            SNAP_MODES.index(self.scatter_tool.snap_mode))
+        self.snap_mesh_btn = QtWidgets.QPushButton("Set Snap Mesh")
+        self.snap_mesh_lbl = QtWidgets.QLabel(
+            self.scatter_tool.snap_mesh or "None")
+
         layout = QtWidgets.QGridLayout()
 
         layout.addWidget(self.min_height_space, 0, 0)
@@ -454,6 +914,10 @@ class ScatterUI(QtWidgets.QDialog):
         layout.addWidget(self.max_height_val_sbx, 1, 6)
         layout.addWidget(self.min_height_space, 1, 7)
         layout.addWidget(self.min_height_space, 2, 8)
+        layout.addWidget(self.snap_lbl, 3, 2)
+        layout.addWidget(self.snap_mode_cmb, 3, 3)
+        layout.addWidget(self.snap_mesh_btn, 3, 5, 1, 2)
+        layout.addWidget(self.snap_mesh_lbl, 3, 7, 1, 2)
 
         return layout
 
@@ -489,6 +953,16 @@ class ScatterUI(QtWidgets.QDialog):
         self.min_height_space.setFixedHeight(5)
         self.min_height_space.setStyleSheet("font: 5px")
 
+    def randomize_transform_ui(self):
+        """random rotation, scale and height in one pass layout"""
+        self.transform_btn = QtWidgets.QPushButton("Randomize Transforms")
+        self.transform_btn.setStyleSheet("font: Bold 15px")
+        self.transform_btn.setMinimumHeight(40)
+
+        layout = QtWidgets.QGridLayout()
+        layout.addWidget(self.transform_btn, 0, 0)
+        return layout
+
     def density_val_ui(self):
         """Specify density value to scatter"""
         self.density_val_sbx = QtWidgets.QDoubleSpinBox()
@@ -514,6 +988,134 @@ class ScatterUI(QtWidgets.QDialog):
         self.normal_lbl.setStyleSheet("font: Bold 15px")
         self.normal_bool_cbx = QtWidgets.QCheckBox()
 
+        """Scatter output label"""
+        self.output_mode_lbl = QtWidgets.QLabel("Output:")
+        self.output_mode_lbl.setStyleSheet("font: Bold 15px")
+        self.output_mode_cmb = QtWidgets.QComboBox()
+        self.output_mode_cmb.addItems(["Transforms", "Instancer", "Tiles",
+                                       "Bound"])
+        self.output_mode_cmb.setCurrentIndex(
+            OUTPUT_MODES.index(self.scatter_tool.output_mode))
+
+        """Scatter surface label"""
+        self.surface_lbl = QtWidgets.QLabel("Surface:")
+        self.surface_lbl.setStyleSheet("font: Bold 15px")
+        self.surface_bool_cbx = QtWidgets.QCheckBox()
+        self.surface_count_sbx = QtWidgets.QSpinBox()
+        self.surface_count_sbx.setMaximum(10000000)
+        self.surface_count_sbx.setSingleStep(100)
+        self.surface_count_sbx.setButtonSymbols(
+            QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.surface_count_sbx.setFixedWidth(75)
+        self.surface_count_sbx.setValue(self.scatter_tool.surface_count)
+
+        """Scatter min distance label"""
+        self.min_distance_lbl = QtWidgets.QLabel("Min Distance:")
+        self.min_distance_lbl.setStyleSheet("font: Bold 15px")
+        self.min_distance_sbx = QtWidgets.QDoubleSpinBox()
+        self.min_distance_sbx.setDecimals(2)
+        self.min_distance_sbx.setSingleStep(.1)
+        self.min_distance_sbx.setMaximum(10000)
+        self.min_distance_sbx.setButtonSymbols(
+            QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.min_distance_sbx.setFixedWidth(75)
+        self.min_distance_sbx.setValue(self.scatter_tool.min_distance)
+
+        """Scatter seed label"""
+        self.seed_lbl = QtWidgets.QLabel("Seed:")
+        self.seed_lbl.setStyleSheet("font: Bold 15px")
+        self.seed_sbx = QtWidgets.QSpinBox()
+        self.seed_sbx.setMaximum(2147483647)
+        self.seed_sbx.setButtonSymbols(
+            QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.seed_sbx.setFixedWidth(75)
+        self.seed_sbx.setValue(self.scatter_tool.seed)
+
+        """Scatter density map label"""
+        self.density_map_lbl = QtWidgets.QLabel("Density Map:")
+        self.density_map_lbl.setStyleSheet("font: Bold 15px")
+        self.density_map_cmb = QtWidgets.QComboBox()
+        self.density_map_cmb.addItems(["None", "Texture", "Color Set"])
+        self.density_map_cmb.setCurrentIndex(
+            DENSITY_MAP_TYPES.index(self.scatter_tool.density_map_type))
+        self.density_map_led = QtWidgets.QLineEdit(
+            self.scatter_tool.density_map)
+        self.density_map_led.setPlaceholderText("texture file or color set")
+        self.density_map_btn = QtWidgets.QPushButton("...")
+        self.density_map_btn.setFixedWidth(30)
+
+        """Scatter sources label"""
+        self.sources_lbl_title = QtWidgets.QLabel("Sources:")
+        self.sources_lbl_title.setStyleSheet("font: Bold 15px")
+        self.sources_btn = QtWidgets.QPushButton("Set Sources")
+        self.sources_lbl = QtWidgets.QLabel(
+            ", ".join(self.scatter_tool.sources) or "First Selected")
+        self.source_weights_led = QtWidgets.QLineEdit(
+            " ".join(str(weight) for weight
+                     in self.scatter_tool.source_weights))
+        self.source_weights_led.setPlaceholderText("weights, e.g. 3 1 1")
+
+        """Scatter camera cull label"""
+        self.cull_lbl = QtWidgets.QLabel("Cull Camera:")
+        self.cull_lbl.setStyleSheet("font: Bold 15px")
+        self.cull_camera_btn = QtWidgets.QPushButton("Set Camera")
+        self.cull_camera_lbl = QtWidgets.QLabel(
+            self.scatter_tool.cull_camera or "None")
+        self.cull_margin_sbx = QtWidgets.QDoubleSpinBox()
+        self.cull_margin_sbx.setDecimals(1)
+        self.cull_margin_sbx.setMaximum(100000)
+        self.cull_margin_sbx.setButtonSymbols(
+            QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.cull_margin_sbx.setFixedWidth(75)
+        self.cull_margin_sbx.setValue(self.scatter_tool.cull_margin)
+        self.cull_margin_sbx.setToolTip("frustum margin")
+        self.cull_bands_led = QtWidgets.QLineEdit(
+            " ".join("%g:%g" % tuple(band)
+                     for band in self.scatter_tool.cull_bands))
+        self.cull_bands_led.setPlaceholderText(
+            "distance:density bands, e.g. 100:1 500:0.3")
+
+        """Scatter blockers label"""
+        self.blockers_lbl_title = QtWidgets.QLabel("Blockers:")
+        self.blockers_lbl_title.setStyleSheet("font: Bold 15px")
+        self.blockers_btn = QtWidgets.QPushButton("Set Blockers")
+        self.blockers_btn.setToolTip(
+            "meshes and scatter groups new instances must not overlap")
+        self.blockers_lbl = QtWidgets.QLabel(
+            ", ".join(self.scatter_tool.blockers) or "None")
+
+        """Scatter tiles label"""
+        self.tile_lbl = QtWidgets.QLabel("Tile Size:")
+        self.tile_lbl.setStyleSheet("font: Bold 15px")
+        self.tile_size_sbx = QtWidgets.QDoubleSpinBox()
+        self.tile_size_sbx.setDecimals(1)
+        self.tile_size_sbx.setMinimum(0.1)
+        self.tile_size_sbx.setMaximum(100000)
+        self.tile_size_sbx.setSingleStep(10)
+        self.tile_size_sbx.setButtonSymbols(
+            QtWidgets.QAbstractSpinBox.PlusMinus)
+        self.tile_size_sbx.setFixedWidth(75)
+        self.tile_size_sbx.setValue(self.scatter_tool.tile_size)
+        self.tile_region_btn = QtWidgets.QPushButton("Set Region")
+        self.tile_region_lbl = QtWidgets.QLabel(
+            "Everything" if self.scatter_tool.tile_region is None
+            else "Selection Bounds")
+
+        """Scatter reuse instances label"""
+        self.reuse_lbl = QtWidgets.QLabel("Reuse Instances:")
+        self.reuse_lbl.setStyleSheet("font: Bold 15px")
+        self.reuse_bool_cbx = QtWidgets.QCheckBox()
+        self.reuse_bool_cbx.setChecked(self.scatter_tool.reuse_instances)
+        self.reuse_bool_cbx.setToolTip(
+            "re-scatter onto the instances of the last Transforms scatter")
+
+        """Scatter live preview label"""
+        self.preview_lbl = QtWidgets.QLabel("Live Preview:")
+        self.preview_lbl.setStyleSheet("font: Bold 15px")
+        self.preview_bool_cbx = QtWidgets.QCheckBox()
+        self.preview_bool_cbx.setToolTip(
+            "points of the selection's scatter, redrawn on every change")
+
         layout = QtWidgets.QGridLayout()
 
         layout.addWidget(self.dens_val_space, 0, 0)
@@ -530,6 +1132,39 @@ class ScatterUI(QtWidgets.QDialog):
         layout.addWidget(self.dens_val_space, 1, 9)
 
         layout.addWidget(self.dens_val_space, 2, 0)
+        layout.addWidget(self.output_mode_lbl, 3, 1)
+        layout.addWidget(self.output_mode_cmb, 3, 3)
+        layout.addWidget(self.surface_lbl, 3, 6)
+        layout.addWidget(self.surface_count_sbx, 3, 7)
+        layout.addWidget(self.surface_bool_cbx, 3, 8)
+        layout.addWidget(self.min_distance_lbl, 4, 1)
+        layout.addWidget(self.min_distance_sbx, 4, 3)
+        layout.addWidget(self.seed_lbl, 4, 6)
+        layout.addWidget(self.seed_sbx, 4, 7)
+        layout.addWidget(self.density_map_lbl, 5, 1)
+        layout.addWidget(self.density_map_cmb, 5, 3)
+        layout.addWidget(self.density_map_led, 5, 6, 1, 2)
+        layout.addWidget(self.density_map_btn, 5, 8)
+        layout.addWidget(self.sources_lbl_title, 6, 1)
+        layout.addWidget(self.sources_btn, 6, 3)
+        layout.addWidget(self.source_weights_led, 6, 6, 1, 2)
+        layout.addWidget(self.sources_lbl, 7, 1, 1, 8)
+        layout.addWidget(self.cull_lbl, 8, 1)
+        layout.addWidget(self.cull_camera_btn, 8, 3)
+        layout.addWidget(self.cull_camera_lbl, 8, 6)
+        layout.addWidget(self.cull_margin_sbx, 8, 7)
+        layout.addWidget(self.cull_bands_led, 9, 1, 1, 8)
+        layout.addWidget(self.tile_lbl, 10, 1)
+        layout.addWidget(self.tile_size_sbx, 10, 3)
+        layout.addWidget(self.tile_region_btn, 10, 6)
+        layout.addWidget(self.tile_region_lbl, 10, 7, 1, 2)
+        layout.addWidget(self.preview_lbl, 11, 1)
+        layout.addWidget(self.preview_bool_cbx, 11, 3)
+        layout.addWidget(self.reuse_lbl, 11, 6, 1, 2)
+        layout.addWidget(self.reuse_bool_cbx, 11, 8)
+        layout.addWidget(self.blockers_lbl_title, 12, 1)
+        layout.addWidget(self.blockers_btn, 12, 3)
+        layout.addWidget(self.blockers_lbl, 12, 6, 1, 3)
 
         return layout
 
@@ -560,94 +1195,1955 @@ class Scatter(object):
 
         self.density_value = 1.0
 
+        self.output_mode = 'transforms'
+
+        self.surface_bool = False
+        self.surface_count = 1000
+        self.surface_tables = {}
+
+        self.density_map_type = 'none'
+        # texture file path or color set name
+        self.density_map = ''
+        self.density_map_tables = {}
+
+        # with sources set, each point instances one of them, drawn by
+        # source_weights, and the whole selection is scattered onto
+        self.sources = []
+        self.source_weights = []
+
+        # camera whose frustum and (distance, density) bands cull points
+        self.cull_camera = None
+        self.cull_bands = []
+        self.cull_margin = 0.0
+
+        # meshes, and groups such as earlier scatters whose shown children
+        # or instances each block with their bounds, that new instances
+        # must not overlap. blocker_tables caches the boxes of each mesh
+        # and group, and blocker_grid the box_index of all of them under
+        # their digests
+        self.blockers = []
+        self.blocker_tables = {}
+        self.blocker_grid = None
+
+        # tiles output buckets points into tile_size XZ tiles, and only
+        # the tiles overlapping the tile_region bounding box are instanced
+        self.tile_size = 100.0
+        self.tile_region = None
+
+        self.min_distance = 0.0
+
+        self.seed = 0
+
+        self.snap_mode = 'off'
+        self.snap_mesh = None
+        # Randomize Transforms clicks so far, each draws under its own seed
+        self.randomize_count = 0
+
+        self.layout = None
+
+        self.scatter_grp = None
+        # with reuse_instances a transforms scatter rewrites the instances
+        # of the last one, instance_pool, in place instead of making new
+        self.reuse_instances = False
+        self.instance_pool = None
+        # particle cloud of the live preview
+        self.preview = None
+        # bound output scatters following their deforming target meshes,
+        # updated by the time change callback while there are any. Each
+        # leaves the list, with its removal callback, when its particles
+        # are deleted, so deleting the last stops the time callback
+        self.bound_scatters = []
+        self.time_callback = None
+        # mesh -> (fingerprint, mesh_hash) of the meshes hashed so far,
+        # and the node dirty callback of each that drops its entry
+        self.mesh_hashes = {}
+        self.mesh_callbacks = {}
+        # scene new and open callbacks, added along with the first
+        # callback that has to go when the scene does
+        self.scene_callbacks = []
+
+        self.profile_path = None
+        self.profiler = None
+        self.last_profile = None
+
+    def settings(self):
+        """Return the setting_names() attributes as a dict"""
+        return dict((name, getattr(self, name)) for name in setting_names())
+
+    def apply_settings(self, settings):
+        """Set the setting_names() attributes from a dict, such as JSON"""
+        unknown = sorted(set(settings) - set(setting_names()))
+        if unknown:
+            raise ValueError('unknown scatter settings: ' +
+                             ', '.join(unknown))
+        for name, value in settings.items():
+            setattr(self, name, value)
+
     def scatter_obj(self):
         """scatter the selected object"""
-        vert_list = cmds.ls(selection=True, fl=True)
-        den_list = random.sample(vert_list,
-                                 int(round(float(len(vert_list)
-                                                 * self.density_value))))
-        scatter_grp = cmds.group(n='scatter_grp', a=False)
-        object_to_instance = vert_list[0]
-        if cmds.objectType(object_to_instance) == 'transform':
+        for progress in self.scatter_obj_steps():
+            pass
+        return self.scatter_grp
+
+    def scatter_obj_steps(self):
+        """scatter the selected object in chunks, yielding progress 0-1
+
+        Closing the generator before it finishes cancels the scatter and
+        rolls the scene back to how it was.
+        """
+        return self.profiled_steps('scatter_obj', self.scatter_obj_chunks())
+
+    def profiled_steps(self, label, chunks):
+        """yield the progress of a chunked job, profiled as one run"""
+        self.start_profile(label)
+        try:
+            for progress in chunks:
+                yield progress
+        finally:
+            chunks.close()
+            self.finish_profile()
+
+    def scatter_obj_chunks(self):
+        """the scatter_obj_steps work, without the profiling around it
+
+        Every chunk runs with undo off, so no undo chunk stays open while
+        the UI runs between chunks, and cancelling deletes the scatter
+        group with nothing left to undo. The finished scatter is then
+        made one undo step by finish_scatter.
+        """
+        self.scatter_grp = None
+        scatter_grp = None
+        objects = []
+        # not flattened: vertex ranges stay compact 'mesh.vtx[a:b]' strings
+        vert_list = cmds.ls(selection=True)
+        selection = self.split_selection(vert_list)
+        if selection is None:
+            return
+        sources, targets = selection
+        if (self.output_mode == 'tiles' and
+                not cmds.file(query=True, sceneName=True)):
+            cmds.warning('Scatter: save the scene before a tiled scatter, '
+                         'its tiles are cached next to it')
+            return
+        ids, positions, normals = self.sample_points(
+            self.target_meshes(targets, self.target_density_maps(targets)),
+            self.density_value)
+        kept = self.unblocked(sources, ids, positions)
+        ids, positions, normals = ids[kept], positions[kept], normals[kept]
+        choices = self.source_choices(ids, len(sources))
+        yield 0.0
+        pool = self.reusable_pool()
+        if pool is not None:
+            for progress in self.reuse_instance_steps(pool, sources,
+                                                      positions, normals,
+                                                      choices):
+                yield progress
+            self.scatter_grp = uuid_path(pool['group'])
+            yield 1.0
+            return
+        shapes = [source_shape(source) for source in sources]
+        instances = []
+        try:
+            with UndoOff():
+                scatter_grp = cmds.group(em=True, n='scatter_grp')
+                objects = instance_sources(sources, scatter_grp)
+                if self.output_mode == 'instancer':
+                    cmds.parent(self.object_instancer(positions, normals,
+                                                      objects, choices),
+                                scatter_grp)
+                    cmds.hide(objects)
+                elif self.output_mode == 'bound':
+                    cmds.parent(self.bound_instancer(targets, ids, objects,
+                                                     choices),
+                                scatter_grp)
+                    cmds.hide(objects)
+                elif self.output_mode == 'tiles':
+                    self.write_tiles(scatter_grp, objects, ids, positions,
+                                     normals, choices)
+                    cmds.hide(objects)
+            if self.output_mode == 'tiles':
+                for progress in undo_off_steps(self.tile_load_steps(
+                        scatter_grp, self.tile_region)):
+                    yield progress
+            elif self.output_mode == 'transforms':
                 if not self.normal_bool:
-                    self.object_y(den_list, object_to_instance)
+                    steps = self.object_y_steps(positions, objects,
+                                                instances, choices)
                 else:
-                    self.object_normal(den_list, object_to_instance)
-        self.object_instance_rename()
-        cmds.delete(vert_list[0])
+                    steps = self.object_normal_steps(
+                        positions, normals, objects, instances, choices)
+                for done in undo_off_steps(steps):
+                    yield float(done) / len(positions)
+                with UndoOff():
+                    cmds.delete(objects)
+        except BaseException:
+            if scatter_grp is not None:
+                with UndoOff():
+                    cmds.delete(scatter_grp)
+            raise
+        self.finish_scatter(scatter_grp, sources)
+        self.scatter_grp = scatter_grp
+        if self.output_mode == 'transforms':
+            self.instance_pool = {'group': node_uuids(scatter_grp)[0],
+                                  'instances': {}}
+            self.add_to_pool(instances, [shapes[choice] for choice
+                                         in choices.tolist()])
+        yield 1.0
+
+    def finish_scatter(self, scatter_grp, sources):
+        """Make a scatter group built with undo off one undo step
+
+        Undo deletes the group and redo brings it back, through one
+        MDGModifier recorded as already done. A single selected source
+        is used up by the scatter in the same step, as an instance of it
+        in the group stands in for it.
+        """
+        cmds.undoInfo(openChunk=True, chunkName='scatter')
+        try:
+            scatter_undo.record_inverse(delete_modifier([scatter_grp]))
+            if not self.sources:
+                cmds.delete(sources[0])
+        finally:
+            cmds.undoInfo(closeChunk=True)
+
+    def reusable_pool(self):
+        """Return the instance_pool a scatter would reuse, None if none"""
+        pool = self.instance_pool
+        if (not self.reuse_instances or self.output_mode != 'transforms' or
+                pool is None or uuid_path(pool['group']) is None):
+            return None
+        return pool
+
+    def add_to_pool(self, instances, shapes):
+        """pool instances by the source_shape each one instances
+
+        The pool keeps UUIDs, which still find the instances after they
+        or their group are renamed or moved.
+        """
+        pooled = self.instance_pool['instances']
+        for instance, shape in zip(node_uuids(instances), shapes):
+            pooled.setdefault(shape, []).append(instance)
+
+    def reuse_instance_steps(self, pool, sources, positions, normals,
+                             choices):
+        """Re-scatter onto the pooled instances, yielding progress 0-1
+
+        Each point takes a pooled instance of its source's shape, and
+        only points left without one are instanced, into the pool group.
+        Pooled instances left over are hidden and stay pooled for later
+        re-scatters, so a re-scatter no larger than the pool creates no
+        nodes. Instances are made with undo off, and all transforms are
+        written by one MDGModifier at the end, so cancelling just deletes
+        the instances made so far. Selected sources are left where they
+        are.
+        """
+        scatter_grp = uuid_path(pool['group'])
+        shapes = [source_shape(source) for source in sources]
+        point_shapes = [shapes[choice] for choice in choices.tolist()]
+        # instances deleted or undone since they were pooled drop out
+        paths = uuid_paths([uuid for uuids in pool['instances'].values()
+                            for uuid in uuids])
+        free = dict((shape, [paths[uuid] for uuid in uuids if uuid in paths])
+                    for shape, uuids in pool['instances'].items())
+        instances = [free[shape].pop() if free.get(shape) else None
+                     for shape in point_shapes]
+        missing = [index for index, instance in enumerate(instances)
+                   if instance is None]
+        surplus = [name for names in free.values() for name in names]
+        total = float(len(missing) + len(instances)) or 1.0
+        objects = []
+        created = []
+        try:
+            with UndoOff():
+                objects = instance_sources(sources, scatter_grp)
+            for done in undo_off_steps(self.instance_steps(
+                    objects, choices[np.array(missing, dtype=int)],
+                    len(missing), lambda new_instance, index: None,
+                    created, sum(len(names) for names
+                                 in pool['instances'].values()))):
+                yield done / total
+            for index, instance in zip(missing, created):
+                instances[index] = instance
+            values = self.placement_values(positions, normals, objects,
+                                           choices).tolist()
+            modifier = om.MDGModifier()
+            for start in range(0, len(instances), REWRITE_CHUNK):
+                chunk = instances[start:start + REWRITE_CHUNK]
+                rows = values[start:start + REWRITE_CHUNK]
+                with self.profile('transform', len(chunk)):
+                    for instance, row in zip(chunk, rows):
+                        for plug, value in zip(
+                                transform_plugs(instance), row):
+                            modifier.newPlugValueDouble(plug, value)
+                yield (len(missing) + start + len(chunk)) / total
+            with UndoOff():
+                cmds.delete(objects)
+        except BaseException:
+            if objects or created:
+                with UndoOff():
+                    cmds.delete(objects + created)
+            raise
+        # the instances made with undo off go on undo, before the rest
+        # of the re-scatter is undone
+        cmds.undoInfo(openChunk=True, chunkName='rescatter')
+        try:
+            scatter_undo.record_inverse(delete_modifier(created))
+            scatter_undo.apply_modifier(modifier)
+            if surplus:
+                cmds.hide(surplus)
+            if instances:
+                cmds.showHidden(instances)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        pool['instances'] = {}
+        self.add_to_pool(instances + surplus,
+                         point_shapes + [shape for shape, names
+                                         in free.items() for name in names])
+
+    def split_selection(self, vert_list):
+        """Return (sources, targets) of a selection, None without a source
+
+        With sources set the whole selection is scattered onto, otherwise
+        the first selected transform is the single source. Selected
+        faces and edges are scattered onto through their vertices, see
+        vertex_targets. Without any target left to scatter onto it warns
+        and returns None as well.
+        """
+        if self.sources:
+            sources, targets = list(self.sources), vert_list
+        elif not vert_list or cmds.objectType(vert_list[0]) != 'transform':
+            return None
+        else:
+            sources, targets = vert_list[:1], vert_list[1:]
+        targets = vertex_targets(targets)
+        if not targets:
+            cmds.warning('Scatter: select the meshes or vertices to '
+                         'scatter onto')
+            return None
+        return sources, targets
+
+    def group_sources(self, sources, scatter_grp):
+        """Return the objects instanced in scatter_grp, one per source
+
+        Instances are created as siblings of their source, so moving the
+        source into the group places every instance there as it is made.
+        A single selected source is moved there itself. Set sources stay
+        where they are, and an instance of each stands in for them.
+        """
+        if not self.sources:
+            return [cmds.parent(sources[0], scatter_grp)[0]]
+        return instance_sources(sources, scatter_grp)
+
+    def source_choices(self, ids, count):
+        """index of the source each point id instances, by source_weights"""
+        weights = np.ones(count)
+        given = [float(weight) for weight in self.source_weights][:count]
+        weights[:len(given)] = given
+        return core.source_choice(self.seed, ids, weights)
+
+    def preview_steps(self):
+        """Preview the scatter of the selection as one particle cloud
+
+        Each step samples the next PREVIEW_LEVELS fraction of the density
+        and replaces the cloud with it, yielding the fraction shown. As
+        the keep tests compare fixed per point ranks, every step only adds
+        points, ending on the points Scatter Object places. Closing the
+        generator drops the remaining refinement.
+        """
+        selection = self.split_selection(cmds.ls(selection=True))
+        if selection is None:
+            return
+        sources, targets = selection
+        meshes = self.target_meshes(targets,
+                                    self.target_density_maps(targets))
+        for level in PREVIEW_LEVELS:
+            ids, positions, normals = self.sample_points(
+                meshes, self.density_value * level)
+            self.show_preview(positions[self.unblocked(sources, ids,
+                                                       positions)])
+            yield level
+
+    def show_preview(self, positions):
+        """Replace the preview cloud, outside of the undo queue
+
+        The selection the preview is made from is kept selected.
+        """
+        self.clear_preview()
+        if not len(positions):
+            return
+        selection = cmds.ls(selection=True)
+        with UndoOff():
+            self.preview = cmds.particle(p=positions.tolist(),
+                                         n='scatter_preview')[0]
+            if selection:
+                cmds.select(selection, replace=True)
+            else:
+                cmds.select(clear=True)
+
+    def clear_preview(self):
+        """Delete the preview cloud, outside of the undo queue"""
+        if self.preview is None or not cmds.objExists(self.preview):
+            self.preview = None
+            return
+        with UndoOff():
+            cmds.delete(self.preview)
+        self.preview = None
+
+    def update_scatter(self):
+        """Scatter the selection once, then update that scatter in place
+
+        Sampled points, normals and per point random values are cached
+        under a key of the target mesh hashes and sampling parameters, and
+        only the stages whose inputs changed are redone. A new density
+        adds or deletes just the instances whose cached rank crosses it,
+        and new rotation, scale or height ranges rewrite just the changed
+        plugs of the existing instances. Each update is one undo step.
+        """
+        layout = self.layout
+        if layout is None or uuid_path(layout['group']) is None:
+            layout = self.new_layout(cmds.ls(selection=True))
+            if layout is None:
+                return None
+        self.start_profile('update_scatter')
+        cmds.undoInfo(openChunk=True, chunkName='scatterUpdate')
+        try:
+            self.update_layout(layout)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+            self.finish_profile()
+        self.layout = layout
+        return uuid_path(layout['group'])
+
+    def start_profile(self, label):
+        """start collecting phase timings if profile_path is set"""
+        if self.profile_path:
+            self.profiler = scatter_profile.ScatterProfiler(label)
+
+    def finish_profile(self):
+        """write the JSON phase report of a profiled run"""
+        if self.profiler is not None:
+            self.last_profile = self.profiler.finish(self.profile_path)
+            self.profiler = None
+
+    def profile(self, name, calls=1):
+        """context timing one pass through a phase while profiling"""
+        if self.profiler is None:
+            return scatter_profile.NULL_PHASE
+        return self.profiler.phase(name, calls)
+
+    def new_layout(self, vert_list):
+        """group the sources of a new updatable scatter
+
+        The group, its sources, instances and particles are kept by UUID
+        and found again by uuid_paths on every update, so renaming or
+        moving them, or another scatter reusing instance names, cannot
+        point an update at the wrong nodes.
+        """
+        selection = self.split_selection(vert_list)
+        if selection is None:
+            return None
+        sources, targets = selection
+        scatter_grp = cmds.group(em=True, n='scatter_grp')
+        # kept hidden in the group as the sources of instances added later
+        objects = self.group_sources(sources, scatter_grp)
+        cmds.hide(objects)
+        return {'group': node_uuids(scatter_grp)[0],
+                'sources': node_uuids(objects),
+                'source_names': sources, 'targets': targets,
+                'sample_key': None,
+                'output_mode': None, 'instances': {}, 'plugs': {},
+                'particle': None}
+
+    def layout_sample_key(self, targets):
+        """key of everything the cached points of a layout depend on"""
+        return (tuple(targets),
+                tuple(self.mesh_digest(mesh)
+                      for mesh in selected_meshes(targets)),
+                self.surface_bool,
+                self.surface_count if self.surface_bool else None,
+                self.min_distance, self.seed)
+
+    def update_layout(self, layout):
+        """resample, reselect and rewrite the stages that changed"""
+        paths = uuid_paths(layout['sources'])
+        sources = [paths[uuid] for uuid in layout['sources']]
+        with self.profile('hash'):
+            sample_key = self.layout_sample_key(layout['targets'])
+        if sample_key != layout['sample_key']:
+            self.clear_layout_output(layout)
+            meshes = self.target_meshes(layout['targets'])
+            ids, positions, normals = self.sample_points(meshes, 1.0,
+                                                         cull=False)
+            layout.update(sample_key=sample_key, meshes=meshes, ids=ids,
+                          positions=positions,
+                          normals=normals,
+                          ranks=core.point_random(self.seed, ids,
+                                                  core.RANK_STREAM)[:, 0],
+                          random=core.point_random(
+                              self.seed, ids, core.TRANSFORM_STREAM, 7),
+                          values=np.full((len(ids), 9), np.nan),
+                          choices=self.source_choices(
+                              ids, len(layout['sources'])))
+        if self.output_mode != layout['output_mode']:
+            self.clear_layout_output(layout)
+            layout['output_mode'] = self.output_mode
+
+        density = self.density_value
+        density_maps = self.target_density_maps(layout['targets'])
+        if density_maps is not None or self.cull_camera:
+            with self.profile('cull'):
+                meshes = [dict(mesh, density_map=density_map)
+                          for mesh, density_map in zip(
+                              layout['meshes'],
+                              density_maps or [None] * len(layout['meshes']))]
+                density = density * core.point_factors(
+                    meshes, self.settings(), layout['ids'],
+                    layout['positions'],
+                    get_camera(self.cull_camera) if self.cull_camera
+                    else None)
+        wanted = np.flatnonzero(layout['ranks'] < density)
+        with self.profile('frames'):
+            values = core.transform_values(layout['positions'][wanted],
+                                           layout['normals'][wanted],
+                                           layout['random'][wanted],
+                                           self.settings())
+        kept = self.unblocked(sources, layout['ids'][wanted],
+                              values[:, 0:3], values[:, 6:9])
+        wanted, values = wanted[kept], values[kept]
+        choices = self.source_choices(layout['ids'],
+                                      len(layout['sources']))
+        if self.output_mode in ('instancer', 'bound'):
+            if self.output_mode == 'bound':
+                self.update_layout_bound(layout, sources,
+                                         layout['ids'][wanted],
+                                         choices[wanted])
+            else:
+                self.update_layout_instancer(layout, sources, values,
+                                             choices[wanted])
+            layout['values'][:] = np.nan
+            layout['values'][wanted] = values
+        else:
+            self.update_layout_instances(layout, sources, wanted, values,
+                                         choices)
+        layout['choices'] = choices
+
+    def update_layout_instances(self, layout, sources, wanted, values,
+                                choices):
+        """delete, create and rewrite instances to match wanted points
+
+        Instances whose point now draws another source are made again.
+        """
+        instances = layout['instances']
+        plugs = layout['plugs']
+        wanted_list = wanted.tolist()
+        wanted_set = set(wanted_list)
+        wanted_set.difference_update(
+            np.flatnonzero(choices != layout['choices']).tolist())
+        surplus = [index for index in instances if index not in wanted_set]
+        if surplus:
+            with self.profile('delete', len(surplus)):
+                delete_uuids([instances.pop(index) for index in surplus])
+            for index in surplus:
+                del plugs[index]
+            layout['values'][surplus] = np.nan
+        added = [index for index in wanted_list if index not in instances]
+        with self.profile('instance', len(added)):
+            names = []
+            for index in added:
+                names.append(cmds.instance(sources[choices[index]],
+                                           n=instance_name(index))[0])
+                plugs[index] = transform_plugs(names[-1])
+            if added:
+                instances.update(zip(added, node_uuids(names)))
+                cmds.showHidden(names)
+
+        changed_rows, changed_cols = np.nonzero(
+            ~(values == layout['values'][wanted]))
+        with self.profile('transform', len(changed_rows)):
+            modifier = om.MDGModifier()
+            for row, col in zip(changed_rows.tolist(),
+                                changed_cols.tolist()):
+                modifier.newPlugValueDouble(plugs[wanted_list[row]][col],
+                                            values[row, col])
+            scatter_undo.apply_modifier(modifier)
+        layout['values'][wanted] = values
+
+    def update_layout_instancer(self, layout, sources, values, choices):
+        """rebuild the particle instancer from the wanted points"""
+        if layout['particle']:
+            delete_uuids(layout['particle'])
+        with self.profile('instancer'):
+            particle = self.particle_instancer(
+                values[:, 0:3], np.degrees(values[:, 3:6]), values[:, 6:9],
+                sources, choices)
+        cmds.parent(particle, uuid_path(layout['group']))
+        layout['particle'] = node_uuids(list(particle))
+
+    def update_layout_bound(self, layout, sources, ids, choices):
+        """rebind the bound instancer to the wanted point ids
+
+        Deleting the last one drops it from the bound scatters through
+        its removal callback.
+        """
+        if layout['particle']:
+            delete_uuids(layout['particle'])
+        particle = self.bound_instancer(layout['targets'], ids, sources,
+                                        choices)
+        cmds.parent(particle, uuid_path(layout['group']))
+        layout['particle'] = node_uuids(list(particle))
+
+    def export_cache(self, path):
+        """Write the points of the updatable scatter to a cache file
+
+        Return the number of points written, None without a scatter.
+        """
+        layout = self.layout
+        if layout is None or uuid_path(layout['group']) is None:
+            return None
+        placed = np.flatnonzero(~np.isnan(layout['values'][:, 0]))
+        with self.profile('export'):
+            scatter_cache.write_cache(
+                path, layout['ids'][placed], layout['values'][placed],
+                layout['choices'][placed], layout['source_names'],
+                self.settings())
+        return len(placed)
+
+    def import_cache_steps(self, path):
+        """instance a cache file in chunks, yielding progress 0-1
+
+        Closing the generator before it finishes cancels the import.
+        """
+        return self.profiled_steps('import_cache',
+                                   self.import_cache_chunks(path))
+
+    def import_cache_chunks(self, path):
+        """the import_cache_steps work, without the profiling around it
+
+        Points instance the cache's own sources, or with sources set the
+        sources of the same index, so one cache can dress another set.
+        Like scatter_obj_chunks it builds with undo off and records the
+        finished group as one undo step.
+        """
+        self.scatter_grp = None
+        with self.profile('read'):
+            cache = scatter_cache.read_cache(path)
+        sources = list(self.sources or cache['sources'])
+        used = int(cache['source'].max()) + 1 if cache['count'] else 0
+        if len(sources) < used:
+            raise ValueError('scatter cache uses %d sources, not %d' % (
+                used, len(sources)))
+        missing = [source for source in sources[:used]
+                   if not cmds.objExists(source)]
+        if missing:
+            raise ValueError('missing scatter cache sources: ' +
+                             ', '.join(missing))
+        yield 0.0
+        scatter_grp = None
+        try:
+            with UndoOff():
+                scatter_grp = cmds.group(em=True, n='scatter_grp')
+                objects = instance_sources(sources, scatter_grp)
+                if self.output_mode == 'instancer':
+                    with self.profile('instancer'):
+                        cmds.parent(self.particle_instancer(
+                            cache['translate'], np.degrees(cache['rotate']),
+                            cache['scale'], objects, cache['source']),
+                            scatter_grp)
+                    cmds.hide(objects)
+            if self.output_mode != 'instancer':
+                for done in undo_off_steps(self.cache_instance_steps(
+                        cache, objects, [])):
+                    yield float(done) / cache['count']
+                with UndoOff():
+                    cmds.delete(objects)
+        except BaseException:
+            if scatter_grp is not None:
+                with UndoOff():
+                    cmds.delete(scatter_grp)
+            raise
+        cmds.undoInfo(openChunk=True, chunkName='scatterImport')
+        try:
+            scatter_undo.record_inverse(delete_modifier([scatter_grp]))
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        self.scatter_grp = scatter_grp
+        yield 1.0
+
+    def cache_instance_steps(self, cache, objects, instances, first=0):
+        """instance the cache points in chunks, yielding the count made
+
+        cache holds the translate, rotate, scale and source columns of a
+        cache, or a slice of them numbered from first.
+        """
+        values = np.column_stack((cache['translate'], cache['rotate'],
+                                  cache['scale'])).astype(float)
+        modifier = om.MDGModifier()
+
+        def place(new_instance, index):
+            for plug, value in zip(transform_plugs(new_instance),
+                                   values[index].tolist()):
+                modifier.newPlugValueDouble(plug, value)
+        for done in self.instance_steps(objects, cache['source'],
+                                        len(values), place, instances,
+                                        first):
+            yield done
+        with self.profile('transform'):
+            scatter_undo.apply_modifier(modifier)
+
+    def write_tiles(self, scatter_grp, objects, ids, positions, normals,
+                    choices):
+        """cache the points tile by tile and group each tile, still empty
+
+        The cache file path is kept on the scatter group and the index of
+        each tile in the cache on its group, for tile_load_steps. The
+        cache holds the UUIDs of the objects rather than their names, so
+        renaming or moving the group or its objects keeps the tiles
+        loadable.
+        """
+        with self.profile('frames'):
+            values = self.placement_values(positions, normals, objects,
+                                           choices)
+        with self.profile('tiles'):
+            keys, order, starts = core.tile_table(positions, self.tile_size)
+            tiles = np.column_stack((keys, starts[:-1], starts[1:]))
+            path = tile_cache_path(scatter_grp)
+            self.watch_scene()
+            scatter_cache.write_cache(path, ids[order], values[order],
+                                      choices[order], node_uuids(objects),
+                                      self.settings(), tiles.tolist())
+            cmds.addAttr(scatter_grp, ln='scatterCache', dt='string')
+            cmds.setAttr(scatter_grp + '.scatterCache', path, type='string')
+            for index in range(len(tiles)):
+                tile_grp = cmds.group(em=True, n='scatter_tile',
+                                      parent=scatter_grp)
+                cmds.addAttr(tile_grp, ln='scatterTile', at='long')
+                cmds.setAttr(tile_grp + '.scatterTile', index)
+
+    def placement_values(self, positions, normals, objects, choices):
+        """(n, 9) values of instances placed as Scatter Object places them
+
+        Facing the normal, an instance takes the normal frame at unit
+        scale, as object_normal_steps sets its matrix. Otherwise it keeps
+        the rotation and scale of the object in objects[choices] it is an
+        instance of, as object_y_steps only moves it.
+        """
+        values = np.zeros((len(positions), 9))
+        values[:, 0:3] = positions
+        if self.normal_bool:
+            values[:, 3:6] = np.radians(core.matrix_rotations(
+                core.normal_matrices(positions, normals)))
+            values[:, 6:9] = 1.0
+        else:
+            object_values = np.array(
+                [[plug.asDouble() for plug in transform_plugs(obj)]
+                 for obj in objects], dtype=float).reshape(-1, 9)
+            values[:, 3:9] = object_values[choices, 3:9]
+        return values
+
+    def load_tiles_steps(self, scatter_grps, region=None):
+        """instance deferred tiles in chunks, yielding progress 0-1
+
+        Loads the still empty tiles of the tiled scatter groups that
+        overlap the region bounding box, or all of them without a region.
+        Closing the generator before it finishes keeps the tiles loaded so
+        far and drops the one being loaded.
+        """
+        return self.profiled_steps('load_tiles', self.load_tiles_chunks(
+            scatter_grps, region))
+
+    def load_tiles_chunks(self, scatter_grps, region):
+        """the load_tiles_steps work, without the profiling around it
+
+        Tiles load with undo off, and the instances loaded, cancelled or
+        not, are recorded as one undo step once the loading stops.
+        """
+        loaded = []
+        try:
+            for index, scatter_grp in enumerate(scatter_grps):
+                for progress in undo_off_steps(self.tile_load_steps(
+                        scatter_grp, region, loaded)):
+                    yield (index + progress) / len(scatter_grps)
+        finally:
+            if loaded:
+                cmds.undoInfo(openChunk=True, chunkName='scatterLoadTiles')
+                try:
+                    scatter_undo.record_inverse(delete_modifier(
+                        uuid_paths(loaded).values()))
+                finally:
+                    cmds.undoInfo(closeChunk=True)
+        yield 1.0
+
+    def tile_load_steps(self, scatter_grp, region, loaded=None):
+        """instance the empty tiles of a scatter group overlapping region
+
+        The UUIDs of the instances of each tile loaded are added to
+        loaded when it is given.
+        """
+        with self.profile('read'):
+            cache = scatter_cache.read_cache(
+                cmds.getAttr(scatter_grp + '.scatterCache'))
+        objects = tile_sources(cache)
+        tiles = np.array(cache['tiles'], dtype=np.int64).reshape(-1, 4)
+        if region is None:
+            in_region = np.ones(len(tiles), dtype=bool)
+        else:
+            in_region = core.tiles_in_region(tiles[:, :2],
+                                             cache['params']['tile_size'],
+                                             region)
+        pending = [(index, tile_grp) for index, tile_grp
+                   in tile_groups(scatter_grp)
+                   if in_region[index] and
+                   not cmds.listRelatives(tile_grp, children=True)]
+        total = max(1, sum(tiles[index, 3] - tiles[index, 2]
+                           for index, tile_grp in pending))
+        done = 0
+        for index, tile_grp in pending:
+            start, end = tiles[index, 2:].tolist()
+            tile = dict((name, cache[name][start:end]) for name
+                        in ('translate', 'rotate', 'scale', 'source'))
+            instances = []
+            try:
+                for count in self.cache_instance_steps(
+                        tile, objects, instances, start):
+                    yield float(done + count) / total
+                instances = cmds.parent(instances, tile_grp)
+                cmds.showHidden(instances)
+            except BaseException:
+                if instances:
+                    cmds.delete(instances)
+                raise
+            if loaded is not None:
+                loaded.extend(node_uuids(instances))
+            done += end - start
+        yield 1.0
+
+    def clear_layout_output(self, layout):
+        """delete the instances or instancer of a layout"""
+        delete_uuids(list(layout['instances'].values()) +
+                     (layout['particle'] or []))
+        layout['instances'] = {}
+        layout['plugs'] = {}
+        layout['particle'] = None
+        if 'values' in layout:
+            layout['values'][:] = np.nan
 
     def scatter_rotate_obj(self):
         """Scatter the object with randomize rotation offset"""
-        obj_list = cmds.ls(dag=1, sl=True)
-        for obj in obj_list:
-            rand_rot_x = random.uniform(self.rot_min_x,
-                                        self.rot_max_x)
-            rand_rot_y = random.uniform(self.rot_min_y,
-                                        self.rot_max_y)
-            rand_rot_z = random.uniform(self.rot_min_z,
-                                        self.rot_max_z)
-            cmds.rotate(rand_rot_x,
-                        rand_rot_y,
-                        rand_rot_z,
-                        obj, relative=True, objectSpace=True, ocp=True)
+        self.scatter_transform_obj(scale=False, height=False)
 
     def scatter_scale_obj(self):
         """Scatter the object with randomize scale"""
-        obj_list = cmds.ls(fl=True, dag=1, sl=True)
-        for obj in obj_list:
-            rand_scl_x = random.uniform(self.scl_min_x,
-                                        self.scl_max_x)
-            rand_scl_y = random.uniform(self.scl_min_y,
-                                        self.scl_max_y)
-            rand_scl_z = random.uniform(self.scl_min_z,
-                                        self.scl_max_z)
-            cmds.scale(rand_scl_x,
-                       rand_scl_y,
-                       rand_scl_z,
-                       obj, relative=True)
+        self.scatter_transform_obj(rotate=False, height=False)
 
     def scatter_height_obj(self):
         """Scatter the object with ramdomize height relative to normal"""
-        obj_list = cmds.ls(selection=True)
-        for obj in obj_list:
-            rnd_height = random.uniform(self.min_height_value,
-                                         self.max_height_value)
-            cmds.xform(obj, translation=[0.0, rnd_height, 0.0],
-                       objectSpace=True, relative=True)
-
-    def object_instance_rename(self):
-        """rename instances in the group"""
-        ls_obj_inst = cmds.ls('obj_inst*')
-        scatter_grp = cmds.group(em=True, n='scatter_grp')
-        cmds.parent('obj_inst*', scatter_grp)
-        for obj in ls_obj_inst:
-            cmds.rename(obj, "group_" + "inst_obj" +
-                        str(ls_obj_inst.index(obj)))
-
-    def object_y(self, den_list, object_to_instance):
+        self.scatter_transform_obj(rotate=False, scale=False)
+
+    def scatter_transform_obj(self, rotate=True, scale=True, height=True):
+        """Randomize rotation, scale and height of the selection at once
+
+        All random values are drawn up front and every plug is written by
+        a single MDGModifier, which undoes as one step. Rotation is applied
+        in object space, scale multiplies the current scale and the height
+        offset moves along the rotated local Y axis. With a snap_mode the
+        height offset starts from where a ray hits snap_mesh instead.
+        """
+        plugs, values, parent_matrices = get_transform_plugs(
+            cmds.ls(selection=True, dag=True, type='transform', long=True))
+        obj_count = len(plugs)
+        if not obj_count:
+            return
+        translations = values[:, 0:3]
+        rotations = np.degrees(values[:, 3:6])
+        scales = values[:, 6:9]
+
+        # the n-th object of the selection is point id n
+        draws = core.point_random(
+            core.derived_seed(self.seed, self.randomize_count),
+            np.arange(obj_count), core.TRANSFORM_STREAM, 7)
+        self.randomize_count += 1
+
+        rot_matrices = core.euler_matrices(rotations)
+        if rotate:
+            rnd_rot = core.lerp(
+                (self.rot_min_x, self.rot_min_y, self.rot_min_z),
+                (self.rot_max_x, self.rot_max_y, self.rot_max_z),
+                draws[:, 0:3])
+            rot_matrices = np.matmul(core.euler_matrices(rnd_rot),
+                                     rot_matrices)
+            rotations = core.matrix_rotations(rot_matrices)
+        if scale:
+            scales = scales * core.lerp(
+                (self.scl_min_x, self.scl_min_y, self.scl_min_z),
+                (self.scl_max_x, self.scl_max_y, self.scl_max_z),
+                draws[:, 3:6])
+        if height:
+            rnd_height = core.lerp(self.min_height_value,
+                                   self.max_height_value, draws[:, 6])
+            if self.snap_mode != 'off' and self.snap_mesh:
+                translations = self.snap_translations(
+                    translations, rot_matrices, parent_matrices)
+            translations = (translations +
+                            rnd_height[:, np.newaxis] * rot_matrices[:, 1])
+
+        values = np.column_stack((translations, np.radians(rotations),
+                                  scales))
+        modifier = om.MDGModifier()
+        for obj_plugs, obj_values in zip(plugs, values.tolist()):
+            for plug, value in zip(obj_plugs, obj_values):
+                modifier.newPlugValueDouble(plug, value)
+        scatter_undo.apply_modifier(modifier)
+
+    def snap_translations(self, translations, rot_matrices,
+                          parent_matrices):
+        """Return translations moved to where rays hit snap_mesh
+
+        Rays start at each object's world position and run along world
+        -Y, or along the object's rotated local -Y with snap_mode normal.
+        Objects whose ray misses keep their translation.
+        """
+        points = np.column_stack((translations,
+                                  np.ones(len(translations))))
+        world_points = np.einsum('ni,nij->nj', points, parent_matrices)
+        if self.snap_mode == 'normal':
+            directions = -np.einsum('ni,nij->nj', rot_matrices[:, 1],
+                                    parent_matrices[:, :3, :3])
+        else:
+            directions = np.tile(-core.UP_VECTOR, (len(points), 1))
+        hits, hit_points = mesh_ray_hits(self.snap_mesh,
+                                         world_points[:, :3], directions)
+        local_points = np.einsum(
+            'ni,nij->nj', np.column_stack((hit_points, points[:, 3])),
+            np.linalg.inv(parent_matrices))
+        return np.where(hits[:, np.newaxis], local_points[:, :3],
+                        translations)
+
+    def target_meshes(self, vert_list, density_maps=None):
+        """scatter_core mesh dicts of the targets, for sample_points
+
+        vert_list holds compact vertex ranges and whole meshes. Vertex
+        sampling takes the world points and normals of each mesh and its
+        selected vertex ranges, surface sampling the cached surface_table
+        of each whole mesh. density_maps, from target_density_maps, are
+        added in the same mesh order.
+        """
+        with self.profile('query'):
+            if self.surface_bool:
+                meshes = [dict(zip(('points', 'triangles', 'cdf'),
+                                   self.surface_table(mesh)))
+                          for mesh in selected_meshes(vert_list)]
+            else:
+                meshes = [{'points': get_mesh_point_array(mesh),
+                           'normals': get_mesh_normal_array(mesh),
+                           'ranges': ranges}
+                          for mesh, ranges
+                          in selection_vertex_ranges(vert_list)]
+        for mesh, density_map in zip(meshes, density_maps or []):
+            mesh['density_map'] = density_map
+        return meshes
+
+    def sample_points(self, meshes, density, cull=True):
+        """Return point ids and (n, 3) positions and normals to scatter on
+
+        The target_meshes are sampled by scatter_core.sample_points at
+        the density, the same code the headless scatter_transforms runs,
+        and with cull the cull_camera culls them in the same keep test.
+        """
+        camera = (get_camera(self.cull_camera)
+                  if cull and self.cull_camera else None)
+        with self.profile('sample'):
+            return core.sample_points(meshes, self.settings(), camera,
+                                      density)
+
+    def unblocked(self, sources, ids, positions, scales=None):
+        """Return a mask of the points whose instances clear the blockers
+
+        Each point's instance is bounded by a box reaching the bounding
+        radius of its source around the point, times its largest scale
+        axis when scales are given, so the test holds at any rotation.
+        All boxes are tested against the blocker_index in one batch.
+        """
+        if not self.blockers or not len(ids):
+            return np.ones(len(ids), dtype=bool)
+        with self.profile('block'):
+            index = self.blocker_index()
+            radii = np.array([source_radius(source) for source in sources])
+            radii = radii[self.source_choices(ids, len(sources))]
+            if scales is not None:
+                radii = radii * np.abs(scales).max(axis=1)
+            return ~core.boxes_blocked(index,
+                                       core.radius_boxes(positions, radii))
+
+    def blocker_index(self):
+        """box_index of the blocker boxes, rebuilt when any box changes"""
+        tables = [self.blocker_table(blocker) for blocker
+                  in cmds.ls(self.blockers, long=True)]
+        digests = tuple(digest for digest, boxes in tables)
+        if self.blocker_grid is None or self.blocker_grid[0] != digests:
+            boxes = np.concatenate([boxes for digest, boxes in tables] +
+                                   [np.empty((0, 6))])
+            self.blocker_grid = (digests, core.box_index(boxes))
+        return self.blocker_grid[1]
+
+    def blocker_table(self, blocker):
+        """(digest, (n, 6) world boxes) of a blocker mesh or group
+
+        A mesh blocks with its triangles, whose boxes are cached until
+        its points or topology change. A tiled scatter blocks with a box
+        per instance read from its cache file, loaded or not. Any other
+        group blocks with the shown children it holds, see
+        group_blocker_table.
+        """
+        if cmds.listRelatives(blocker, shapes=True, type='mesh',
+                              noIntermediate=True):
+            digest = self.mesh_digest(blocker)
+            cached = self.blocker_tables.get(blocker)
+            if cached is None or cached[0] != digest:
+                cached = (digest, core.triangle_boxes(
+                    get_mesh_point_array(blocker),
+                    get_mesh_triangles(blocker)))
+                self.blocker_tables[blocker] = cached
+            return cached
+        if cmds.attributeQuery('scatterCache', node=blocker, exists=True):
+            return self.tile_blocker_table(blocker)
+        return self.group_blocker_table(blocker)
+
+    def group_blocker_table(self, group):
+        """(digest, boxes) of the shown children of a blocker group
+
+        Hidden and template children, such as the hidden sources of a
+        scatter group, are left out. A particle child blocks with a box
+        per particle read from its arrays, and the instancer drawing it
+        adds nothing of its own. Tiled scatters in the group block with
+        their cached instances. Every other child blocks with its world
+        bounding box. Those boxes are cached until the children or their
+        joint bounds change, so a preview pass or re-scatter reads their
+        joint bounds once rather than the bounds of each child.
+        """
+        children = shown_children(group)
+        tables = []
+        others = []
+        for child in children:
+            if cmds.listRelatives(child, shapes=True, type='particle'):
+                tables.append(particle_blocker_table(child))
+            elif cmds.attributeQuery('scatterCache', node=child,
+                                     exists=True):
+                tables.append(self.tile_blocker_table(child))
+            elif cmds.objectType(child) != 'instancer':
+                others.append(child)
+        if others:
+            key = (tuple(others),
+                   tuple(cmds.exactWorldBoundingBox(*others)))
+            cached = self.blocker_tables.get(group)
+            if cached is None or cached[0] != key:
+                boxes = np.array([cmds.exactWorldBoundingBox(child)
+                                  for child in others],
+                                 dtype=float).reshape(-1, 6)
+                cached = (key, boxes)
+                self.blocker_tables[group] = cached
+            tables.append(cached)
+        return (tuple(digest for digest, boxes in tables),
+                np.concatenate([boxes for digest, boxes in tables] +
+                               [np.empty((0, 6))]))
+
+    def tile_blocker_table(self, scatter_grp):
+        """(digest, boxes) of every instance of a tiled scatter
+
+        The boxes come from the cache file's columns and are cached
+        until the file changes.
+        """
+        path = cmds.getAttr(scatter_grp + '.scatterCache')
+        key = (path, os.path.getmtime(path))
+        cached = self.blocker_tables.get(scatter_grp)
+        if cached is None or cached[0] != key:
+            cache = scatter_cache.read_cache(path)
+            radii = np.array([source_radius(source) for source
+                              in tile_sources(cache)])
+            cached = (key, instance_boxes(cache['translate'],
+                                          cache['scale'], radii,
+                                          cache['source']))
+            self.blocker_tables[scatter_grp] = cached
+        return cached
+
+    def target_density_maps(self, vert_list):
+        """density map of each target mesh, None without a density map
+
+        A texture that cannot be read is warned about by
+        density_map_table, and the scatter goes on without the map.
+        """
+        if self.density_map_type == 'none' or not self.density_map:
+            return None
+        tables = []
+        for mesh in selected_meshes(vert_list):
+            table = self.density_map_table(mesh)
+            if table is None:
+                return None
+            tables.append(table)
+        return tables
+
+    def density_map_table(self, mesh):
+        """density map dict of the mesh, see scatter_core.vertex_map_density
+
+        A texture is read once per file and cached until the file's
+        modification time or size changes, and its UV lookup tables once
+        per mesh topology. Painted colors carry no cheap change stamp, so
+        a color set is read again each time, in one API call. Warns and
+        returns None when the texture file does not exist.
+        """
+        if self.density_map_type == 'color_set':
+            return {'vertex': get_vertex_color_density(mesh,
+                                                       self.density_map)}
+        path = self.density_map
+        if not os.path.isfile(path):
+            cmds.warning('Scatter: density map texture %s not found, '
+                         'scattering without it' % path)
+            return None
+        image_stamp = (os.path.getmtime(path), os.path.getsize(path))
+        cached = self.density_map_tables.get(path)
+        if cached is None or cached[0] != image_stamp:
+            cached = (image_stamp, read_density_image(path))
+            self.density_map_tables[path] = cached
+        image = cached[1]
+        uv_stamp = mesh_counts(mesh)
+        cached = self.density_map_tables.get(mesh)
+        if cached is None or cached[0] != uv_stamp:
+            cached = (uv_stamp, get_mesh_uv_tables(mesh))
+            self.density_map_tables[mesh] = cached
+        return dict(cached[1], image=image)
+
+    def surface_points(self, meshes, ids):
+        """area weighted points of the surface point ids over the meshes"""
+        return core.mesh_surface_samples(
+            [self.surface_table(mesh) for mesh in meshes], ids, self.seed)
+
+    def surface_table(self, mesh):
+        """cached points, triangles and cumulative area table of the mesh"""
+        digest = self.mesh_digest(mesh)
+        cached = self.surface_tables.get(mesh)
+        if cached is None or cached[0] != digest:
+            points = get_mesh_point_array(mesh)
+            triangles = get_mesh_triangles(mesh)
+            cached = (digest, (points, triangles,
+                               core.triangle_cdf(points, triangles)))
+            self.surface_tables[mesh] = cached
+        return cached[1]
+
+    def mesh_digest(self, mesh):
+        """mesh_hash of the mesh, reading its points only when it changed
+
+        The last hash is reused while the mesh_fingerprint matches and no
+        node dirty callback has fired on its shape since. The callback
+        catches edits inside the bounds.
+        """
+        fingerprint = mesh_fingerprint(mesh)
+        cached = self.mesh_hashes.get(mesh)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        if mesh not in self.mesh_callbacks:
+            dag_path = get_dag_path(mesh)
+            dag_path.extendToShape()
+            self.mesh_callbacks[mesh] = \
+                om.MNodeMessage.addNodeDirtyCallback(
+                    dag_path.node(), self.mesh_dirty, mesh)
+            self.watch_scene()
+        digest = mesh_hash(mesh)
+        self.mesh_hashes[mesh] = (fingerprint, digest)
+        return digest
+
+    def mesh_dirty(self, node, mesh):
+        self.mesh_hashes.pop(mesh, None)
+
+    def forget_meshes(self):
+        """Drop the mesh hashes and remove their dirty callbacks"""
+        for callback_id in self.mesh_callbacks.values():
+            try:
+                om.MMessage.removeCallback(callback_id)
+            except RuntimeError:
+                # already removed along with its node
+                pass
+        self.mesh_callbacks = {}
+        self.mesh_hashes = {}
+
+    def watch_scene(self):
+        """call scene_closing before a new scene is made or opened"""
+        if not self.scene_callbacks:
+            self.scene_callbacks = [
+                om.MSceneMessage.addCallback(message, self.scene_closing)
+                for message in (om.MSceneMessage.kBeforeNew,
+                                om.MSceneMessage.kBeforeOpen)]
+
+    def scene_closing(self, client_data=None):
+        """Forget everything tied to the nodes of the closing scene"""
+        self.forget_meshes()
+        # tiled scatter tables hold the boxes read from the closing
+        # scene's tile caches
+        self.blocker_tables = {}
+        for bound in list(self.bound_scatters):
+            self.drop_bound_scatter(bound)
+
+    def object_y(self, positions, object_to_instance):
         """scatter inst face up"""
-        for vert in den_list:
-            vertex_pos = cmds.xform(vert, q=True, ws=True,
-                                    t=True)
-            new_instance = cmds.instance(object_to_instance, n='obj_inst')
-            cmds.move(vertex_pos[0], vertex_pos[1], vertex_pos[2],
-                      new_instance)
-
-    def object_normal(self, den_list, object_to_instance):
+        instances = []
+        for done in self.object_y_steps(positions, [object_to_instance],
+                                        instances):
+            pass
+        return instances
+
+    def object_y_steps(self, positions, objects, instances, choices=None):
+        """scatter inst face up in chunks, yielding the count made"""
+        rows = scatter_pipeline.BatchPipeline(
+            lambda start, end: positions[start:end], len(positions),
+            self.profile)
+
+        def place(new_instance, index):
+            row = rows.row(index)
+            cmds.move(row[0], row[1], row[2], new_instance)
+        try:
+            for done in self.instance_steps(objects, choices, len(positions),
+                                            place, instances):
+                yield done
+        finally:
+            rows.close()
+
+    def instance_steps(self, objects, choices, count, place, instances,
+                       first=0):
+        """instance count times in chunks of about CHUNK_SECONDS each
+
+        Instance number i copies objects[choices[i]], or objects[0]
+        without choices, and is named from first + i. The chunk size
+        follows the measured cost per instance, and the number made so
+        far is yielded after every chunk.
+        """
+        if choices is None:
+            sources = [objects[0]] * count
+        else:
+            sources = [objects[choice] for choice in choices.tolist()]
+        chunk_size = 16
+        index = 0
+        while index < count:
+            chunk_end = min(count, index + chunk_size)
+            chunk_indices = range(index, chunk_end)
+            start_time = time.time()
+            with self.profile('instance', len(chunk_indices)):
+                new_instances = [
+                    cmds.instance(sources[inst_index],
+                                  n=instance_name(first + inst_index))[0]
+                    for inst_index in chunk_indices]
+            instances.extend(new_instances)
+            with self.profile('transform', len(chunk_indices)):
+                for inst_index, new_instance in zip(chunk_indices,
+                                                    new_instances):
+                    place(new_instance, inst_index)
+            inst_cost = (time.time() - start_time) / (chunk_end - index)
+            chunk_size = max(1, int(CHUNK_SECONDS / max(inst_cost, 1e-7)))
+            index = chunk_end
+            yield index
+
+    def vertex_positions(self, mesh_ids):
+        """world space positions of the vertices, one getPoints per mesh"""
+        return np.concatenate([get_mesh_point_array(mesh)[ids]
+                               for mesh, ids in mesh_ids] +
+                              [np.empty((0, 3))])
+
+    def vertex_normals(self, mesh_ids):
+        """world space normals of the vertices, one query per mesh"""
+        return np.concatenate([get_mesh_normal_array(mesh)[ids]
+                               for mesh, ids in mesh_ids] +
+                              [np.empty((0, 3))])
+
+    def object_normal(self, positions, normals, object_to_instance):
         """scatter inst face normal"""
-        for vert in den_list:
-            mesh_vert = pm.MeshVertex(vert)
-            vert_normal = mesh_vert.getNormal()
-            up_vector = pm.dt.Vector(0.0, 1.0, 0.0)
-            tangent = vert_normal.cross(up_vector).normal()
-            tangent2 = vert_normal.cross(tangent).normal()
-            pos = cmds.xform([vert], q=True, ws=True, t=True)
-
-            matrix_trans = [tangent2.x, tangent2.y, tangent2.z, 0.0,
-                            vert_normal.x, vert_normal.y, vert_normal.z,
-                            0.0,
-                            tangent.x, tangent.y, tangent.z, 0.0,
-                            pos[0], pos[1], pos[2], 1.0]
-
-            new_instance = cmds.instance(object_to_instance, n='obj_inst')
-            cmds.xform(new_instance, ws=True, matrix=matrix_trans)
+        instances = []
+        for done in self.object_normal_steps(positions, normals,
+                                             [object_to_instance], instances):
+            pass
+        return instances
+
+    def object_normal_steps(self, positions, normals, objects, instances,
+                            choices=None):
+        """scatter inst face normal in chunks, yielding the count made
+
+        The frames of later points are computed on a worker thread while
+        the earlier points are instanced.
+        """
+        matrices = scatter_pipeline.BatchPipeline(
+            lambda start, end: core.normal_matrices(
+                positions[start:end], normals[start:end]).reshape(-1, 16),
+            len(positions), self.profile)
+
+        def place(new_instance, index):
+            cmds.xform(new_instance, ws=True, matrix=matrices.row(index))
+        try:
+            for done in self.instance_steps(objects, choices, len(positions),
+                                            place, instances):
+                yield done
+        finally:
+            matrices.close()
+
+    def object_instancer(self, positions, normals, objects, choices):
+        """scatter inst as one particle instancer with per point arrays"""
+        with self.profile('frames'):
+            if self.normal_bool:
+                rotations = core.matrix_rotations(
+                    core.normal_matrices(positions, normals))
+            else:
+                rotations = np.zeros_like(positions)
+        with self.profile('instancer'):
+            return self.particle_instancer(positions, rotations,
+                                           np.ones_like(positions),
+                                           objects, choices)
+
+    def bound_instancer(self, targets, ids, objects, choices):
+        """particle instancer whose points follow the deforming targets
+
+        Each point is bound once to the corners and barycentric weights
+        of the triangle it was sampled on, or to its vertex. On every
+        time change all points are evaluated from the deformed mesh
+        points, one vectorized pass per mesh, and written as particle
+        arrays, with nothing evaluated per instance.
+        """
+        meshes = selected_meshes(targets)
+        with self.profile('bind'):
+            if self.surface_bool:
+                mesh_index, corners, weights = core.surface_binding(
+                    [self.surface_table(mesh) for mesh in meshes], ids,
+                    self.seed)
+            else:
+                mesh_index, corners, weights = core.vertex_binding(ids)
+        vertex_normals = self.normal_bool and not self.surface_bool
+        bound = {'meshes': [(mesh, np.flatnonzero(mesh_index == index),
+                             get_mesh_triangles(mesh) if vertex_normals
+                             else None)
+                            for index, mesh in enumerate(meshes)],
+                 'corners': corners, 'weights': weights,
+                 'surface': self.surface_bool,
+                 'normal_bool': self.normal_bool}
+        positions, rotations = self.bound_values(bound)
+        with self.profile('instancer'):
+            particle, instancer = self.particle_instancer(
+                positions, rotations, np.ones_like(positions), objects,
+                choices)
+        bound['particle'] = particle
+        bound['shape'] = cmds.listRelatives(particle, shapes=True,
+                                            fullPath=True)[0]
+        bound['removal_callback'] = \
+            om.MNodeMessage.addNodePreRemovalCallback(
+                get_dag_path(bound['shape']).node(), self.bound_removed,
+                bound)
+        self.bound_scatters.append(bound)
+        self.follow_time()
+        return particle, instancer
+
+    def bound_values(self, bound):
+        """positions and rotations in degrees of a bound scatter's points"""
+        count = len(bound['corners'])
+        positions = np.zeros((count, 3))
+        normals = np.tile(core.UP_VECTOR, (count, 1))
+        for mesh, rows, triangles in bound['meshes']:
+            if not len(rows):
+                continue
+            points = get_mesh_point_array(mesh)
+            corners = bound['corners'][rows]
+            positions[rows] = core.bound_points(points, corners,
+                                                bound['weights'][rows])
+            if not bound['normal_bool']:
+                continue
+            if bound['surface']:
+                normals[rows] = core.face_normals(points, corners)
+            else:
+                normals[rows] = core.vertex_normals(
+                    points, triangles)[corners[:, 0]]
+        if not bound['normal_bool']:
+            return positions, np.zeros_like(positions)
+        return positions, core.matrix_rotations(
+            core.normal_matrices(positions, normals))
+
+    def update_bound_scatters(self):
+        """Move every bound scatter onto its deformed meshes, no undo"""
+        with UndoOff():
+            for bound in self.bound_scatters:
+                positions, rotations = self.bound_values(bound)
+                set_particle_array(bound['shape'], 'position', positions,
+                                   'vectorArray')
+                if bound['normal_bool']:
+                    set_particle_array(bound['shape'], 'rotationPP',
+                                       rotations, 'vectorArray')
+
+    def bound_removed(self, node, bound):
+        self.drop_bound_scatter(bound)
+
+    def drop_bound_scatter(self, bound):
+        """Stop updating a bound scatter, and following time without any
+
+        Run as its particles are deleted, by a re-scatter, Update Scatter
+        or the user, and for every bound scatter as the scene closes.
+        """
+        om.MMessage.removeCallback(bound['removal_callback'])
+        self.bound_scatters = [other for other in self.bound_scatters
+                               if other is not bound]
+        if not self.bound_scatters:
+            self.stop_following_time()
+
+    def follow_time(self):
+        """update the bound scatters on every time change"""
+        if self.time_callback is None:
+            self.time_callback = om.MDGMessage.addTimeChangeCallback(
+                self.time_changed)
+            self.watch_scene()
+
+    def time_changed(self, current_time, client_data):
+        self.update_bound_scatters()
+
+    def stop_following_time(self):
+        """Stop updating bound scatters on time changes"""
+        if self.time_callback is not None:
+            om.MMessage.removeCallback(self.time_callback)
+            self.time_callback = None
+
+    def particle_instancer(self, positions, rotations, scales, objects,
+                           choices):
+        """one particle instancer from per point arrays, rotations in deg
+
+        Particle i instances objects[choices[i]]. The arrays go to the
+        particles as API arrays copied straight from their buffers, so
+        memory-mapped cache columns never become Python lists.
+        """
+        particle = cmds.particle(n='scatter_particle')
+        particle_shape = particle[1]
+        omfx.MFnParticleSystem(get_dag_path(particle_shape)).emit(
+            api_array(np.column_stack((positions, np.ones(len(positions)))),
+                      4))
+        cmds.setAttr(particle_shape + '.isDynamic', False)
+        set_particle_array(particle_shape, 'rotationPP', rotations,
+                           'vectorArray')
+        set_particle_array(particle_shape, 'scalePP', scales, 'vectorArray')
+        set_particle_array(particle_shape, 'sourcePP', choices, 'doubleArray')
+        instancer = cmds.particleInstancer(particle_shape, addObject=True,
+                                           object=list(objects),
+                                           position='worldPosition',
+                                           rotation='rotationPP',
+                                           scale='scalePP',
+                                           objectIndex='sourcePP')
+        cmds.saveInitialState(particle_shape)
+        return particle[0], instancer
+
+
+def undo_off_steps(steps):
+    """yield the values of a generator, running each step with undo off
+
+    Nothing is added to the undo queue, or left open in it, while other
+    code runs between steps. Closing closes steps with undo off too.
+    """
+    try:
+        while True:
+            with UndoOff():
+                try:
+                    value = next(steps)
+                except StopIteration:
+                    return
+            yield value
+    finally:
+        with UndoOff():
+            steps.close()
+
+
+def instance_sources(sources, scatter_grp):
+    """Return an instance of each source, made in scatter_grp"""
+    return [cmds.parent(cmds.instance(source)[0], scatter_grp)[0]
+            for source in sources]
+
+
+def tile_cache_path(scatter_grp):
+    """Return the tile cache file of a scatter group, next to the scene
+
+    The file is named by the group's UUID, so no other scatter, in this
+    scene or another one saved at the same path, can pick up its tiles.
+    Returns None for a scene not saved yet.
+    """
+    scene = cmds.file(query=True, sceneName=True)
+    if not scene:
+        return None
+    return '%s_%s.scache' % (os.path.splitext(scene)[0],
+                             node_uuids(scatter_grp)[0])
+
+
+def tile_sources(cache):
+    """Return the full paths of the objects a tile cache instances
+
+    write_tiles keeps them by UUID. Raises ValueError if any is gone.
+    """
+    paths = uuid_paths(cache['sources'])
+    missing = [uuid for uuid in cache['sources'] if uuid not in paths]
+    if missing:
+        raise ValueError('missing scatter cache sources: ' +
+                         ', '.join(missing))
+    return [paths[uuid] for uuid in cache['sources']]
+
+
+def shown_children(node):
+    """Return the child transforms of a node that are neither hidden
+    nor template, by full path"""
+    children = cmds.listRelatives(node, children=True, type='transform',
+                                  fullPath=True) or []
+    if not children:
+        return []
+    hidden = set(cmds.ls(children, templated=True, long=True) or [])
+    return [child for child
+            in cmds.ls(children, visible=True, long=True) or []
+            if child not in hidden]
+
+
+def particle_blocker_table(particle):
+    """(digest, boxes) of the instances a particle instancer draws
+
+    One box per particle, from its world position, scalePP and the
+    bounding radius of the object its sourcePP picks.
+    """
+    shape = cmds.listRelatives(particle, shapes=True, type='particle',
+                               fullPath=True)[0]
+    particles = omfx.MFnParticleSystem(get_dag_path(shape))
+    positions = om.MVectorArray()
+    particles.position(positions)
+    scales = om.MVectorArray()
+    particles.getPerParticleAttribute('scalePP', scales)
+    choices = om.MDoubleArray()
+    particles.getPerParticleAttribute('sourcePP', choices)
+    instancer = cmds.listConnections(shape, type='instancer')[0]
+    objects = cmds.particleInstancer(shape, query=True, name=instancer,
+                                     object=True)
+    boxes = instance_boxes(array_values(positions, 3),
+                           array_values(scales, 3),
+                           np.array([source_radius(source)
+                                     for source in objects]),
+                           array_values(choices, 1).astype(np.int64))
+    return boxes_hash(boxes), boxes
+
+
+def instance_boxes(positions, scales, radii, choices):
+    """Return the world boxes of instances of sources with the radii
+
+    Each instance reaches its source's radius times its largest scale
+    axis around its position, see Scatter.unblocked.
+    """
+    return core.radius_boxes(np.asarray(positions, dtype=float),
+                             radii[np.asarray(choices, dtype=np.int64)] *
+                             np.abs(scales).max(axis=1))
+
+
+def tile_groups(scatter_grp):
+    """Return (cache tile index, group) of the tile groups of a scatter"""
+    children = cmds.listRelatives(scatter_grp, children=True,
+                                  type='transform', fullPath=True) or []
+    return [(cmds.getAttr(child + '.scatterTile'), child)
+            for child in children
+            if cmds.attributeQuery('scatterTile', node=child, exists=True)]
+
+
+def tiled_scatters():
+    """Return the tiled scatter groups of the scene"""
+    return cmds.ls('*.scatterCache', objectsOnly=True, long=True) or []
+
+
+def source_shape(source):
+    """Return the UUID of the shape a source transform instances
+
+    Every instance of a shape shares its UUID, unlike its paths.
+    """
+    shapes = cmds.listRelatives(source, shapes=True, fullPath=True)
+    return node_uuids(shapes[:1] if shapes else source)[0]
+
+
+def node_uuids(nodes):
+    """Return the UUIDs of nodes, which hold across renames and moves"""
+    return (cmds.ls(nodes, uuid=True) or []) if nodes else []
+
+
+def uuid_paths(uuids):
+    """Return {uuid: full DAG path} of the uuids' nodes still in the scene
+
+    Deleted nodes drop out of the paths found, so those are paired up
+    with their own UUIDs again. Two ls calls for any number of nodes.
+    """
+    paths = (cmds.ls(list(uuids), long=True) or []) if uuids else []
+    return dict(zip((cmds.ls(paths, uuid=True) or []) if paths else [],
+                    paths))
+
+
+def uuid_path(uuid):
+    """Return the full DAG path of a node UUID, None once it is gone"""
+    return uuid_paths([uuid]).get(uuid) if uuid else None
+
+
+def delete_uuids(uuids):
+    """Delete the nodes of the uuids that are still in the scene"""
+    paths = list(uuid_paths(uuids).values())
+    if paths:
+        cmds.delete(paths)
+
+
+def source_radius(source):
+    """Return the radius of a source's world bounds around its pivot"""
+    bounds = np.reshape(cmds.exactWorldBoundingBox(source), (2, 3))
+    pivot = cmds.xform(source, q=True, ws=True, rp=True)
+    return float(np.linalg.norm(np.abs(bounds - pivot).max(axis=0)))
+
+
+def instance_name(index):
+    """Return the name of the scatter instance number index"""
+    return "group_" + "inst_obj" + str(index)
+
+
+def vertex_targets(vert_list):
+    """Return a selection with its faces, edges and other components as
+    vertices
+
+    Whole meshes and vertex ranges are kept as they are, in place. Any
+    other component is converted by polyListComponentConversion, which
+    keeps the vertices as compact ranges.
+    """
+    targets = []
+    for item in vert_list:
+        if '.' in item and not VERTEX_RE.match(item):
+            targets.extend(cmds.polyListComponentConversion(
+                item, toVertex=True) or [])
+        else:
+            targets.append(item)
+    return targets
+
+
+def selection_vertex_ranges(vert_list):
+    """Return (mesh, ranges) pairs of an unflattened selection
+
+    Each 'mesh.vtx[a:b]' becomes a [start, end) row of an (n, 2) ranges
+    array, so no per vertex string or id is ever built. Whole meshes
+    select all of their vertices.
+    """
+    meshes = []
+    mesh_ranges = {}
+    for item in vert_list:
+        match = VERTEX_RE.match(item)
+        mesh = match.group('mesh') if match else item.split('.')[0]
+        if match and match.group('start'):
+            start = int(match.group('start'))
+            vert_range = (start, int(match.group('end') or start) + 1)
+        else:
+            vert_range = (0, om.MFnMesh(get_dag_path(mesh)).numVertices())
+        if mesh not in mesh_ranges:
+            meshes.append(mesh)
+            mesh_ranges[mesh] = []
+        mesh_ranges[mesh].append(vert_range)
+    return [(mesh, np.array(mesh_ranges[mesh], dtype=np.int64))
+            for mesh in meshes]
+
+
+def delete_modifier(nodes):
+    """Return an MDGModifier deleting the nodes, to record_inverse nodes
+    made with undo off"""
+    modifier = om.MDGModifier()
+    for node in nodes:
+        modifier.deleteNode(get_dag_path(node).node())
+    return modifier
+
+
+def get_dag_path(node):
+    """Return the MDagPath of a node name"""
+    sel_list = om.MSelectionList()
+    sel_list.add(node)
+    dag_path = om.MDagPath()
+    sel_list.getDagPath(0, dag_path)
+    return dag_path
+
+
+def get_camera(camera):
+    """Return the camera_factors dict of a camera transform or shape"""
+    dag_path = get_dag_path(camera)
+    world_matrix = dag_path.inclusiveMatrix()
+    dag_path.extendToShape()
+    camera_fn = om.MFnCamera(dag_path)
+    return {'matrix': [[world_matrix(row, col) for col in range(4)]
+                       for row in range(4)],
+            'fov': (camera_fn.horizontalFieldOfView(),
+                    camera_fn.verticalFieldOfView()),
+            'near': camera_fn.nearClippingPlane(),
+            'far': camera_fn.farClippingPlane()}
+
+
+def get_mesh_points(mesh):
+    """Return all world space points of the mesh in a single API call"""
+    points = om.MPointArray()
+    om.MFnMesh(get_dag_path(mesh)).getPoints(points, om.MSpace.kWorld)
+    return points
+
+
+def get_mesh_point_array(mesh):
+    """Return all world space points of the mesh as an (n, 3) array
+
+    Read by get_mesh_points, in internal units like every other API
+    query here, and copied out of the MPointArray in one memmove.
+    """
+    return array_values(get_mesh_points(mesh), 4)[:, :3]
+
+
+def mesh_counts(mesh):
+    """Return the vertex, polygon and face vertex counts of the mesh"""
+    mesh_fn = om.MFnMesh(get_dag_path(mesh))
+    return (mesh_fn.numVertices(), mesh_fn.numPolygons(),
+            mesh_fn.numFaceVertices())
+
+
+def mesh_fingerprint(mesh):
+    """Return the counts, world matrix and object space bounds of a mesh
+
+    Maya keeps all of them up to date, so they cost the same to read
+    for any size of mesh.
+    """
+    bounds = om.MFnMesh(get_dag_path(mesh)).boundingBox()
+    return (mesh_counts(mesh),
+            tuple(cmds.xform(mesh, q=True, ws=True, matrix=True)),
+            tuple((corner.x, corner.y, corner.z)
+                  for corner in (bounds.min(), bounds.max())))
+
+
+def mesh_hash(mesh, points=None):
+    """Return a digest of the mesh topology counts and world points"""
+    if points is None:
+        points = get_mesh_point_array(mesh)
+    import hashlib
+
+    digest = hashlib.md5(repr(mesh_counts(mesh)).encode('utf-8'))
+    digest.update(np.ascontiguousarray(points).tobytes())
+    return digest.hexdigest()
+
+
+def boxes_hash(boxes):
+    """Return a digest of an array of boxes"""
+    import hashlib
+
+    return hashlib.md5(np.ascontiguousarray(boxes).tobytes()).hexdigest()
+
+
+def get_mesh_triangles(mesh):
+    """Return the (n, 3) vertex ids of the triangulated mesh"""
+    triangle_counts = om.MIntArray()
+    triangle_verts = om.MIntArray()
+    om.MFnMesh(get_dag_path(mesh)).getTriangles(triangle_counts,
+                                                triangle_verts)
+    return int_array(triangle_verts).reshape(-1, 3)
+
+
+def int_array(api_array):
+    """Return an MIntArray as an int64 array, copied in one memmove"""
+    return array_values(api_array, 1, 'Int').astype(np.int64)
+
+
+def float_array(api_array):
+    """Return an MFloatArray as a float64 array, copied in one memmove"""
+    return array_values(api_array, 1, 'Float').astype(float)
+
+
+def get_mesh_uv_tables(mesh):
+    """Return the UV lookup tables of a texture density map of the mesh
+
+    Holds the (k, 2) 'uvs' of the current UV set and the uv ids of every
+    vertex and triangle corner, see scatter_core.triangle_uv_ids.
+    """
+    mesh_fn = om.MFnMesh(get_dag_path(mesh))
+    u_values = om.MFloatArray()
+    v_values = om.MFloatArray()
+    mesh_fn.getUVs(u_values, v_values)
+    uv_counts = om.MIntArray()
+    uv_ids = om.MIntArray()
+    mesh_fn.getAssignedUVs(uv_counts, uv_ids)
+    polygon_counts = om.MIntArray()
+    polygon_vertices = om.MIntArray()
+    mesh_fn.getVertices(polygon_counts, polygon_vertices)
+    triangle_counts = om.MIntArray()
+    triangle_vertices = om.MIntArray()
+    mesh_fn.getTriangles(triangle_counts, triangle_vertices)
+
+    polygon_counts = int_array(polygon_counts)
+    # faces without UVs have no assigned ids, pad them with -1
+    polygon_uv_ids = np.full(polygon_counts.sum(), -1, dtype=np.int64)
+    polygon_uv_ids[np.repeat(int_array(uv_counts) > 0,
+                             polygon_counts)] = int_array(uv_ids)
+    corner_uv_ids, vertex_uv_ids = core.triangle_uv_ids(
+        polygon_counts, int_array(polygon_vertices), polygon_uv_ids,
+        int_array(triangle_counts), int_array(triangle_vertices))
+    uvs = np.column_stack((float_array(u_values), float_array(v_values)))
+    if not len(uvs):
+        uvs = np.zeros((1, 2))
+    return {'uvs': uvs.reshape(-1, 2), 'vertex_uv_ids': vertex_uv_ids,
+            'triangle_uv_ids': corner_uv_ids}
+
+
+def read_density_image(path):
+    """Return the luminance of an image file as an (h, w) 0-1 array"""
+    image = om.MImage()
+    image.readFromFile(path)
+    width_util = om.MScriptUtil()
+    width_ptr = width_util.asUintPtr()
+    height_util = om.MScriptUtil()
+    height_ptr = height_util.asUintPtr()
+    image.getSize(width_ptr, height_ptr)
+    width = om.MScriptUtil.getUint(width_ptr)
+    height = om.MScriptUtil.getUint(height_ptr)
+    import ctypes
+
+    # view the RGBA bytes in place rather than one MScriptUtil call each
+    buffer_type = ctypes.c_ubyte * (width * height * 4)
+    pixels = np.frombuffer(buffer_type.from_address(int(image.pixels())),
+                           dtype=np.uint8).reshape(height, width, 4)
+    return np.dot(pixels[:, :, :3], core.LUMINANCE) / 255.0
+
+
+def get_vertex_color_density(mesh, color_set):
+    """Return the per vertex luminance of a color set, 0 where unpainted"""
+    colors = om.MColorArray()
+    om.MFnMesh(get_dag_path(mesh)).getVertexColors(colors, color_set)
+    values = array_values(colors, 4, 'Float')[:, :3].astype(float)
+    # vertices without a color report -1
+    return np.clip(np.dot(values, core.LUMINANCE), 0.0, 1.0)
+
+
+def selected_meshes(vert_list):
+    """Return the meshes of the selected components and objects in order"""
+    meshes = []
+    for item in vert_list:
+        mesh = item.split('.')[0]
+        if mesh not in meshes:
+            meshes.append(mesh)
+    return meshes
+
+
+def get_mesh_normals(mesh):
+    """Return all world space vertex normals of the mesh in one API call"""
+    normals = om.MFloatVectorArray()
+    om.MFnMesh(get_dag_path(mesh)).getVertexNormals(False, normals,
+                                                    om.MSpace.kWorld)
+    return normals
+
+
+def get_mesh_normal_array(mesh):
+    """Return all world space vertex normals of the mesh as (n, 3) doubles
+
+    Read by get_mesh_normals and copied out of the MFloatVectorArray in
+    one memmove.
+    """
+    return array_values(get_mesh_normals(mesh), 3, 'Float').astype(float)
+
+
+def set_particle_array(particle_shape, attr, values, data_type):
+    """Set a per particle array attribute and its initial state"""
+    particles = omfx.MFnParticleSystem(get_dag_path(particle_shape))
+    array = api_array(values, 3 if data_type == 'vectorArray' else 1)
+    for name in (attr, attr + '0'):
+        if not cmds.attributeQuery(name, node=particle_shape, exists=True):
+            cmds.addAttr(particle_shape, ln=name, dt=data_type)
+        particles.setPerParticleAttribute(name, array)
+
+
+def api_array(values, width):
+    """Return (n, width) values as an API array, copied in one memmove
+
+    Widths 1, 3 and 4 give an MDoubleArray, MVectorArray and MPointArray.
+    The doubles are laid out in a script_buffer the array is built from.
+    """
+    import ctypes
+
+    array_type = {1: om.MDoubleArray, 3: om.MVectorArray,
+                  4: om.MPointArray}[width]
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    count = len(values)
+    if not count:
+        return array_type()
+    util, buffer_ptr = script_buffer(values.size, width)
+    ctypes.memmove(int(buffer_ptr), values.ctypes.data, values.nbytes)
+    return array_type(buffer_ptr, count)
+
+
+def array_values(array, width, kind='Double'):
+    """Return an API array as (n, width) values, (n,) for width 1
+
+    The inverse of api_array: the array copies itself into a
+    script_buffer with get(), which is read back in one memmove. kind
+    is the element type of the array, Double, Float or Int, and sets the
+    dtype of the values.
+    """
+    import ctypes
+
+    values = np.zeros((array.length(), width), dtype=BUFFER_DTYPES[kind])
+    values = values.reshape((-1,) if width == 1 else (-1, width))
+    if len(values):
+        util, buffer_ptr = script_buffer(values.size, width, kind)
+        array.get(buffer_ptr)
+        ctypes.memmove(values.ctypes.data, int(buffer_ptr), values.nbytes)
+    return values
+
+
+def script_buffer(size, width, kind='Double'):
+    """Return an MScriptUtil holding size values of kind and its pointer
+
+    The pointer is typed for rows of width 1, 3 or 4 and is only valid
+    while the MScriptUtil lives. MScriptUtil only allocates from a list,
+    and a list of one repeated zero needs no float object per item.
+    """
+    util = om.MScriptUtil()
+    util.createFromList([0.0] * size, size)
+    return util, getattr(util, 'as%s%sPtr' % (
+        kind, width if width > 1 else ''))()
+
+
+def transform_plugs(node):
+    """Return the TRANSFORM_PLUGS of a transform node as MPlugs"""
+    node_fn = om.MFnDependencyNode(get_dag_path(node).node())
+    return [node_fn.findPlug(name) for name in TRANSFORM_PLUGS]
+
+
+def get_transform_plugs(obj_list):
+    """Return the TRANSFORM_PLUGS of every shape parenting transform
+
+    Plugs are returned per object along with an (n, 9) array of their
+    current values, rotations in radians, and the (n, 4, 4) world
+    matrices of their parents.
+    """
+    plugs = []
+    values = []
+    parent_matrices = []
+    for obj in obj_list:
+        dag_path = get_dag_path(obj)
+        has_shape = any(dag_path.child(index).hasFn(om.MFn.kShape)
+                        for index in range(dag_path.childCount()))
+        if not has_shape:
+            continue
+        obj_plugs = transform_plugs(obj)
+        plugs.append(obj_plugs)
+        values.append([plug.asDouble() for plug in obj_plugs])
+        parent_matrix = dag_path.exclusiveMatrix()
+        parent_matrices.append([[parent_matrix(row, col) for col in range(4)]
+                                for row in range(4)])
+    return (plugs, np.array(values, dtype=float).reshape(-1, 9),
+            np.array(parent_matrices, dtype=float).reshape(-1, 4, 4))
+
+
+def mesh_ray_hits(mesh, sources, directions):
+    """Return a hit mask and (n, 3) nearest hits of rays on the mesh
+
+    autoUniformGridParams makes Maya build one intersection grid for the
+    mesh, which every ray of the batch then reuses instead of testing
+    each face. Rays are tested both ways, so an object sunk below the
+    surface is found as well as one floating above it.
+    """
+    mesh_fn = om.MFnMesh(get_dag_path(mesh))
+    accel_params = mesh_fn.autoUniformGridParams()
+    hit_point = om.MFloatPoint()
+    hits = np.zeros(len(sources), dtype=bool)
+    hit_points = np.array(sources, dtype=float)
+    for index, (source, direction) in enumerate(zip(sources.tolist(),
+                                                    directions.tolist())):
+        if mesh_fn.closestIntersection(
+                om.MFloatPoint(*source), om.MFloatVector(*direction),
+                None, None, False, om.MSpace.kWorld, SNAP_RAY_LENGTH, True,
+                accel_params, hit_point, None, None, None, None, None):
+            hits[index] = True
+            hit_points[index] = hit_point.x, hit_point.y, hit_point.z
+    return hits, hit_points
@@ -0,0 +1,115 @@
+"""Bake scatters into a list of scenes from mayapy, across a process pool
+
+    mayapy scatter_batch.py shot010.ma shot020.ma --source rock_geo
+        --targets ground_geo cliff_geo --settings rocks.json --processes 4
+
+Several --source objects are mixed in one pass, each point drawing one
+of them by the "source_weights" list of the settings.
+
+Every scene is opened in a worker process running maya.standalone,
+scattered like Update Scatter with the Scatter defaults overridden by
+the --settings JSON, and saved next to the original with --suffix added
+to its name. Exits non-zero if any scene fails.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+SCENE_TYPES = {'.ma': 'mayaAscii', '.mb': 'mayaBinary'}
+
+
+def start_worker():
+    """start Maya once in each pool process"""
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+
+
+def output_path(scene, suffix):
+    """Return the path a baked copy of scene is saved to"""
+    root, ext = os.path.splitext(scene)
+    return root + suffix + ext
+
+
+def bake_scene(job):
+    """Scatter one scene and save it, return (scene, error, seconds)
+
+    Runs in a worker, so any error is returned as text rather than raised
+    to keep the other scenes of the batch going.
+    """
+    scene, sources, targets, settings, suffix = job
+    start_time = time.time()
+    try:
+        import maya.cmds as cmds
+        import scatter
+
+        cmds.file(scene, open=True, force=True)
+        tool = scatter.Scatter()
+        tool.apply_settings(settings)
+        if len(sources) > 1:
+            tool.sources = sources
+            cmds.select(targets)
+        else:
+            cmds.select(sources + targets)
+        if tool.update_scatter() is None:
+            raise ValueError(sources[0] + ' is not a transform')
+        baked = output_path(scene, suffix)
+        cmds.file(rename=baked)
+        cmds.file(save=True, force=True,
+                  type=SCENE_TYPES[os.path.splitext(baked)[1].lower()])
+    except Exception:
+        return scene, traceback.format_exc(), time.time() - start_time
+    return scene, None, time.time() - start_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('scenes', nargs='+', help='.ma or .mb scenes')
+    parser.add_argument('--source', nargs='+', required=True,
+                        help='transforms to scatter in every scene')
+    parser.add_argument('--targets', nargs='+', required=True,
+                        help='meshes or vertex ranges to scatter onto')
+    parser.add_argument('--settings',
+                        help='JSON of Scatter settings to override')
+    parser.add_argument('--suffix', default='_scattered',
+                        help='added to the saved scene names')
+    parser.add_argument('--processes', type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='worker processes, one Maya each')
+    args = parser.parse_args(argv)
+
+    for scene in args.scenes:
+        if os.path.splitext(scene)[1].lower() not in SCENE_TYPES:
+            parser.error('not a .ma or .mb scene: ' + scene)
+    settings = {}
+    if args.settings:
+        with open(args.settings) as settings_file:
+            settings = json.load(settings_file)
+
+    jobs = [(os.path.abspath(scene), args.source, args.targets, settings,
+             args.suffix) for scene in args.scenes]
+    pool = multiprocessing.Pool(min(args.processes, len(jobs)),
+                                initializer=start_worker)
+    failed = 0
+    try:
+        for scene, error, seconds in pool.imap_unordered(bake_scene, jobs):
+            if error:
+                failed += 1
+                print('FAILED %s (%.1f s)\n%s' % (scene, seconds, error))
+            else:
+                print('baked  %s (%.1f s)' % (scene, seconds))
+            sys.stdout.flush()
+    finally:
+        pool.close()
+        pool.join()
+    print('%d of %d scenes baked' % (len(jobs) - failed, len(jobs)))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Compact binary files of scatter point sets
+
+A cache holds the point ids, translate, rotate (radians), scale and
+source index of every scattered point, followed by the seed, settings
+and source names they were made with. The layout is
+
+    header     magic, format version, JSON length, point count
+    JSON       {'sources': [...], 'params': {...}, 'tiles': [...]}
+    columns    one little endian array per COLUMNS entry, each starting
+               on an ALIGNMENT byte boundary
+
+so read_cache memory-maps the file and returns every column as a view
+straight into it, with nothing decoded point by point.
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'SCATTERC'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQ')
+ALIGNMENT = 64
+# name, dtype and width of the per point arrays, in file order
+COLUMNS = (('ids', '<i8', 1),
+           ('translate', '<f4', 3),
+           ('rotate', '<f4', 3),
+           ('scale', '<f4', 3),
+           ('source', '<u2', 1))
+
+
+def aligned(offset):
+    """Return offset rounded up to the next ALIGNMENT boundary"""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def column_offsets(data_offset, count):
+    """Return the byte offset of each of the COLUMNS of count points"""
+    offsets = []
+    offset = data_offset
+    for name, dtype, width in COLUMNS:
+        offsets.append(offset)
+        offset = aligned(offset + np.dtype(dtype).itemsize * width * count)
+    return offsets
+
+
+def write_cache(path, ids, values, choices, sources, params, tiles=None):
+    """Write a cache of n points to path
+
+    values are the (n, 9) translate, rotate and scale rows of
+    scatter_core.transform_values, choices the index into sources each
+    point instances and params a JSON serializable dict, such as
+    Scatter.settings(). tiles optionally lists [x key, z key, start,
+    end] rows of points stored tile by tile, see scatter_core.tile_table.
+    """
+    count = len(ids)
+    if len(sources) > np.iinfo(np.uint16).max:
+        raise ValueError('a cache holds at most 65535 sources')
+    columns = {'ids': ids, 'translate': values[:, 0:3],
+               'rotate': values[:, 3:6], 'scale': values[:, 6:9],
+               'source': choices}
+    meta = json.dumps({'sources': list(sources), 'params': params,
+                       'tiles': tiles}).encode('utf-8')
+    data_offset = aligned(HEADER.size + len(meta))
+    offsets = column_offsets(data_offset, count)
+    with open(path, 'wb') as cache_file:
+        cache_file.write(HEADER.pack(MAGIC, VERSION, len(meta), count))
+        cache_file.write(meta)
+        for (name, dtype, width), offset in zip(COLUMNS, offsets):
+            cache_file.write(b'\0' * (offset - cache_file.tell()))
+            column = np.ascontiguousarray(columns[name], dtype=dtype)
+            if column.shape != ((count, width) if width > 1 else (count,)):
+                raise ValueError('%s holds %s values, not %d' % (
+                    name, column.shape, count))
+            cache_file.write(column.tobytes())
+
+
+def read_cache(path):
+    """Return a cache as a dict of read-only memory-mapped columns
+
+    Besides the COLUMNS arrays the dict holds 'count', 'sources',
+    'params' and 'tiles', None in an untiled cache. The columns stay
+    valid while any of them is referenced.
+    """
+    with open(path, 'rb') as cache_file:
+        header = cache_file.read(HEADER.size)
+        if len(header) != HEADER.size:
+            raise ValueError('not a scatter cache: ' + path)
+        magic, version, meta_size, count = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ValueError('not a scatter cache: ' + path)
+        if version != VERSION:
+            raise ValueError('unsupported scatter cache version %d: %s' % (
+                version, path))
+        meta = json.loads(cache_file.read(meta_size).decode('utf-8'))
+    cache = {'count': count, 'sources': meta['sources'],
+             'params': meta['params'], 'tiles': meta.get('tiles')}
+    offsets = column_offsets(aligned(HEADER.size + meta_size), count)
+    if not count:
+        for name, dtype, width in COLUMNS:
+            cache[name] = np.empty((0, width) if width > 1 else 0,
+                                   dtype=dtype)
+        return cache
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    for (name, dtype, width), offset in zip(COLUMNS, offsets):
+        size = np.dtype(dtype).itemsize * width * count
+        if offset + size > len(data):
+            raise ValueError('truncated scatter cache: ' + path)
+        column = data[offset:offset + size].view(dtype)
+        cache[name] = column.reshape(count, width) if width > 1 else column
+    return cache
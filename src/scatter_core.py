@@ -0,0 +1,932 @@
+"""Maya independent sampling and transform math of the scatter tool
+
+Everything here works on NumPy arrays of mesh points, normals and
+triangles plus a settings dict keyed by SETTING_NAMES, so it runs and
+can be tested without Maya. scatter.py gathers the arrays from the scene
+and applies the transforms returned here.
+"""
+import numpy as np
+
+# Scatter attributes the headless core reads from a settings dict
+SETTING_NAMES = ('rot_min_x', 'rot_min_y', 'rot_min_z',
+                 'rot_max_x', 'rot_max_y', 'rot_max_z',
+                 'scl_min_x', 'scl_min_y', 'scl_min_z',
+                 'scl_max_x', 'scl_max_y', 'scl_max_z',
+                 'min_height_value', 'max_height_value',
+                 'normal_bool', 'density_value',
+                 'surface_bool', 'surface_count', 'min_distance', 'seed',
+                 'cull_bands', 'cull_margin', 'tile_size')
+UP_VECTOR = np.array([0.0, 1.0, 0.0])
+# fallback reference used where the normal is parallel to UP_VECTOR, chosen
+# so a normal of +Y gives the identity frame
+SIDE_VECTOR = np.array([-1.0, 0.0, 0.0])
+# first point_random stream of each use, so no two uses share draws
+RANK_STREAM = 0
+SPACE_STREAM = 1
+SURFACE_STREAM = 2  # triangle pick, then two barycentric coordinates
+TRANSFORM_STREAM = 5  # rotation xyz, scale xyz, height
+SOURCE_STREAM = 12
+# vertex ids ranked at once, bounding the memory of sampling big ranges
+ID_CHUNK = 1 << 16
+GOLDEN_GAMMA = np.uint64(0x9e3779b97f4a7c15)
+# cells a blocker box may be listed in before it moves to a coarser level
+# of the box_index grid, and how much coarser each level is
+GRID_BOX_CELLS = 64
+GRID_LEVEL_SCALE = 8.0
+# query and box pairs boxes_blocked tests at once, bounding its memory
+PAIR_CHUNK = 1 << 20
+# large primes hashing integer grid cells into one key
+CELL_HASH_PRIMES = (73856093, 19349663, 83492791)
+# Rec. 709 weights turning painted RGB density into one value
+LUMINANCE = np.array([0.2126, 0.7152, 0.0722])
+
+
+def lerp(low, high, amount):
+    """Return low + amount * (high - low), broadcast over arrays"""
+    low = np.asarray(low, dtype=float)
+    return low + amount * (np.asarray(high, dtype=float) - low)
+
+
+def mix64(values):
+    """Return the SplitMix64 finalizer of a uint64 array, a bijection"""
+    with np.errstate(over='ignore'):
+        values = values ^ (values >> np.uint64(30))
+        values = values * np.uint64(0xbf58476d1ce4e5b9)
+        values = values ^ (values >> np.uint64(27))
+        values = values * np.uint64(0x94d049bb133111eb)
+        return values ^ (values >> np.uint64(31))
+
+
+def point_random(seed, ids, stream, count=1):
+    """Return (n, count) uniform [0, 1) draws of streams stream onwards
+
+    Counter based: every draw is a hash of its seed, point id and stream
+    alone, with no generator state, so the draws of a point never depend
+    on which other points are drawn with it, in what order or in which
+    process. Any split of the ids into chunks gives identical values.
+    """
+    seed_key = mix64(np.array([seed % 2 ** 64], dtype=np.uint64))
+    ids = np.asarray(ids, dtype=np.int64).astype(np.uint64)
+    streams = np.arange(stream + 1, stream + count + 1, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        point_keys = mix64(seed_key + ids * GOLDEN_GAMMA)
+        bits = mix64(point_keys[:, np.newaxis] + streams * GOLDEN_GAMMA)
+    # the top 53 bits fill a double's mantissa exactly
+    return (bits >> np.uint64(11)).astype(float) * (1.0 / (1 << 53))
+
+
+def derived_seed(seed, salt):
+    """Return a seed of an independent family of draws under seed"""
+    return int(point_random(seed, [salt], 0)[0, 0] * (1 << 53))
+
+
+def density_mask(seed, ids, density):
+    """Return a mask of the ids whose RANK_STREAM draw is below density
+
+    The same seed always keeps the same ids, and a higher density keeps
+    a superset of a lower one.
+    """
+    return point_random(seed, ids, RANK_STREAM)[:, 0] < density
+
+
+def source_choice(seed, ids, weights):
+    """Return the index into weights of the source drawn for each point id
+
+    One vectorized weighted pick, from the SOURCE_STREAM draw of each
+    point, so a point keeps its source however the points are sampled.
+    """
+    weights = np.asarray(weights, dtype=float)
+    if len(weights) == 1:
+        return np.zeros(len(ids), dtype=np.int64)
+    cumulative = np.cumsum(weights)
+    if not cumulative[-1] > 0.0:
+        raise ValueError('source weights must sum to more than 0')
+    # side='right' never lands on a zero weight source
+    return np.searchsorted(cumulative / cumulative[-1],
+                           point_random(seed, ids, SOURCE_STREAM)[:, 0],
+                           side='right')
+
+
+def vertex_point_ids(mesh_index, vertex_ids):
+    """Return point ids of the vertices of the mesh_index-th target mesh"""
+    return (np.int64(mesh_index) << 32) | np.asarray(vertex_ids,
+                                                     dtype=np.int64)
+
+
+def sample_vertex_ids(mesh_ranges, density, seed, density_maps=None):
+    """Return (mesh, vertex ids) pairs of the density ranked vertices
+
+    Vertices are kept by density_mask of their vertex_point_ids, with the
+    density scaled by vertex_map_factors when density_maps are given. The
+    concatenated ranges are ranked ID_CHUNK vertices at a time, so memory
+    follows the kept count rather than the size of the ranges.
+    """
+    starts = np.concatenate([ranges[:, 0] for mesh, ranges in mesh_ranges])
+    sizes = np.concatenate([ranges[:, 1] - ranges[:, 0]
+                            for mesh, ranges in mesh_ranges])
+    range_meshes = np.repeat(np.arange(len(mesh_ranges)),
+                             [len(ranges) for mesh, ranges in mesh_ranges])
+    ends = np.cumsum(sizes)
+    kept_ids = []
+    kept_meshes = []
+    for chunk_start in range(0, int(ends[-1]) if len(ends) else 0,
+                             ID_CHUNK):
+        picked = np.arange(chunk_start, min(int(ends[-1]),
+                                            chunk_start + ID_CHUNK))
+        which = np.searchsorted(ends, picked, side='right')
+        ids = starts[which] + picked - (ends[which] - sizes[which])
+        chunk_meshes = range_meshes[which]
+        point_ids = vertex_point_ids(chunk_meshes, ids)
+        chunk_density = density
+        if density_maps is not None:
+            chunk_density = density * vertex_map_factors(density_maps,
+                                                         point_ids)
+        kept = density_mask(seed, point_ids, chunk_density)
+        kept_ids.append(ids[kept])
+        kept_meshes.append(chunk_meshes[kept])
+    ids = np.concatenate(kept_ids) if kept_ids else np.empty(0, np.int64)
+    picked_meshes = (np.concatenate(kept_meshes) if kept_meshes
+                     else np.empty(0, np.int64))
+    return [(mesh, ids[picked_meshes == index])
+            for index, (mesh, ranges) in enumerate(mesh_ranges)]
+
+
+def triangle_cdf(points, triangles):
+    """Return the running sum of the triangle areas"""
+    corners = points[triangles]
+    areas = 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0],
+                                          corners[:, 2] - corners[:, 0]),
+                                 axis=1)
+    return np.cumsum(areas)
+
+
+def surface_samples(points, triangles, cdf, draws):
+    """Return area weighted positions and face normals of (n, 3) draws
+
+    The first draw of a row picks a triangle by binary search in the
+    cumulative area table and the other two place the point inside it.
+    Rows are looked up in order of their first draw, which keeps the
+    search and the corner lookups cache friendly on large meshes, and
+    are returned in their own order.
+    """
+    count = len(draws)
+    if not count or not len(cdf):
+        return np.empty((0, 3)), np.empty((0, 3))
+    order = np.argsort(draws[:, 0])
+    faces, bary = surface_coords(cdf, draws[order])
+    bary_u = bary[:, 0]
+    bary_v = bary[:, 1]
+
+    corners = points[triangles[faces]]
+    edge_u = corners[:, 1] - corners[:, 0]
+    edge_v = corners[:, 2] - corners[:, 0]
+    positions = np.empty((count, 3))
+    normals = np.empty((count, 3))
+    positions[order] = (corners[:, 0] + bary_u[:, np.newaxis] * edge_u +
+                        bary_v[:, np.newaxis] * edge_v)
+    face_normals = np.cross(edge_u, edge_v)
+    normals[order] = (face_normals /
+                      np.linalg.norm(face_normals, axis=1)[:, np.newaxis])
+    return positions, normals
+
+
+def surface_coords(cdf, draws):
+    """Return the triangles and (n, 2) barycentric u, v of (n, 3) draws
+
+    The first draw picks a triangle by binary search in the cumulative
+    area table and the other two place the point inside it.
+    """
+    faces = np.searchsorted(cdf, draws[:, 0] * cdf[-1], side='right')
+    faces = np.minimum(faces, len(cdf) - 1)
+    bary = draws[:, 1:3].copy()
+    # fold points of the unit square's far half back into the triangle
+    flip = bary.sum(axis=1) > 1.0
+    bary[flip] = 1.0 - bary[flip]
+    return faces, bary
+
+
+def neighbour_cell_offsets():
+    """Return the (dx, dy, dz) cell offsets min_distance_mask must check
+
+    Cells are radius / sqrt(3) wide, so a point can only conflict with
+    cells up to two away, and not with those two away on all three axes.
+    """
+    steps = range(-2, 3)
+    return [(off_x, off_y, off_z)
+            for off_x in steps for off_y in steps for off_z in steps
+            if sum(abs(off) == 2 for off in (off_x, off_y, off_z)) < 3]
+
+
+def min_distance_mask(positions, radius, priorities):
+    """Return a mask of positions no two of which are closer than radius
+
+    Candidates are accepted in priorities order against a hash grid
+    of radius / sqrt(3) cells, which can each hold one accepted point.
+    Cells are handled in 27 phases by cell index modulo 3, and cells of
+    one phase can never conflict with each other. So a whole phase is
+    tested against the points accepted so far in one vectorized pass,
+    and the first survivor of every cell is accepted. The result is a
+    maximal set: every rejected point lies within radius of a kept one.
+    """
+    count = len(positions)
+    keep = np.zeros(count, dtype=bool)
+    if not count:
+        return keep
+    cell_size = radius / np.sqrt(3.0)
+    # two cells of margin on each side so neighbour keys never wrap
+    cells = np.floor((positions - positions.min(axis=0)) /
+                     cell_size).astype(np.int64) + 2
+    dims = cells.max(axis=0) + 3
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    phases = (cells[:, 0] % 3 * 3 + cells[:, 1] % 3) * 3 + cells[:, 2] % 3
+    # sorted by cell, lowest priority value first within a cell
+    order = np.lexsort((priorities, keys))
+    key_deltas = [(off_x * dims[1] + off_y) * dims[2] + off_z
+                  for off_x, off_y, off_z in neighbour_cell_offsets()]
+    radius_sq = radius * radius
+
+    accepted_keys = np.empty(0, dtype=np.int64)
+    accepted = np.empty(0, dtype=np.int64)
+    for phase in range(27):
+        candidates = order[phases[order] == phase]
+        if not len(candidates):
+            continue
+        alive = np.ones(len(candidates), dtype=bool)
+        candidate_keys = keys[candidates]
+        if len(accepted):
+            for delta in key_deltas:
+                neighbour_keys = candidate_keys + delta
+                slots = np.minimum(np.searchsorted(accepted_keys,
+                                                   neighbour_keys),
+                                   len(accepted_keys) - 1)
+                hits = np.flatnonzero(alive &
+                                      (accepted_keys[slots] ==
+                                       neighbour_keys))
+                offsets = (positions[candidates[hits]] -
+                           positions[accepted[slots[hits]]])
+                close = np.einsum('ij,ij->i', offsets, offsets) < radius_sq
+                alive[hits[close]] = False
+        survivors = candidates[alive]
+        survivor_keys = candidate_keys[alive]
+        first = np.ones(len(survivors), dtype=bool)
+        first[1:] = survivor_keys[1:] != survivor_keys[:-1]
+        keep[survivors[first]] = True
+
+        accepted_keys = np.concatenate((accepted_keys,
+                                        survivor_keys[first]))
+        accepted = np.concatenate((accepted, survivors[first]))
+        key_order = np.argsort(accepted_keys, kind='mergesort')
+        accepted_keys = accepted_keys[key_order]
+        accepted = accepted[key_order]
+    return keep
+
+
+def normal_matrices(positions, normals):
+    """Return (n, 4, 4) world matrices with Y along each normal
+
+    Rows are bitangent, normal, tangent and position, where the tangent is
+    normal x UP_VECTOR. Normals parallel to UP_VECTOR use SIDE_VECTOR
+    instead, since the cross product vanishes there.
+    """
+    normals = normals / np.linalg.norm(normals, axis=1)[:, np.newaxis]
+    tangents = np.cross(normals, UP_VECTOR)
+    lengths = np.linalg.norm(tangents, axis=1)
+    parallel = lengths < 1e-6
+    tangents[parallel] = np.cross(normals[parallel], SIDE_VECTOR)
+    lengths[parallel] = np.linalg.norm(tangents[parallel], axis=1)
+    tangents /= lengths[:, np.newaxis]
+    bitangents = np.cross(normals, tangents)
+
+    matrices = np.zeros((len(positions), 4, 4))
+    matrices[:, 0, :3] = bitangents
+    matrices[:, 1, :3] = normals
+    matrices[:, 2, :3] = tangents
+    matrices[:, 3, :3] = positions
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def euler_matrices(rotations):
+    """Return (n, 3, 3) rotation matrices of (n, 3) XYZ degree rotations"""
+    cos_x, cos_y, cos_z = np.cos(np.radians(rotations)).T
+    sin_x, sin_y, sin_z = np.sin(np.radians(rotations)).T
+    matrices = np.empty((len(rotations), 3, 3))
+    matrices[:, 0, 0] = cos_y * cos_z
+    matrices[:, 0, 1] = cos_y * sin_z
+    matrices[:, 0, 2] = -sin_y
+    matrices[:, 1, 0] = sin_x * sin_y * cos_z - cos_x * sin_z
+    matrices[:, 1, 1] = sin_x * sin_y * sin_z + cos_x * cos_z
+    matrices[:, 1, 2] = sin_x * cos_y
+    matrices[:, 2, 0] = cos_x * sin_y * cos_z + sin_x * sin_z
+    matrices[:, 2, 1] = cos_x * sin_y * sin_z - sin_x * cos_z
+    matrices[:, 2, 2] = cos_x * cos_y
+    return matrices
+
+
+def matrix_rotations(matrices):
+    """Return (n, 3) XYZ euler rotations in degrees of (n, 3+, 3+) matrices"""
+    rot_x = np.arctan2(matrices[:, 1, 2], matrices[:, 2, 2])
+    rot_y = np.arcsin(np.clip(-matrices[:, 0, 2], -1.0, 1.0))
+    rot_z = np.arctan2(matrices[:, 0, 1], matrices[:, 0, 0])
+    # gimbal lock, Y at +-90: fold all of the rotation into X
+    locked = np.abs(matrices[:, 0, 2]) > 1.0 - 1e-9
+    rot_x[locked] = np.arctan2(matrices[locked, 1, 0] *
+                               -matrices[locked, 0, 2],
+                               matrices[locked, 1, 1])
+    rot_z[locked] = 0.0
+    return np.degrees(np.column_stack((rot_x, rot_y, rot_z)))
+
+
+def mesh_surface_samples(tables, ids, seed):
+    """Return area weighted positions and normals of surface point ids
+
+    tables holds a (points, triangles, triangle_cdf) tuple per mesh. They
+    are joined into one table, so each id picks its triangle by area over
+    all meshes from its own SURFACE_STREAM draws.
+    """
+    if not tables:
+        return np.empty((0, 3)), np.empty((0, 3))
+    points, triangles = tables[0][:2]
+    if len(tables) > 1:
+        point_offsets = np.cumsum([0] + [len(table[0])
+                                         for table in tables[:-1]])
+        points = np.concatenate([table[0] for table in tables])
+        triangles = np.concatenate([table[1] + offset for table, offset
+                                    in zip(tables, point_offsets)])
+    return surface_samples(points, triangles, joined_cdf(tables)[0],
+                           point_random(seed, ids, SURFACE_STREAM, 3))
+
+
+def vertex_binding(ids):
+    """Return the mesh indices, corners and weights of vertex point ids
+
+    A vertex is bound with all three (n, 3) corner vertex ids on itself
+    and weights (1, 0, 0), so bound_points returns the vertex.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    vertex_ids = ids & np.int64(0xffffffff)
+    weights = np.zeros((len(ids), 3))
+    weights[:, 0] = 1.0
+    return (ids >> 32, np.repeat(vertex_ids[:, np.newaxis], 3, axis=1),
+            weights)
+
+
+def surface_binding(tables, ids, seed):
+    """Return the mesh indices, corners and weights of surface point ids
+
+    These are the triangle corner vertex ids and barycentric weights
+    mesh_surface_samples places the ids at over the tables, so the
+    points follow the triangles when the mesh deforms.
+    """
+    count = len(ids)
+    mesh_index = np.zeros(count, dtype=np.int64)
+    corners = np.zeros((count, 3), dtype=np.int64)
+    weights = np.zeros((count, 3))
+    cdf, first_triangles = joined_cdf(tables) if tables else ([], None)
+    if not count or not len(cdf):
+        return mesh_index, corners, weights
+    faces, bary = surface_coords(cdf, point_random(seed, ids,
+                                                   SURFACE_STREAM, 3))
+    mesh_index = np.searchsorted(first_triangles, faces, side='right') - 1
+    for index, table in enumerate(tables):
+        on_mesh = mesh_index == index
+        corners[on_mesh] = table[1][faces[on_mesh] - first_triangles[index]]
+    weights[:, 0] = 1.0 - bary.sum(axis=1)
+    weights[:, 1:3] = bary
+    return mesh_index, corners, weights
+
+
+def bound_points(points, corners, weights):
+    """Return the (n, 3) points at the weights of the corner vertices"""
+    return np.einsum('nk,nkj->nj', weights, points[corners])
+
+
+def unit_rows(vectors):
+    """Return vectors scaled to unit length, zero rows left as they are"""
+    lengths = np.linalg.norm(vectors, axis=1)
+    return vectors / np.where(lengths > 0.0, lengths, 1.0)[:, np.newaxis]
+
+
+def face_normals(points, corners):
+    """Return the (n, 3) unit normals of the corner triangles"""
+    corner_points = points[corners]
+    return unit_rows(np.cross(corner_points[:, 1] - corner_points[:, 0],
+                              corner_points[:, 2] - corner_points[:, 0]))
+
+
+def vertex_normals(points, triangles):
+    """Return area weighted (n, 3) unit vertex normals of a triangle mesh"""
+    corner_points = points[triangles]
+    # unnormalized cross products weight each face by its area
+    faces = np.cross(corner_points[:, 1] - corner_points[:, 0],
+                     corner_points[:, 2] - corner_points[:, 0])
+    normals = np.empty((len(points), 3))
+    for axis in range(3):
+        normals[:, axis] = np.bincount(triangles.ravel(),
+                                       np.repeat(faces[:, axis], 3),
+                                       minlength=len(points))
+    return unit_rows(normals)
+
+
+def joined_cdf(tables):
+    """Return the area table of all tables end to end, and their offsets
+
+    The offsets are the index of the first triangle of every table in
+    the joined table.
+    """
+    if len(tables) == 1:
+        return tables[0][2], np.zeros(1, dtype=np.int64)
+    area_offsets = np.cumsum([0.0] + [table[2][-1] if len(table[2])
+                                      else 0.0 for table in tables[:-1]])
+    first_triangles = np.cumsum([0] + [len(table[2])
+                                       for table in tables[:-1]])
+    return (np.concatenate([table[2] + offset for table, offset
+                            in zip(tables, area_offsets)]),
+            first_triangles)
+
+
+def image_lookup(image, uvs):
+    """Return bilinear samples of an (h, w) image at (n, 2) wrapped uvs
+
+    Row 0 of the image is v = 0, the bottom row in Maya's UV space.
+    """
+    height, width = image.shape
+    columns = (uvs[:, 0] % 1.0) * width - 0.5
+    rows = (uvs[:, 1] % 1.0) * height - 0.5
+    column_0 = np.floor(columns)
+    row_0 = np.floor(rows)
+    column_t = columns - column_0
+    row_t = rows - row_0
+    column_0 = column_0.astype(np.int64) % width
+    row_0 = row_0.astype(np.int64) % height
+    column_1 = (column_0 + 1) % width
+    row_1 = (row_0 + 1) % height
+    return lerp(lerp(image[row_0, column_0], image[row_0, column_1],
+                     column_t),
+                lerp(image[row_1, column_0], image[row_1, column_1],
+                     column_t),
+                row_t)
+
+
+def triangle_uv_ids(polygon_counts, polygon_vertices, polygon_uv_ids,
+                    triangle_counts, triangle_vertices):
+    """Return (m, 3) uv ids of the triangle corners and one per vertex
+
+    Takes the MFnMesh getVertices, getAssignedUVs and getTriangles
+    arrays, with polygon_uv_ids padded by -1 on faces without UVs. Each
+    triangle corner is matched to its face vertex by (face, vertex). The
+    uv of a vertex is that of any of its face vertices, and corners and
+    vertices without UVs read uv 0.
+    """
+    polygon_faces = np.repeat(np.arange(len(polygon_counts)),
+                              polygon_counts)
+    vertex_count = polygon_vertices.max() + 1 if len(polygon_vertices) else 0
+    keys = polygon_faces * vertex_count + polygon_vertices
+    order = np.argsort(keys, kind='mergesort')
+    triangle_faces = np.repeat(np.arange(len(triangle_counts)),
+                               triangle_counts * 3)
+    corners = order[np.searchsorted(keys[order], triangle_faces *
+                                    vertex_count + triangle_vertices)]
+    uv_ids = np.maximum(polygon_uv_ids, 0)
+    vertex_uv_ids = np.zeros(vertex_count, dtype=np.int64)
+    vertex_uv_ids[polygon_vertices] = uv_ids
+    return uv_ids[corners].reshape(-1, 3), vertex_uv_ids
+
+
+def vertex_map_density(density_map, vertex_ids):
+    """Return the density map values of vertices of its mesh
+
+    A density map is a dict holding either per vertex 'vertex' values,
+    or an (h, w) 'image' with the mesh's (k, 2) 'uvs' and the
+    'vertex_uv_ids' and 'triangle_uv_ids' of triangle_uv_ids.
+    """
+    if 'image' in density_map:
+        return image_lookup(density_map['image'], density_map['uvs'][
+            density_map['vertex_uv_ids'][vertex_ids]])
+    return density_map['vertex'][vertex_ids]
+
+
+def surface_map_density(density_map, triangles, faces, bary):
+    """Return density map values at barycentric points of its mesh"""
+    weights = np.column_stack((1.0 - bary.sum(axis=1), bary))
+    if 'image' in density_map:
+        corner_uvs = density_map['uvs'][
+            density_map['triangle_uv_ids'][faces]]
+        return image_lookup(density_map['image'],
+                            np.einsum('nk,nkj->nj', weights, corner_uvs))
+    return np.einsum('nk,nk->n', weights,
+                     density_map['vertex'][triangles[faces]])
+
+
+def vertex_map_factors(density_maps, point_ids):
+    """Return the map value of vertex point ids, 1 on meshes without one
+
+    density_maps holds a density map or None per target mesh, in the
+    mesh order of the point ids.
+    """
+    factors = np.ones(len(point_ids))
+    mesh_indices = point_ids >> 32
+    vertex_ids = point_ids & 0xffffffff
+    for index, density_map in enumerate(density_maps):
+        if density_map is not None:
+            on_mesh = mesh_indices == index
+            factors[on_mesh] = vertex_map_density(density_map,
+                                                  vertex_ids[on_mesh])
+    return factors
+
+
+def surface_map_factors(tables, density_maps, ids, seed):
+    """Return the map value where surface point ids land, 1 without one
+
+    The landing triangle and barycentric coordinates are recomputed from
+    the ids' SURFACE_STREAM draws, so no sampled position is needed and
+    every candidate is tested in one vectorized pass.
+    """
+    factors = np.ones(len(ids))
+    if not len(ids) or all(density_map is None
+                           for density_map in density_maps):
+        return factors
+    cdf, first_triangles = joined_cdf(tables)
+    faces, bary = surface_coords(cdf, point_random(seed, ids,
+                                                   SURFACE_STREAM, 3))
+    meshes = np.searchsorted(first_triangles, faces, side='right') - 1
+    for index, density_map in enumerate(density_maps):
+        if density_map is not None:
+            on_mesh = meshes == index
+            factors[on_mesh] = surface_map_density(
+                density_map, tables[index][1],
+                faces[on_mesh] - first_triangles[index], bary[on_mesh])
+    return factors
+
+
+def camera_factors(positions, camera, bands=(), margin=0.0):
+    """Return a 0-1 density factor of each point as seen from a camera
+
+    camera holds the (4, 4) world 'matrix' of a camera looking down its
+    local -Z axis, its horizontal and vertical 'fov' in radians and its
+    'near' and 'far' clipping distances. Points outside the frustum,
+    widened by margin, get 0. bands are (distance, factor) pairs sorted
+    by distance: a point gets the factor of the first band reaching it,
+    and 0 beyond the last band. Without bands every point in view gets 1.
+    """
+    matrix = np.asarray(camera['matrix'], dtype=float)
+    offsets = positions - matrix[3, :3]
+    # row vectors: local = world offset times the inverse of the axes
+    local = np.dot(offsets, np.linalg.inv(matrix[:3, :3]))
+    depths = -local[:, 2]
+    spans = np.tan(0.5 * np.asarray(camera['fov'], dtype=float))
+    visible = ((depths >= camera['near'] - margin) &
+               (depths <= camera['far'] + margin) &
+               (np.abs(local[:, 0]) <= depths * spans[0] + margin) &
+               (np.abs(local[:, 1]) <= depths * spans[1] + margin))
+    factors = visible.astype(float)
+    if len(bands):
+        bands = np.asarray(bands, dtype=float).reshape(-1, 2)
+        band_index = np.searchsorted(bands[:, 0],
+                                     np.linalg.norm(offsets, axis=1))
+        factors *= np.append(bands[:, 1], 0.0)[band_index]
+    return factors
+
+
+def tile_table(positions, tile_size):
+    """Return the XZ grid tiles holding points, for tiled output
+
+    Returns the (k, 2) integer keys of the occupied tiles, an order
+    listing the points tile by tile and (k + 1) starts, so the points of
+    tile i are order[starts[i]:starts[i + 1]].
+    """
+    cells = np.floor(positions[:, [0, 2]] / tile_size).astype(np.int64)
+    cells = cells.reshape(-1, 2)
+    if not len(cells):
+        return cells, np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+    low = cells.min(axis=0)
+    # one int64 key per cell sorts far faster than unique rows
+    width = cells[:, 1].max() - low[1] + 1
+    linear = (cells[:, 0] - low[0]) * width + (cells[:, 1] - low[1])
+    order = np.argsort(linear, kind='stable')
+    linear = linear[order]
+    starts = np.flatnonzero(np.diff(linear)) + 1
+    starts = np.concatenate(([0], starts, [len(linear)]))
+    keys = cells[order[starts[:-1]]]
+    return keys, order, starts
+
+
+def tiles_in_region(keys, tile_size, region):
+    """Return a mask of the tile keys overlapping a region in X and Z
+
+    region is an xmin, ymin, zmin, xmax, ymax, zmax world bounding box,
+    as cmds.exactWorldBoundingBox returns it.
+    """
+    low = np.asarray(keys, dtype=float).reshape(-1, 2) * tile_size
+    high = low + tile_size
+    # tiles hold [low, high), so one merely touching the region is out
+    return ((high[:, 0] > region[0]) & (low[:, 0] <= region[3]) &
+            (high[:, 1] > region[2]) & (low[:, 1] <= region[5]))
+
+
+def triangle_boxes(points, triangles):
+    """Return the (n, 6) min and max corners bounding each triangle"""
+    corners = points[triangles]
+    return np.column_stack((corners.min(axis=1), corners.max(axis=1)))
+
+
+def radius_boxes(positions, radii):
+    """Return the (n, 6) boxes reaching radii around the positions"""
+    reach = np.asarray(radii, dtype=float).reshape(-1, 1)
+    return np.column_stack((positions - reach, positions + reach))
+
+
+def run_offsets(counts):
+    """Return 0 up to each count, for all counts one after another"""
+    counts = np.asarray(counts, dtype=np.int64)
+    starts = np.cumsum(counts) - counts
+    return np.arange(counts.sum()) - np.repeat(starts, counts)
+
+
+def box_cells(boxes, cell_size):
+    """Return the rows and (m, 3) integer grid cells the boxes overlap
+
+    Box boxes[rows[i]] overlaps cell cells[i], one row per such pair.
+    """
+    low = np.floor(boxes[:, :3] / cell_size).astype(np.int64)
+    spans = np.floor(boxes[:, 3:] / cell_size).astype(np.int64) - low + 1
+    counts = spans.prod(axis=1)
+    rows = np.repeat(np.arange(len(boxes)), counts)
+    offsets = run_offsets(counts)
+    spans = spans[rows]
+    cells = low[rows]
+    cells[:, 2] += offsets % spans[:, 2]
+    offsets //= spans[:, 2]
+    cells[:, 1] += offsets % spans[:, 1]
+    cells[:, 0] += offsets // spans[:, 1]
+    return rows, cells
+
+
+def cell_hashes(cells):
+    """Return one int64 key per integer cell, wrapping on overflow
+
+    Equal cells share a key and different cells rarely do, with no bound
+    on how far apart the cells are.
+    """
+    return ((cells[:, 0] * CELL_HASH_PRIMES[0]) ^
+            (cells[:, 1] * CELL_HASH_PRIMES[1]) ^
+            (cells[:, 2] * CELL_HASH_PRIMES[2]))
+
+
+def box_index(boxes, cell_size=None):
+    """Return a hierarchical hash grid of (n, 6) min and max corner boxes
+
+    Level 0 cells are cell_size wide, by default the median box size,
+    and every further level is GRID_LEVEL_SCALE times coarser. A box
+    goes to the first level where it overlaps at most GRID_BOX_CELLS
+    cells, so a few huge boxes such as the triangles of a road cannot
+    flood the fine cells. The views of each level, listing its boxes in
+    power of two multiples of its cells, are made by level_view.
+    """
+    boxes = np.asarray(boxes, dtype=float).reshape(-1, 6)
+    boxes = boxes[np.isfinite(boxes).all(axis=1)]
+    if cell_size is None:
+        sizes = (boxes[:, 3:] - boxes[:, :3]).max(axis=1)
+        sizes = sizes[sizes > 0.0]
+        cell_size = float(np.median(sizes)) if len(sizes) else 1.0
+    levels = []
+    remaining = np.arange(len(boxes))
+    while len(remaining):
+        low = np.floor(boxes[remaining, :3] / cell_size)
+        high = np.floor(boxes[remaining, 3:] / cell_size)
+        fits = (high - low + 1.0).prod(axis=1) <= GRID_BOX_CELLS
+        levels.append((cell_size, remaining[fits]))
+        remaining = remaining[~fits]
+        cell_size *= GRID_LEVEL_SCALE
+    index = {'boxes': boxes, 'levels': levels, 'views': {}}
+    for level in range(len(levels)):
+        level_view(index, level, 1)
+    return index
+
+
+def level_view(index, level, scale):
+    """Return the cell size, sorted cell hashes and boxes of a level view
+
+    The boxes of box_index level are listed in every cell they overlap
+    of a grid scale times coarser than the level's. Views are made on
+    first use and kept in the index.
+    """
+    view = index['views'].get((level, scale))
+    if view is None:
+        cell_size, box_rows = index['levels'][level]
+        cell_size *= scale
+        rows, cells = box_cells(index['boxes'][box_rows], cell_size)
+        keys = cell_hashes(cells)
+        order = np.argsort(keys, kind='stable')
+        view = (cell_size, keys[order], box_rows[rows[order]])
+        index['views'][(level, scale)] = view
+    return view
+
+
+def level_hits(view, boxes, queries, probes):
+    """Return which queries touch a box listed in the cells of their probe
+
+    view comes from level_view, and probes are boxes whose grid cells
+    pick the candidate boxes tested against the matching queries, about
+    PAIR_CHUNK pairs at a time.
+    """
+    cell_size, keys, box_rows = view
+    rows, cells = box_cells(probes, cell_size)
+    # neighbouring queries share cells, and searching sorted keys once
+    # each is far faster than searching them in query order
+    query_keys, inverse = np.unique(cell_hashes(cells), return_inverse=True)
+    first = np.searchsorted(keys, query_keys, side='left')
+    counts = np.searchsorted(keys, query_keys, side='right') - first
+    first, counts = first[inverse], counts[inverse]
+    totals = np.cumsum(counts)
+    cuts = np.searchsorted(totals, np.arange(
+        PAIR_CHUNK, totals[-1] if len(totals) else 0, PAIR_CHUNK))
+    cuts = np.unique(np.concatenate(([0], cuts, [len(counts)])))
+    hits = np.zeros(len(queries), dtype=bool)
+    for start, end in zip(cuts[:-1].tolist(), cuts[1:].tolist()):
+        pair_queries = np.repeat(rows[start:end], counts[start:end])
+        pair_boxes = box_rows[np.repeat(first[start:end],
+                                        counts[start:end]) +
+                              run_offsets(counts[start:end])]
+        touching = ((queries[pair_queries, :3] <= boxes[pair_boxes, 3:]) &
+                    (boxes[pair_boxes, :3] <=
+                     queries[pair_queries, 3:])).all(axis=1)
+        hits[pair_queries[touching]] = True
+    return hits
+
+
+def boxes_blocked(index, queries):
+    """Return a mask of the (n, 6) query boxes touching any box of index
+
+    On each box_index level the boxes in the cell of a query's centre
+    are tested first, which settles most queries among dense blockers.
+    The rest test the boxes of every cell they overlap in the level view
+    whose cells are at least half as wide as the query, so no query
+    spans more than three cells a side however small the boxes are.
+    Candidate pairs are tested exactly, so hash collisions cost time but
+    never change the result. Queries go ID_CHUNK at a time, and blocked
+    ones drop out.
+    """
+    queries = np.asarray(queries, dtype=float).reshape(-1, 6)
+    blocked = np.zeros(len(queries), dtype=bool)
+    boxes = index['boxes']
+    centres = np.tile((queries[:, :3] + queries[:, 3:]) * 0.5, 2)
+    extents = (queries[:, 3:] - queries[:, :3]).max(axis=1)
+    for chunk_start in range(0, len(queries), ID_CHUNK):
+        chunk = slice(chunk_start, chunk_start + ID_CHUNK)
+        for level, (cell_size, box_rows) in enumerate(index['levels']):
+            open_rows = chunk_start + np.flatnonzero(~blocked[chunk])
+            blocked[open_rows] = level_hits(level_view(index, level, 1),
+                                            boxes, queries[open_rows],
+                                            centres[open_rows])
+            open_rows = open_rows[~blocked[open_rows]]
+            scales = 2 ** np.ceil(np.log2(np.maximum(
+                extents[open_rows] / (2.0 * cell_size), 1.0))).astype(int)
+            for scale in np.unique(scales).tolist():
+                rows = open_rows[scales == scale]
+                blocked[rows] = level_hits(level_view(index, level, scale),
+                                           boxes, queries[rows],
+                                           queries[rows])
+    return blocked
+
+
+def vertex_samples(meshes, density, seed):
+    """Return point ids, positions and normals of density ranked vertices
+
+    meshes holds a dict per mesh with (n, 3) 'points' and 'normals' and
+    optionally the (k, 2) [start, end) vertex 'ranges' to sample from,
+    all vertices when missing, and a 'density_map' scaling the density.
+    """
+    mesh_ranges = [(mesh, mesh.get('ranges', np.array([[0, len(
+        mesh['points'])]], dtype=np.int64))) for mesh in meshes]
+    density_maps = [mesh.get('density_map') for mesh in meshes]
+    if all(density_map is None for density_map in density_maps):
+        density_maps = None
+    mesh_ids = sample_vertex_ids(mesh_ranges, density, seed, density_maps)
+    point_ids = np.concatenate([vertex_point_ids(index, ids) for index,
+                                (mesh, ids) in enumerate(mesh_ids)])
+    return (point_ids,
+            np.concatenate([mesh['points'][ids] for mesh, ids in mesh_ids]),
+            np.concatenate([mesh['normals'][ids]
+                            for mesh, ids in mesh_ids]))
+
+
+def space_points(ids, positions, normals, radius, seed):
+    """Return the ids, positions and normals of a radius spaced subset
+
+    Points are accepted in the order of their SPACE_STREAM draws, so the
+    subset only depends on the seed and the candidates.
+    """
+    kept = min_distance_mask(positions, radius,
+                             point_random(seed, ids, SPACE_STREAM)[:, 0])
+    return ids[kept], positions[kept], normals[kept]
+
+
+def transform_values(positions, normals, random_values, settings):
+    """Return (n, 9) translate, rotate (radians) and scale of points
+
+    random_values holds (n, 7) uniform draws per point, lerped into the
+    rotation, scale and height ranges of settings. With normal_bool the
+    random rotation is applied in the frame of the point's normal, and
+    the height offset moves along the rotated local Y axis.
+    """
+    rotations = lerp([settings['rot_min_' + axis] for axis in 'xyz'],
+                     [settings['rot_max_' + axis] for axis in 'xyz'],
+                     random_values[:, 0:3])
+    scales = lerp([settings['scl_min_' + axis] for axis in 'xyz'],
+                  [settings['scl_max_' + axis] for axis in 'xyz'],
+                  random_values[:, 3:6])
+    heights = lerp(settings['min_height_value'],
+                   settings['max_height_value'], random_values[:, 6])
+    rot_matrices = euler_matrices(rotations)
+    if settings['normal_bool']:
+        rot_matrices = np.matmul(rot_matrices, normal_matrices(
+            positions, normals)[:, :3, :3])
+    translations = positions + heights[:, np.newaxis] * rot_matrices[:, 1]
+    return np.column_stack((translations,
+                            np.radians(matrix_rotations(rot_matrices)),
+                            scales))
+
+
+def surface_tables(meshes):
+    """Return the (points, triangles, triangle_cdf) table of each mesh
+
+    A mesh dict's own 'cdf' is used when it has one, so callers that
+    cache the table need not have it summed again.
+    """
+    return [(mesh['points'], mesh['triangles'],
+             mesh['cdf'] if 'cdf' in mesh else triangle_cdf(
+                 mesh['points'], mesh['triangles']))
+            for mesh in meshes]
+
+
+def point_factors(meshes, settings, ids, positions, camera=None):
+    """Return the density map and camera factors of sampled points
+
+    Each factor is 1 where the point's mesh has no 'density_map', and
+    without a camera_factors camera nothing is culled.
+    """
+    density_maps = [mesh.get('density_map') for mesh in meshes]
+    if settings['surface_bool']:
+        factors = surface_map_factors(surface_tables(meshes), density_maps,
+                                      ids, settings['seed'])
+    else:
+        factors = vertex_map_factors(density_maps, ids)
+    if camera is not None:
+        factors *= camera_factors(positions, camera, settings['cull_bands'],
+                                  settings['cull_margin'])
+    return factors
+
+
+def sample_points(meshes, settings, camera=None, density=None):
+    """Return point ids and (n, 3) positions and normals to scatter on
+
+    meshes are vertex_samples dicts, which also need (m, 3) 'triangles'
+    when settings has surface_bool. Samples a density fraction, the
+    settings' density_value by default, of the selected vertices, or of
+    surface_count area weighted points over the meshes. With a
+    min_distance every candidate is spaced out first and the density
+    then thins the spaced set. A camera_factors camera culls the points
+    by the cull settings. Which points are kept and where surface points
+    land depend only on the seed and the point ids.
+    """
+    seed = settings['seed']
+    if density is None:
+        density = settings['density_value']
+    spaced = settings['min_distance'] > 0.0
+    if settings['surface_bool']:
+        tables = surface_tables(meshes)
+        ids = np.arange(settings['surface_count'])
+        if not spaced:
+            ids = ids[density_mask(seed, ids, density * surface_map_factors(
+                tables, [mesh.get('density_map') for mesh in meshes], ids,
+                seed))]
+        positions, normals = mesh_surface_samples(tables, ids, seed)
+    elif spaced:
+        ids, positions, normals = vertex_samples(
+            [dict(mesh, density_map=None) for mesh in meshes], 1.0, seed)
+    else:
+        ids, positions, normals = vertex_samples(meshes, density, seed)
+    if spaced:
+        # spacing sees every candidate, the density then thins the rest
+        ids, positions, normals = space_points(
+            ids, positions, normals, settings['min_distance'], seed)
+    if spaced or camera is not None:
+        # the full keep test, a subset of what unspaced sampling kept
+        kept = density_mask(seed, ids, density * point_factors(
+            meshes, settings, ids, positions, camera))
+        ids, positions, normals = ids[kept], positions[kept], normals[kept]
+    return ids, positions, normals
+
+
+def scatter_transforms(meshes, settings, camera=None):
+    """Return point ids and (n, 9) scatter transforms, without Maya
+
+    Points are sampled by sample_points, as Scatter samples the scene,
+    and randomized by transform_values, so every point's values depend
+    only on the seed and its point id.
+    """
+    ids, positions, normals = sample_points(meshes, settings, camera)
+    return ids, transform_values(
+        positions, normals,
+        point_random(settings['seed'], ids, TRANSFORM_STREAM, 7), settings)
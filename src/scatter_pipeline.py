@@ -0,0 +1,95 @@
+"""Compute scatter values on a worker thread ahead of the scene writes
+
+Maya only allows scene edits on the main thread, but the NumPy math for
+the values written can run beside them. A BatchPipeline computes
+consecutive batches of rows on a worker thread and hands them over
+through a bounded queue. The worker stays at most depth batches ahead
+while the main thread instances the batches it already has.
+"""
+import threading
+
+import scatter_profile
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+BATCH_SIZE = 4096
+DEPTH = 2
+# how often a worker blocked on a full queue checks for close()
+POLL_SECONDS = 0.05
+
+
+def null_profile(name):
+    """profile function of an unprofiled pipeline"""
+    return scatter_profile.NULL_PHASE
+
+
+class BatchPipeline(object):
+    """Rows of compute(start, end) arrays made ahead on a worker thread
+
+    compute returns an array of the end - start rows of a batch and must
+    not touch the scene. row(index) reads the rows in increasing index
+    order, blocking until the worker has computed them, and close()
+    stops the worker. Time spent waiting is profiled under wait_phase
+    when a profile function such as Scatter.profile is given.
+    """
+
+    def __init__(self, compute, count, profile=None, wait_phase='frames',
+                 batch_size=BATCH_SIZE, depth=DEPTH):
+        self.count = count
+        self.profile = profile or null_profile
+        self.wait_phase = wait_phase
+        self.batch_size = batch_size
+        self.batches = queue.Queue(maxsize=depth)
+        self.closed = threading.Event()
+        self.rows = []
+        self.start = 0
+        self.end = 0
+        self.worker = threading.Thread(target=self.run, args=(compute,))
+        self.worker.daemon = True
+        self.worker.start()
+
+    def run(self, compute):
+        """worker loop, errors are handed to the reader to raise"""
+        try:
+            for start in range(0, self.count, self.batch_size):
+                batch = compute(start, min(self.count,
+                                           start + self.batch_size))
+                if not self.put((batch, None)):
+                    return
+        except Exception as error:
+            self.put((None, error))
+
+    def put(self, item):
+        """queue item unless closed first, returning whether it was"""
+        while not self.closed.is_set():
+            try:
+                self.batches.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def row(self, index):
+        """Return row index as a list, waiting for its batch if needed"""
+        if index >= self.end:
+            with self.profile(self.wait_phase):
+                self.read_batches(index)
+        return self.rows[index - self.start]
+
+    def read_batches(self, index):
+        """read batches up to the one holding index"""
+        while index >= self.end:
+            batch, error = self.batches.get()
+            if error is not None:
+                raise error
+            # tolist holds the GIL, so it gains nothing on the worker
+            self.rows = batch.tolist()
+            self.start, self.end = self.end, self.end + len(self.rows)
+
+    def close(self):
+        """Stop the worker, dropping any batches not read yet"""
+        self.closed.set()
+        self.worker.join()
@@ -0,0 +1,137 @@
+"""Opt-in phase profiling for the scatter tool
+
+A ScatterProfiler accumulates wall time, call counts and peak memory per
+named phase and writes them out as a JSON report. Phases may nest: a
+phase's seconds include its nested phases and its self_seconds do not,
+and an outer phase's peak covers the peaks of the phases inside it.
+Peak memory needs tracemalloc (Python 3) and is reported as None
+without it.
+"""
+import json
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+class NullPhase(object):
+    """Phase context used when profiling is off, does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_PHASE = NullPhase()
+
+
+class Phase(object):
+    """Context that times one pass through a phase
+
+    tracemalloc has a single peak, so entering a nested phase folds the
+    peak so far into this phase's high-water mark before resetting it,
+    and leaving one folds the nested peak back in.
+    """
+
+    def __init__(self, profiler, name, calls):
+        self.profiler = profiler
+        self.name = name
+        self.calls = calls
+        self.start_time = None
+        self.start_memory = None
+        self.peak_memory = 0
+        self.nested_seconds = 0.0
+
+    def __enter__(self):
+        parent = self.profiler.current_phase()
+        if self.profiler.tracing:
+            memory, peak = tracemalloc.get_traced_memory()
+            if hasattr(tracemalloc, 'reset_peak'):
+                if parent is not None:
+                    parent.peak_memory = max(parent.peak_memory, peak)
+                tracemalloc.reset_peak()
+            self.start_memory = memory
+        self.profiler.active.append(self)
+        self.start_time = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        seconds = time.time() - self.start_time
+        self.profiler.active.remove(self)
+        parent = self.profiler.current_phase()
+        if parent is not None:
+            parent.nested_seconds += seconds
+        peak_kb = None
+        if self.profiler.tracing:
+            # without reset_peak this is the peak since tracing started
+            peak = max(self.peak_memory, tracemalloc.get_traced_memory()[1])
+            if parent is not None:
+                parent.peak_memory = max(parent.peak_memory, peak)
+            peak_kb = (peak - self.start_memory) / 1024.0
+        self.profiler.record(self.name, seconds,
+                             seconds - self.nested_seconds, self.calls,
+                             peak_kb)
+        return False
+
+
+class ScatterProfiler(object):
+    """Accumulate wall time, call counts and peak memory per phase"""
+
+    def __init__(self, label):
+        self.label = label
+        self.phases = {}
+        self.phase_order = []
+        self.active = []
+        self.start_time = time.time()
+        self.tracing = (tracemalloc is not None and
+                        not tracemalloc.is_tracing())
+        if self.tracing:
+            tracemalloc.start()
+
+    def phase(self, name, calls=1):
+        """Return a context manager timing one pass through the phase"""
+        return Phase(self, name, calls)
+
+    def current_phase(self):
+        """Return the innermost phase still running, or None"""
+        return self.active[-1] if self.active else None
+
+    def record(self, name, seconds, self_seconds, calls, peak_kb):
+        """Add one timed pass to the phase totals
+
+        seconds includes the phases nested in this pass, self_seconds
+        leaves them out.
+        """
+        if name not in self.phases:
+            self.phase_order.append(name)
+            self.phases[name] = {'seconds': 0.0, 'self_seconds': 0.0,
+                                 'calls': 0, 'peak_memory_kb': peak_kb}
+        totals = self.phases[name]
+        totals['seconds'] += seconds
+        totals['self_seconds'] += self_seconds
+        totals['calls'] += calls
+        if peak_kb is not None:
+            totals['peak_memory_kb'] = max(totals['peak_memory_kb'],
+                                           peak_kb)
+
+    def report(self):
+        """Return the report as a JSON serializable dict"""
+        return {'label': self.label,
+                'total_seconds': time.time() - self.start_time,
+                'phases': [dict(self.phases[name], name=name)
+                           for name in self.phase_order]}
+
+    def finish(self, path=None):
+        """Stop tracing and return the report, writing it to path if set"""
+        report = self.report()
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+        if path:
+            with open(path, 'w') as report_file:
+                json.dump(report, report_file, indent=2)
+        return report
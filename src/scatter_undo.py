@@ -0,0 +1,88 @@
+"""Maya plug-in command that runs queued MDGModifiers as one undo entry
+
+API edits made from a script are invisible to Maya's undo queue, so
+apply_modifier hands the modifier to a plug-in command which owns its
+doIt/undoIt. record_inverse does the same for edits already made with
+undo off, given a modifier that reverts them. This file is both the
+plug-in and the module that queues.
+"""
+import os
+
+import maya.cmds as cmds
+import maya.OpenMayaMPx as ompx
+
+COMMAND_NAME = 'scatterApplyModifier'
+
+# (modifier, inverse) pairs, inverse for a modifier reverting edits
+pending_modifiers = []
+
+
+class ApplyModifierCmd(ompx.MPxCommand):
+    """Execute the last queued modifier and keep it for undo/redo
+
+    An inverse modifier reverts edits that are already made, so it is
+    not run at first, undo runs its doIt and redo its undoIt.
+    """
+
+    def __init__(self):
+        ompx.MPxCommand.__init__(self)
+        self.modifier = None
+        self.inverse = False
+
+    def doIt(self, args):
+        # the plug-in may be loaded as a separate module, so always go
+        # through the imported one that apply_modifier queued on
+        import scatter_undo
+        self.modifier, self.inverse = scatter_undo.pending_modifiers.pop()
+        if not self.inverse:
+            self.modifier.doIt()
+
+    def redoIt(self):
+        if self.inverse:
+            self.modifier.undoIt()
+        else:
+            self.modifier.doIt()
+
+    def undoIt(self):
+        if self.inverse:
+            self.modifier.doIt()
+        else:
+            self.modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def cmd_creator():
+    return ompx.asMPxPtr(ApplyModifierCmd())
+
+
+def initializePlugin(mobject):
+    ompx.MFnPlugin(mobject).registerCommand(COMMAND_NAME, cmd_creator)
+
+
+def uninitializePlugin(mobject):
+    ompx.MFnPlugin(mobject).deregisterCommand(COMMAND_NAME)
+
+
+def apply_modifier(modifier):
+    """Run modifier through the plug-in command so it can be undone"""
+    run_command(modifier, False)
+
+
+def record_inverse(modifier):
+    """Record edits made with undo off as one undo entry
+
+    modifier reverts the edits and is not run now: undo runs it and redo
+    undoes it again.
+    """
+    run_command(modifier, True)
+
+
+def run_command(modifier, inverse):
+    """queue modifier for the plug-in command and run the command"""
+    plugin_path = os.path.splitext(__file__)[0] + '.py'
+    if not cmds.pluginInfo(plugin_path, q=True, loaded=True):
+        cmds.loadPlugin(plugin_path, quiet=True)
+    pending_modifiers.append((modifier, inverse))
+    getattr(cmds, COMMAND_NAME)()
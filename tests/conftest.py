@@ -0,0 +1,6 @@
+"""Put src on the path, so the tests run under plain pytest"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,84 @@
+"""Tests of the scatter_cache file format
+
+Run with `python -m pytest tests` from the repo root.
+"""
+import numpy as np
+import pytest
+
+import scatter_cache
+
+
+def cache_points(count):
+    """ids, (n, 9) values and source choices of count points"""
+    ids = np.arange(count, dtype=np.int64) * 7 + 3
+    values = np.linspace(-5.0, 5.0, count * 9).reshape(count, 9)
+    choices = np.arange(count) % 2
+    return ids, values, choices
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'points.scache')
+    ids, values, choices = cache_points(100)
+    params = {'seed': 3, 'density_value': 0.5}
+    tiles = [[0, 0, 0, 60], [1, 0, 60, 100]]
+    scatter_cache.write_cache(path, ids, values, choices, ['rock', 'tree'],
+                              params, tiles)
+    cache = scatter_cache.read_cache(path)
+    assert cache['count'] == 100
+    assert cache['sources'] == ['rock', 'tree']
+    assert cache['params'] == params
+    assert cache['tiles'] == tiles
+    np.testing.assert_array_equal(cache['ids'], ids)
+    # the transform columns are stored as float32
+    np.testing.assert_allclose(cache['translate'], values[:, 0:3],
+                               rtol=1e-6)
+    np.testing.assert_allclose(cache['rotate'], values[:, 3:6], rtol=1e-6)
+    np.testing.assert_allclose(cache['scale'], values[:, 6:9], rtol=1e-6)
+    np.testing.assert_array_equal(cache['source'], choices)
+
+
+def test_empty_round_trip(tmp_path):
+    path = str(tmp_path / 'empty.scache')
+    ids, values, choices = cache_points(0)
+    scatter_cache.write_cache(path, ids, values, choices, ['rock'], {})
+    cache = scatter_cache.read_cache(path)
+    assert cache['count'] == 0
+    assert cache['tiles'] is None
+    assert cache['ids'].shape == (0,)
+    assert cache['translate'].shape == (0, 3)
+    assert cache['source'].shape == (0,)
+
+
+def test_truncated_file_is_rejected(tmp_path):
+    path = str(tmp_path / 'points.scache')
+    scatter_cache.write_cache(path, *cache_points(100),
+                              sources=['rock', 'tree'], params={})
+    with open(path, 'rb') as cache_file:
+        data = cache_file.read()
+    for size in (len(data) - 1, scatter_cache.HEADER.size - 1):
+        with open(path, 'wb') as cache_file:
+            cache_file.write(data[:size])
+        with pytest.raises(ValueError):
+            scatter_cache.read_cache(path)
+
+
+def test_wrong_version_is_rejected(tmp_path):
+    path = str(tmp_path / 'points.scache')
+    scatter_cache.write_cache(path, *cache_points(10), sources=['rock'],
+                              params={})
+    with open(path, 'r+b') as cache_file:
+        magic, version, meta_size, count = scatter_cache.HEADER.unpack(
+            cache_file.read(scatter_cache.HEADER.size))
+        cache_file.seek(0)
+        cache_file.write(scatter_cache.HEADER.pack(
+            magic, scatter_cache.VERSION + 1, meta_size, count))
+    with pytest.raises(ValueError, match='version'):
+        scatter_cache.read_cache(path)
+
+
+def test_wrong_magic_is_rejected(tmp_path):
+    path = str(tmp_path / 'other.bin')
+    with open(path, 'wb') as other_file:
+        other_file.write(scatter_cache.HEADER.pack(b'NOTACACH', 1, 0, 0))
+    with pytest.raises(ValueError, match='not a scatter cache'):
+        scatter_cache.read_cache(path)
@@ -0,0 +1,215 @@
+"""Tests of the Maya independent scatter_core math
+
+Run with `python -m pytest tests` from the repo root.
+"""
+import numpy as np
+
+import scatter_core as core
+
+
+def grid_mesh(side):
+    """vertex_samples dict of a side x side grid in XZ facing +Y"""
+    x_values, z_values = np.meshgrid(np.arange(side, dtype=float),
+                                     np.arange(side, dtype=float))
+    points = np.column_stack((x_values.ravel(), np.zeros(side * side),
+                              z_values.ravel()))
+    corners = np.arange(side * side).reshape(side, side)[:-1, :-1].ravel()
+    triangles = np.concatenate((
+        np.column_stack((corners, corners + side, corners + 1)),
+        np.column_stack((corners + 1, corners + side, corners + side + 1))))
+    return {'points': points,
+            'normals': np.tile(core.UP_VECTOR, (len(points), 1)),
+            'triangles': triangles}
+
+
+def settings(**values):
+    """settings dict of every SETTING_NAMES, with a spread of randomness"""
+    result = {'rot_min_x': 0.0, 'rot_min_y': -180.0, 'rot_min_z': 0.0,
+              'rot_max_x': 0.0, 'rot_max_y': 180.0, 'rot_max_z': 0.0,
+              'scl_min_x': 0.5, 'scl_min_y': 0.5, 'scl_min_z': 0.5,
+              'scl_max_x': 2.0, 'scl_max_y': 2.0, 'scl_max_z': 2.0,
+              'min_height_value': 0.0, 'max_height_value': 1.0,
+              'normal_bool': False, 'density_value': 0.5,
+              'surface_bool': False, 'surface_count': 500,
+              'min_distance': 0.0, 'seed': 3,
+              'cull_bands': [], 'cull_margin': 0.0, 'tile_size': 100.0}
+    result.update(values)
+    assert set(result) == set(core.SETTING_NAMES)
+    return result
+
+
+def test_point_random_ignores_chunking_and_order():
+    ids = np.arange(1000, dtype=np.int64) * 7919
+    whole = core.point_random(11, ids, 4, 3)
+    chunks = np.concatenate([core.point_random(11, ids[start:start + 97],
+                                               4, 3)
+                             for start in range(0, len(ids), 97)])
+    order = np.random.RandomState(0).permutation(len(ids))
+    np.testing.assert_array_equal(whole, chunks)
+    np.testing.assert_array_equal(whole[order],
+                                  core.point_random(11, ids[order], 4, 3))
+    # stream s + 1 of a single draw is the second of two draws from s
+    np.testing.assert_array_equal(whole[:, 1:],
+                                  core.point_random(11, ids, 5, 2))
+    assert whole.shape == (1000, 3)
+    assert ((whole >= 0.0) & (whole < 1.0)).all()
+
+
+def test_point_random_depends_on_seed_and_stream():
+    ids = np.arange(100)
+    draws = core.point_random(1, ids, 0)
+    assert not np.array_equal(draws, core.point_random(2, ids, 0))
+    assert not np.array_equal(draws, core.point_random(1, ids, 1))
+
+
+def test_min_distance_mask_spacing_and_maximality():
+    positions = np.random.RandomState(1).uniform(0.0, 10.0, (3000, 3))
+    radius = 0.7
+    keep = core.min_distance_mask(positions, radius,
+                                  np.arange(len(positions)))
+    kept = positions[keep]
+    distances = np.linalg.norm(kept[:, np.newaxis] - kept[np.newaxis],
+                               axis=2)
+    np.fill_diagonal(distances, np.inf)
+    assert distances.min() >= radius
+    # every rejected point lies within radius of a kept one
+    rejected = positions[~keep]
+    nearest = np.linalg.norm(rejected[:, np.newaxis] - kept[np.newaxis],
+                             axis=2).min(axis=1)
+    assert (nearest < radius).all()
+
+
+def test_min_distance_mask_keeps_first_priority():
+    positions = np.zeros((4, 3))
+    keep = core.min_distance_mask(positions, 1.0, np.array([3, 1, 2, 0]))
+    np.testing.assert_array_equal(keep, [False, False, False, True])
+    assert not core.min_distance_mask(np.empty((0, 3)), 1.0,
+                                      np.empty(0)).any()
+
+
+def test_normal_matrices_are_orthonormal_frames():
+    normals = np.array([[0.0, 1.0, 0.0], [0.0, -1.0, 0.0],
+                        [0.0, 2.0, 1e-9], [1.0, 1.0, 0.0],
+                        [0.0, 0.0, -3.0]])
+    positions = np.arange(15, dtype=float).reshape(5, 3)
+    matrices = core.normal_matrices(positions, normals)
+    frames = matrices[:, :3, :3]
+    assert np.isfinite(matrices).all()
+    np.testing.assert_allclose(np.einsum('nij,nkj->nik', frames, frames),
+                               np.tile(np.eye(3), (5, 1, 1)), atol=1e-9)
+    np.testing.assert_allclose(np.linalg.det(frames), 1.0)
+    np.testing.assert_allclose(
+        frames[:, 1],
+        normals / np.linalg.norm(normals, axis=1)[:, np.newaxis])
+    np.testing.assert_array_equal(matrices[:, 3, :3], positions)
+    np.testing.assert_array_equal(matrices[:, :, 3], [[0, 0, 0, 1]] * 5)
+
+
+def test_normal_matrices_of_up_normal_is_identity():
+    matrix = core.normal_matrices(np.zeros((1, 3)),
+                                  core.UP_VECTOR[np.newaxis])[0]
+    np.testing.assert_allclose(matrix, np.eye(4), atol=1e-12)
+
+
+def test_euler_round_trip():
+    rotations = np.column_stack((
+        np.random.RandomState(2).uniform(-179.0, 179.0, 500),
+        np.random.RandomState(3).uniform(-89.0, 89.0, 500),
+        np.random.RandomState(4).uniform(-179.0, 179.0, 500)))
+    np.testing.assert_allclose(
+        core.matrix_rotations(core.euler_matrices(rotations)), rotations,
+        atol=1e-7)
+
+
+def test_euler_round_trip_in_gimbal_lock():
+    rotations = np.array([[30.0, 90.0, 0.0], [10.0, 90.0, 40.0],
+                          [-50.0, -90.0, 20.0], [0.0, -90.0, -70.0]])
+    matrices = core.euler_matrices(rotations)
+    found = core.matrix_rotations(matrices)
+    np.testing.assert_allclose(found[:, 1], rotations[:, 1])
+    np.testing.assert_array_equal(found[:, 2], 0.0)
+    # other angles, the same rotation
+    np.testing.assert_allclose(core.euler_matrices(found), matrices,
+                               atol=1e-9)
+
+
+def test_matrix_rotations_of_normal_frames():
+    normals = np.random.RandomState(5).normal(size=(200, 3))
+    normals[:2] = [[0.0, 1.0, 0.0], [0.0, -1.0, 0.0]]
+    matrices = core.normal_matrices(np.zeros((200, 3)), normals)
+    np.testing.assert_allclose(
+        core.euler_matrices(core.matrix_rotations(matrices)),
+        matrices[:, :3, :3], atol=1e-9)
+
+
+def brute_force_blocked(boxes, queries):
+    return ((queries[:, np.newaxis, :3] <= boxes[np.newaxis, :, 3:]) &
+            (boxes[np.newaxis, :, :3] <= queries[:, np.newaxis, 3:])).all(
+                axis=2).any(axis=1)
+
+
+def test_boxes_blocked_matches_brute_force():
+    random = np.random.RandomState(6)
+    corners = random.uniform(-50.0, 50.0, (400, 3))
+    # mostly small boxes, with a few long ones spanning many cells
+    sizes = random.exponential(1.0, (400, 3))
+    sizes[:5] *= 60.0
+    boxes = np.column_stack((corners, corners + sizes))
+    centres = random.uniform(-60.0, 60.0, (3000, 3))
+    queries = core.radius_boxes(centres, random.exponential(0.8, 3000))
+    index = core.box_index(boxes)
+    blocked = core.boxes_blocked(index, queries)
+    np.testing.assert_array_equal(blocked,
+                                  brute_force_blocked(boxes, queries))
+    assert 0 < blocked.sum() < len(queries)
+
+
+def test_boxes_blocked_without_boxes():
+    queries = core.radius_boxes(np.zeros((3, 3)), np.ones(3))
+    assert not core.boxes_blocked(core.box_index(np.empty((0, 6))),
+                                  queries).any()
+
+
+def test_scatter_transforms_is_deterministic_per_seed():
+    mesh = grid_mesh(30)
+    for values in ({}, {'normal_bool': True},
+                   {'surface_bool': True}, {'min_distance': 1.5}):
+        ids, transforms = core.scatter_transforms([mesh], settings(**values))
+        again_ids, again = core.scatter_transforms([mesh],
+                                                   settings(**values))
+        np.testing.assert_array_equal(ids, again_ids)
+        np.testing.assert_array_equal(transforms, again)
+        assert transforms.shape == (len(ids), 9)
+        assert len(ids)
+        other_ids, other = core.scatter_transforms(
+            [mesh], settings(seed=4, **values))
+        assert not (np.array_equal(ids, other_ids) and
+                    np.array_equal(transforms, other))
+
+
+def test_scatter_transforms_keeps_points_when_density_rises():
+    mesh = grid_mesh(30)
+    low_ids, low = core.scatter_transforms([mesh],
+                                           settings(density_value=0.3))
+    high_ids, high = core.scatter_transforms([mesh],
+                                             settings(density_value=0.6))
+    assert set(low_ids.tolist()) <= set(high_ids.tolist())
+    np.testing.assert_array_equal(high[np.isin(high_ids, low_ids)], low)
+
+
+def test_sample_points_camera_only_drops_points():
+    mesh = grid_mesh(30)
+    # looking down -Z from the middle of the grid's +Z edge, 90 degrees
+    camera = {'matrix': np.array([[1.0, 0.0, 0.0, 0.0],
+                                  [0.0, 1.0, 0.0, 0.0],
+                                  [0.0, 0.0, 1.0, 0.0],
+                                  [15.0, 1.0, 29.0, 1.0]]),
+              'fov': (np.pi / 2, np.pi / 2), 'near': 0.1, 'far': 100.0}
+    for values in ({}, {'surface_bool': True}, {'min_distance': 1.5}):
+        ids = core.sample_points([mesh], settings(**values))[0]
+        culled_ids, positions, normals = core.sample_points(
+            [mesh], settings(**values), camera)
+        assert 0 < len(culled_ids) < len(ids)
+        assert set(culled_ids.tolist()) <= set(ids.tolist())
+        assert (np.abs(positions[:, 0] - 15.0) <=
+                29.0 - positions[:, 2] + 1e-9).all()
@@ -0,0 +1,41 @@
+"""Tests of the worker thread batches of scatter_pipeline
+
+Run with `python -m pytest tests` from the repo root.
+"""
+import numpy as np
+import pytest
+
+import scatter_pipeline
+
+
+def index_rows(start, end):
+    """batch of rows [index, 2 * index] for start <= index < end"""
+    index = np.arange(start, end)
+    return np.column_stack([index, 2 * index])
+
+
+def test_rows_come_in_order():
+    pipeline = scatter_pipeline.BatchPipeline(index_rows, 1000,
+                                              batch_size=64, depth=2)
+    try:
+        rows = [pipeline.row(index) for index in range(1000)]
+    finally:
+        pipeline.close()
+    assert rows == [[index, 2 * index] for index in range(1000)]
+
+
+def test_worker_error_reaches_reader():
+    def failing_rows(start, end):
+        if start >= 128:
+            raise RuntimeError('batch failed at %d' % start)
+        return index_rows(start, end)
+
+    pipeline = scatter_pipeline.BatchPipeline(failing_rows, 1000,
+                                              batch_size=64, depth=2)
+    try:
+        assert pipeline.row(127) == [127, 254]
+        with pytest.raises(RuntimeError, match='batch failed at 128'):
+            pipeline.row(128)
+    finally:
+        pipeline.close()
+    assert not pipeline.worker.is_alive()
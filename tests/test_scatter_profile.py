@@ -0,0 +1,45 @@
+"""Tests of the nested phase totals of scatter_profile
+
+Run with `python -m pytest tests` from the repo root.
+"""
+import time
+
+import pytest
+
+import scatter_profile
+
+
+def phase_totals(report):
+    """dict of phase name to its totals in a profiler report"""
+    return dict((phase['name'], phase) for phase in report['phases'])
+
+
+def test_nested_seconds_count_once():
+    profiler = scatter_profile.ScatterProfiler('nested')
+    with profiler.phase('outer'):
+        time.sleep(0.02)
+        with profiler.phase('inner'):
+            time.sleep(0.05)
+    phases = phase_totals(profiler.finish())
+    outer, inner = phases['outer'], phases['inner']
+    assert outer['seconds'] >= inner['seconds'] + 0.02
+    assert inner['self_seconds'] == inner['seconds']
+    assert outer['self_seconds'] == pytest.approx(
+        outer['seconds'] - inner['seconds'])
+    assert outer['self_seconds'] < inner['self_seconds']
+
+
+@pytest.mark.skipif(scatter_profile.tracemalloc is None or
+                    not hasattr(scatter_profile.tracemalloc, 'reset_peak'),
+                    reason='needs tracemalloc.reset_peak')
+def test_outer_peak_survives_nested_phase():
+    profiler = scatter_profile.ScatterProfiler('peak')
+    with profiler.phase('outer'):
+        block = bytearray(4 * 1024 * 1024)
+        del block
+        with profiler.phase('inner'):
+            small = bytearray(64 * 1024)
+            del small
+    phases = phase_totals(profiler.finish())
+    assert phases['outer']['peak_memory_kb'] >= 4 * 1024
+    assert phases['inner']['peak_memory_kb'] < 1024